@@ -0,0 +1,29 @@
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+
+from scripts.analytics import ANALYTICS_CACHE_PATH, ApplicationFrame, load_frame
+from scripts.entity_resolution import load_resolver
+from scripts.record_store import RESULTS_PATH, RecordStore
+
+
+def analyze(filename=RESULTS_PATH, cache_path=ANALYTICS_CACHE_PATH, days=None):
+    if days is None:
+        # Columns are cached in data/cache and only rebuilt when the dataset changes
+        frame = load_frame(filename, cache_path)
+    else:
+        # A window only reads the month partitions it overlaps, so it is built directly
+        since = (date.today() - timedelta(days=days)).isoformat()
+        frame = ApplicationFrame.from_records(RecordStore(filename).load_since(since), load_resolver())
+    summary = frame.summary()
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Summarize the job application dataset.")
+    parser.add_argument("--days", type=int, help="Only include records from the last N days")
+    args = parser.parse_args()
+    analyze(days=args.days)
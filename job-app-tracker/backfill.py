@@ -0,0 +1,228 @@
+# backfill.py
+"""Offline bulk backfill of job applications using the OpenAI Batch API."""
+
+import argparse
+import json
+import logging
+import os
+from typing import Any, Optional
+
+import main
+from scripts.entity_resolution import assign_application_ids, load_resolver
+from scripts.batch_api import BatchTransport, OpenAIBatchTransport, parse_results, wait_for_batch, write_requests
+from scripts.gmail_fetch import (
+    BATCH_SIZE, DEFAULT_ACCOUNT, GmailSession, discover_accounts, fetch_emails, get_email_contents, get_email_metadata
+)
+from scripts.prefilter import PreFilter
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_DIR = "data/backfill"
+REQUESTS_PATH = os.path.join(BACKFILL_DIR, "batch_requests.jsonl")
+STATE_PATH = os.path.join(BACKFILL_DIR, "state.json")
+
+
+def load_state(filename: str = STATE_PATH) -> dict[str, Any]:
+    """
+    Load the state of a submitted but not yet merged backfill batch.
+
+    Args:
+        filename: Path to the state JSON file.
+
+    Returns:
+        The saved state, or an empty dictionary if no batch is pending.
+    """
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, "r") as f:
+        return json.load(f)
+
+
+def save_state(state: dict[str, Any], filename: str = STATE_PATH) -> None:
+    """
+    Save the pending backfill batch state so polling can resume after a crash.
+
+    Args:
+        state: Dictionary with batch_id, dates, accounts and rejected message IDs.
+        filename: Path to the state JSON file.
+    """
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump(state, f)
+
+
+def collect_emails(limit: Optional[int] = None) -> tuple[dict[str, dict[str, str]], list[str]]:
+    """
+    List every account's unprocessed inbox messages and fetch the ones worth classifying.
+
+    Accounts are discovered like in main.py, each read through its own
+    Gmail session.
+
+    Args:
+        limit: Maximum number of messages to consider across accounts (None for all).
+
+    Returns:
+        Tuple of (emails, rejected). Emails maps message ID to a
+        'content'/'date'/'account' dictionary; rejected lists IDs the
+        pre-filter ruled out.
+    """
+    processed = main.load_processed_ids()
+    prefilter = PreFilter(main.STATUS_KEYWORDS, llm_gate=False)
+    emails: dict[str, dict[str, str]] = {}
+    rejected: list[str] = []
+    considered = 0
+    for account in discover_accounts():
+        if limit is not None and considered >= limit:
+            break
+        session = GmailSession(account.token_path, account.creds_path, name=account.name)
+        message_ids = [m['id'] for m in fetch_emails(since_hours=None, session=session) if m['id'] not in processed]
+        if limit is not None:
+            message_ids = message_ids[:limit - considered]
+        considered += len(message_ids)
+        logger.info(f"[{account.name}] Backfilling {len(message_ids)} unprocessed emails")
+
+        for start in range(0, len(message_ids), BATCH_SIZE):
+            chunk = message_ids[start:start + BATCH_SIZE]
+            metadata = get_email_metadata(chunk, session=session)
+            candidates = []
+            for message_id in chunk:
+                if message_id not in metadata:
+                    continue  # Fetch failed; leave for a later run
+                if prefilter.classify(metadata[message_id]["from"], metadata[message_id]["subject"]) is False:
+                    rejected.append(message_id)
+                else:
+                    candidates.append(message_id)
+            for message_id, email in get_email_contents(candidates, session=session).items():
+                emails[message_id] = dict(email, account=account.name)
+
+    logger.info(f"Pre-filter saved {prefilter.stats()['calls_saved']} requests")
+    return emails, rejected
+
+
+def submit(transport: BatchTransport, emails: dict[str, dict[str, str]], rejected: list[str]) -> str:
+    """
+    Write, upload and start a batch job, persisting state for resumption.
+
+    Args:
+        transport: Batch backend.
+        emails: Mapping of message ID to a 'content'/'date'/'account' dictionary.
+        rejected: Message IDs ruled out locally, marked processed on merge.
+
+    Returns:
+        The batch ID.
+    """
+    write_requests({message_id: email["content"] for message_id, email in emails.items()}, REQUESTS_PATH)
+    batch_id = transport.create(transport.upload(REQUESTS_PATH))
+    save_state({
+        "batch_id": batch_id,
+        "dates": {message_id: email["date"] for message_id, email in emails.items()},
+        "accounts": {message_id: email["account"] for message_id, email in emails.items()},
+        "rejected": rejected
+    })
+    logger.info(f"Submitted batch {batch_id} with {len(emails)} requests")
+    return batch_id
+
+
+def merge_results(extractions: dict[str, Optional[dict[str, str]]], failed: list[str],
+                  dates: dict[str, str], rejected: list[str],
+                  accounts: Optional[dict[str, str]] = None) -> int:
+    """
+    Merge batch extractions into the job application dataset by email ID.
+
+    Messages already marked processed are skipped, so re-merging a batch is
+    harmless. Failed items stay unprocessed for the regular hourly run. New
+    records get their application ID and are added to the lifecycle history
+    as in main.process_all_emails.
+
+    Args:
+        extractions: Mapping of message ID to extraction, or None for non-job emails.
+        failed: Message IDs whose results were unusable.
+        dates: Mapping of message ID to email date, in request order.
+        rejected: Message IDs ruled out by the pre-filter.
+        accounts: Mapping of message ID to the account it came from; records
+            are tagged with it like in main.run_account (batches submitted
+            before accounts were tracked fall back to the default account).
+
+    Returns:
+        Number of new job application records.
+    """
+    main.results = main.load_existing_results()
+    main.processed_email_ids = main.load_processed_ids()
+    main.resolver = load_resolver()
+    main.tag_existing_results()
+    main.lifecycle = main.load_lifecycle(main.results, resolver=main.resolver)
+    failed_ids = set(failed)
+
+    added = 0
+    for message_id, email_date in dates.items():
+        if message_id in main.processed_email_ids or message_id in failed_ids:
+            continue
+        main.processed_email_ids.add(message_id)
+        extraction = extractions.get(message_id)
+        if extraction is None:
+            continue
+        details = main.extraction_to_details(extraction, email_date)
+        details["Account"] = (accounts or {}).get(message_id, DEFAULT_ACCOUNT)
+        details["email_id"] = message_id
+        assign_application_ids([details], main.resolver)
+        main.results.append(details)
+        main.lifecycle.record([details])
+        added += 1
+    main.processed_email_ids.update(rejected)
+
+    main.save_results(compact=True)
+    main.save_lifecycle()
+    main.save_processed_ids(main.processed_email_ids)
+    logger.info(f"Merged {added} new records ({len(failed_ids)} failed, left for the next run)")
+    return added
+
+
+def run_backfill(transport: BatchTransport, limit: Optional[int] = None,
+                 poll_interval: float = 60.0, timeout: Optional[float] = None) -> int:
+    """
+    Run (or resume) a full backfill: collect, submit, poll and merge.
+
+    Args:
+        transport: Batch backend.
+        limit: Maximum number of messages to consider (None for all).
+        poll_interval: Seconds between status polls.
+        timeout: Maximum seconds to wait for the batch (None to wait indefinitely).
+
+    Returns:
+        Number of new job application records.
+    """
+    state = load_state()
+    if state:
+        logger.info(f"Resuming pending batch {state['batch_id']}")
+    else:
+        emails, rejected = collect_emails(limit)
+        if not emails:
+            merge_results({}, [], {}, rejected)
+            return 0
+        submit(transport, emails, rejected)
+        state = load_state()
+
+    batch = wait_for_batch(transport, state["batch_id"], poll_interval=poll_interval, timeout=timeout)
+    if batch["status"] != "completed" or not batch.get("output_file_id"):
+        logger.error(f"Batch {state['batch_id']} ended with status '{batch['status']}'; nothing merged")
+        os.remove(STATE_PATH)
+        return 0
+
+    extractions, failed = parse_results(transport.download(batch["output_file_id"]))
+    missing = [message_id for message_id in state["dates"] if message_id not in extractions]
+    added = merge_results(extractions, sorted(set(failed) | set(missing)), state["dates"], state["rejected"],
+                          state.get("accounts"))
+    os.remove(STATE_PATH)
+    return added
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of emails to backfill")
+    parser.add_argument("--poll-interval", type=float, default=60.0, help="Seconds between status checks")
+    parser.add_argument("--timeout", type=float, default=None, help="Maximum seconds to wait for the batch")
+    args = parser.parse_args()
+
+    from scripts.process_emails import get_client
+    run_backfill(OpenAIBatchTransport(get_client()), limit=args.limit,
+                 poll_interval=args.poll_interval, timeout=args.timeout)
@@ -1,74 +1,51 @@
-import json
 import os
 
-def count_unknown_fields(app):
-    """Count the number of 'Unknown' fields in an application record."""
-    unknown_count = sum(1 for value in app.values() if value == "Unknown")
-    return unknown_count
+from scripts.dedup import DEDUP_INDEX_PATH, DedupIndex, file_stamp
+from scripts.entity_resolution import RESOLVER_PATH, load_resolver
+from scripts.record_store import RESULTS_PATH, RecordStore, dataset_file
 
-def clean_duplicates(filename="data/job_applications.json"):
-    # Load the existing job applications
-    if not os.path.exists(filename):
+
+def clean_duplicates(filename=RESULTS_PATH, index_path=DEDUP_INDEX_PATH, resolver_path=RESOLVER_PATH):
+    # Load the existing job applications (single file or month partitions)
+    if not os.path.exists(dataset_file(filename)):
         print("No job_applications.json found.")
         return
-    
-    with open(filename, 'r') as f:
-        applications = json.load(f)
-    
+
+    store = RecordStore(filename)
+    # Records written by the pipeline carry their application ID; the shared state resolves older ones
+    resolver = load_resolver(resolver_path)
+    index = DedupIndex.load(index_path, resolver)
+
+    # Nothing to do if the dataset is unchanged since the last clean
+    current = index.is_current(file_stamp(dataset_file(filename)))
+    if current and not os.path.exists(store.journal_path):
+        print("No new records since the last clean.")
+        return
+
+    applications = store.load()
     print(f"Found {len(applications)} records before cleaning.")
-    
-    # Create dictionaries to track applications by company and job title
-    unique_apps = {}
-    duplicates_to_remove = []
-    
-    # Group applications by company and job title
-    for i, app in enumerate(applications):
-        key = f"{app['Company']}_{app['Job Title']}"
-        if key not in unique_apps:
-            unique_apps[key] = []
-        unique_apps[key].append((i, app))
-    
-    # Process each group of applications
-    for key, app_list in unique_apps.items():
-        if len(app_list) > 1:  # Multiple entries for the same job
-            # Check for Applied/Declined duplicates
-            has_applied = False
-            has_declined = False
-            for idx, app in app_list:
-                if app['status'] == "Applied":
-                    has_applied = True
-                elif app['status'] == "Declined":
-                    has_declined = True
-            
-            # Remove Applied if Declined exists
-            if has_applied and has_declined:
-                for idx, app in app_list:
-                    if app['status'] == "Applied":
-                        duplicates_to_remove.append(idx)
-            
-            # Handle Interviewed duplicates: keep the most complete record
-            interviewed_records = [(idx, app) for idx, app in app_list if app['status'] == "Interviewed"]
-            if len(interviewed_records) > 1:  # Multiple Interviewed entries
-                # Find the record with the fewest 'Unknown' fields
-                best_record = min(interviewed_records, key=lambda x: count_unknown_fields(x[1]))
-                # Mark all other Interviewed records for removal
-                for idx, app in interviewed_records:
-                    if idx != best_record[0]:  # Skip the best record
-                        duplicates_to_remove.append(idx)
-    
-    # Sort duplicates in reverse order to remove from the end first (avoid index shifting)
-    duplicates_to_remove = list(set(duplicates_to_remove))  # Remove duplicates in removal list
-    duplicates_to_remove.sort(reverse=True)
-    
-    # Remove duplicates
-    for idx in duplicates_to_remove:
-        del applications[idx]
-    
-    # Save the cleaned data
-    with open(filename, 'w') as f:
-        json.dump(applications, f, indent=4)
-    
-    print(f"Cleaned {len(duplicates_to_remove)} duplicate entries. Now {len(applications)} records remain.")
+
+    # Rebuild the index if the file was changed outside the pipeline; records
+    # only appended to it (the usual pipeline run) need no check of the rest
+    if not (current or index.only_appended(dataset_file(filename))) and not index.matches(applications):
+        print("Dataset changed since the last clean; rebuilding the duplicate index.")
+        index = DedupIndex(index_path, resolver)
+
+    # Only groups touched by records added since the last clean are examined
+    new_records = len(applications) - index.count
+    removals = index.update(applications)
+
+    # Remove duplicates in a single pass and save only if something changed
+    applications = index.apply_removals(applications, removals)
+    if removals or store.journal_count:
+        store.compact(applications)
+
+    index.stamp_file(dataset_file(filename))
+    index.save()
+
+    print(f"Checked {new_records} new records. Cleaned {len(removals)} duplicate entries. "
+          f"Now {len(applications)} records remain.")
+
 
 if __name__ == '__main__':
-    clean_duplicates()
\ No newline at end of file
+    clean_duplicates()
@@ -4,12 +4,35 @@
 import json
 import logging
 import os
+import queue
 import signal
 import sys
-from typing import Any, Optional
+import threading
+from functools import partial
+from typing import TYPE_CHECKING, Any, Optional
+
+from scripts.entity_resolution import EntityResolver, assign_application_ids, load_resolver, save_resolver
+from scripts.gmail_fetch import (
+    BATCH_SIZE, GmailAccount, GmailSession, discover_accounts, get_email_contents,
+    get_email_metadata, iter_emails, iter_new_emails, load_sync_cursor, peek_history_id, save_sync_cursor
+)
+from scripts.id_index import (
+    INDEX_PATH as PROCESSED_IDS_PATH, LEGACY_JSON_PATH as LEGACY_PROCESSED_IDS_PATH, SeenIdIndex
+)
+from scripts.lifecycle import ApplicationLifecycle, load_lifecycle
+from scripts.metrics import metrics, profiling, timed, write_run_report
+from scripts.pipeline import JOB, NOT_JOB, SKIPPED, EmailPipeline, PipelineOutcome
+from scripts.prefilter import PreFilter
+from scripts.record_store import RESULTS_PATH, RecordStore
+from scripts.process_emails import (
+    LLMError, classify_email, compactor, extract_application, extract_applications_batch, get_cache,
+    is_job_application, openai_limiter, pack_batches
+)
+from scripts.rate_limit import AdaptiveRateLimiter, CircuitOpenError
 
-from scripts.gmail_fetch import fetch_emails, get_email_snippet, get_email_content
-from scripts.process_emails import is_job_application, classify_email
+# The local gate model needs numpy, which is imported only once a run starts
+if TYPE_CHECKING:
+    from scripts.gate_model import GateModel, LabelLog
 
 # Configure logging
 logging.basicConfig(
@@ -18,10 +41,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Classification mode: "two_stage" (snippet gate + classify_email),
+# "single" (one structured JSON call per email) or "batch" (many emails per call)
+CLASSIFY_MODE = os.getenv("CLASSIFY_MODE", "two_stage")
+
 # Global variables
 results: list[dict[str, Any]] = []
 interrupted: bool = False
-processed_email_ids: set[str] = set()
+processed_email_ids: Optional[SeenIdIndex] = None
+record_stores: dict[str, RecordStore] = {}
+lifecycle: Optional[ApplicationLifecycle] = None
+resolver: Optional[EntityResolver] = None
+gate_model: Optional["GateModel"] = None
+gate_labels: Optional["LabelLog"] = None
 
 # Status normalization keywords (case-insensitive)
 STATUS_KEYWORDS = {
@@ -88,27 +120,84 @@ def parse_classification_details(classification: str) -> dict[str, str]:
     return details
 
 
-def save_results(filename: str = "data/job_applications.json") -> None:
+def get_record_store(filename: str = RESULTS_PATH) -> RecordStore:
+    """
+    Return the record store for a results file, creating it on first use.
+
+    Args:
+        filename: Path to the JSON export.
+
+    Returns:
+        The RecordStore for that file.
+    """
+    if filename not in record_stores:
+        record_stores[filename] = RecordStore(filename)
+    return record_stores[filename]
+
+
+@timed("save_results")
+def save_results(filename: str = RESULTS_PATH, compact: bool = False) -> None:
     """
-    Save job application results to JSON file.
+    Checkpoint job application results.
+
+    Only records added since the last save are appended to the journal;
+    the full JSON export is rewritten when compacting, and left untouched
+    when there is nothing new to fold in.
 
     Args:
         filename: Path to the output JSON file.
+        compact: Fold the journal into the JSON export now.
     """
-    os.makedirs("data", exist_ok=True)
-    # Create a copy of results without internal email_id
-    results_to_save = [{k: v for k, v in r.items() if k != "email_id"} for r in results]
+    store = get_record_store(filename)
     try:
-        with open(filename, "w") as f:
-            json.dump(results_to_save, f, indent=4)
-        logger.info(f"Saved {len(results_to_save)} records to {filename}")
+        # The resolver state goes first, so it always knows the IDs stored on saved records
+        if resolver is not None:
+            save_resolver(resolver)
+        store.append(results[store.count:])
+        if (compact and store.journal_count) or store.should_compact():
+            store.compact(results)
+            logger.info(f"Saved {len(results)} records to {filename}")
+        elif store.journal_count:
+            logger.info(f"Checkpointed {store.journal_count} new records to {store.journal_path}")
     except IOError as e:
         logger.error(f"Failed to save results: {e}")
 
 
-def load_existing_results(filename: str = "data/job_applications.json") -> list[dict[str, Any]]:
+def tag_existing_results(filename: str = RESULTS_PATH) -> None:
+    """
+    Store application IDs on loaded records that were saved without one.
+
+    The records are rewritten right away, so dedup, lifecycle and analytics
+    read the same IDs from then on instead of each resolving them.
+
+    Args:
+        filename: Path to the JSON export the results came from.
+    """
+    tagged = assign_application_ids(results, resolver)
+    if not tagged:
+        return
+    try:
+        save_resolver(resolver)
+        get_record_store(filename).compact(results)
+        logger.info(f"Stored application IDs on {tagged} existing records")
+    except IOError as e:
+        logger.error(f"Failed to save application IDs: {e}")
+
+
+@timed("save_lifecycle")
+def save_lifecycle() -> None:
+    """Persist per-application status histories."""
+    if lifecycle is None:
+        return
+    try:
+        lifecycle.save()
+    except IOError as e:
+        logger.error(f"Failed to save lifecycle state: {e}")
+
+
+def load_existing_results(filename: str = RESULTS_PATH) -> list[dict[str, Any]]:
     """
-    Load existing job application results from JSON file.
+    Load existing job application results, including journaled records.
 
     Args:
         filename: Path to the input JSON file.
@@ -116,63 +205,210 @@ def load_existing_results(filename: str = "data/job_applications.json") -> list[
     Returns:
         List of job application records.
     """
-    if os.path.exists(filename):
-        try:
-            with open(filename, "r") as f:
-                content = f.read().strip()
-                if not content:
-                    return []
-                return json.loads(content)
-        except json.JSONDecodeError as e:
-            logger.error(f"Error reading {filename}: {e}")
-            return []
-        except IOError as e:
-            logger.error(f"Failed to load {filename}: {e}")
-            return []
-    return []
+    try:
+        return get_record_store(filename).load()
+    except json.JSONDecodeError as e:
+        logger.error(f"Error reading {filename}: {e}")
+        return []
+    except IOError as e:
+        logger.error(f"Failed to load {filename}: {e}")
+        return []
 
 
-def save_processed_ids(ids: set[str], filename: str = "data/processed_ids.json") -> None:
+@timed("save_processed_ids")
+def save_processed_ids(ids: Optional[SeenIdIndex]) -> None:
     """
-    Save processed email IDs to JSON file.
+    Persist processed email IDs added since the last save.
 
     Args:
-        ids: Set of processed email IDs.
-        filename: Path to the output JSON file.
+        ids: Index of processed email IDs.
     """
-    os.makedirs("data", exist_ok=True)
+    if ids is None:
+        return
     try:
-        with open(filename, "w") as f:
-            json.dump(list(ids), f)
+        ids.flush()
         logger.info(f"Saved {len(ids)} processed IDs")
     except IOError as e:
         logger.error(f"Failed to save processed IDs: {e}")
 
 
-def load_processed_ids(filename: str = "data/processed_ids.json") -> set[str]:
+def load_processed_ids(filename: str = PROCESSED_IDS_PATH,
+                       legacy_filename: str = LEGACY_PROCESSED_IDS_PATH) -> SeenIdIndex:
     """
-    Load processed email IDs from JSON file.
+    Open the processed email ID index, migrating the legacy JSON list if needed.
 
     Args:
-        filename: Path to the input JSON file.
+        filename: Path to the ID index file.
+        legacy_filename: Path to the legacy JSON list of IDs.
+
+    Returns:
+        Index of processed email IDs.
+    """
+    try:
+        return SeenIdIndex(filename, legacy_json_path=legacy_filename)
+    except json.JSONDecodeError as e:
+        logger.error(f"Error reading {legacy_filename}: {e}")
+    except IOError as e:
+        logger.error(f"Failed to load {filename}: {e}")
+    return SeenIdIndex(filename, legacy_json_path=None)
+
+
+def is_job_email(metadata: dict[str, str], prefilter: Optional[PreFilter] = None,
+                 use_llm: bool = True) -> bool:
+    """
+    Decide whether an email is job-related, asking the LLM only when unsure.
+
+    The rule-based pre-filter is tried first, then the trained gate model
+    (if one has been trained); either may settle the email. A random sample
+    of the gate model's rejections passes anyway, so the extractor labels it.
+
+    Args:
+        metadata: Dictionary with 'snippet', 'from' and 'subject' fields.
+        prefilter: Local rule-based filter tried before the LLM.
+        use_llm: Ask the LLM about ambiguous emails; if False they pass the gate.
+
+    Returns:
+        True if the email appears to be job application-related.
+    """
+    if prefilter is not None:
+        decision = prefilter.classify(metadata.get("from", ""), metadata.get("subject", ""))
+        if decision is not None:
+            return decision
+    if gate_model is not None and metadata:
+        decision = gate_model.classify(metadata)
+        if decision is False and gate_model.audit():
+            return True
+        if decision is not None:
+            return decision
+    if not use_llm:
+        return True
+    return is_job_application(metadata.get("snippet", ""))
+
+
+def extract_details(email_data: dict[str, str]) -> Optional[dict[str, str]]:
+    """
+    Classify full email content and build a job application record.
+
+    Args:
+        email_data: Dictionary with 'content' and 'date' fields.
+
+    Returns:
+        Record details with Company, Job Title, Location, status and Date,
+        or None if the email is not a job application.
+    """
+    classification = classify_email(email_data["content"])
+    if "not job application" in classification.lower():
+        return None
+
+    details = parse_classification_details(classification)
+    details["Date"] = email_data["date"]
+    if details["Company"] or details["Job Title"] or details["Location"] or details["status"]:
+        return details
+    return None
+
+
+def extract_details_structured(email_data: dict[str, str]) -> Optional[dict[str, str]]:
+    """
+    Build a job application record from one structured LLM call.
+
+    Falls back to the two-stage extract_details path if the structured
+    response fails schema validation.
+
+    Args:
+        email_data: Dictionary with 'content' and 'date' fields.
+
+    Returns:
+        Record details with Company, Job Title, Location, status and Date,
+        or None if the email is not a job application.
+    """
+    try:
+        extraction = extract_application(email_data["content"])
+    except ValueError as e:
+        logger.warning(f"Invalid structured response, falling back to classify_email: {e}")
+        return extract_details(email_data)
+    if extraction is None:
+        return None
+    return extraction_to_details(extraction, email_data["date"])
+
+
+def extraction_to_details(extraction: dict[str, str], email_date: str) -> dict[str, str]:
+    """
+    Convert a structured extraction into a job application record.
+
+    Args:
+        extraction: Dictionary with company, title, location and status.
+        email_date: The email's date string.
 
     Returns:
-        Set of processed email IDs.
+        Record details with Company, Job Title, Location, status and Date.
+    """
+    return {
+        "Company": extraction["company"],
+        "Job Title": extraction["title"],
+        "Location": extraction["location"],
+        "status": normalize_status(extraction["status"]),
+        "Date": email_date
+    }
+
+
+def extract_details_batch(emails: dict[str, dict[str, str]]) -> dict[str, Optional[dict[str, str]]]:
     """
-    if os.path.exists(filename):
+    Build job application records for several emails with one LLM call.
+
+    Emails whose batched answer is missing or invalid fall back to the
+    single-message extract_details path.
+
+    Args:
+        emails: Mapping of message ID to a 'content'/'date' dictionary.
+
+    Returns:
+        Mapping of message ID to record details, or None for non-job emails.
+    """
+    extractions, failed = extract_applications_batch({m: e["content"] for m, e in emails.items()})
+    details: dict[str, Optional[dict[str, str]]] = {
+        message_id: extraction_to_details(extraction, emails[message_id]["date"]) if extraction else None
+        for message_id, extraction in extractions.items()
+    }
+    for message_id in failed:
+        details[message_id] = extract_details(emails[message_id])
+    return details
+
+
+def record_gate_label(outcome: PipelineOutcome) -> None:
+    """
+    Log an extractor-verified label for the gate model's training data.
+
+    Only outcomes the full classifier answered are labels. Emails the
+    gate rejected were never checked by the LLM, apart from the gate
+    model's audited sample, which reaches the extractor. Failed extractor
+    calls are ERROR outcomes and are never logged as "not job".
+
+    Args:
+        outcome: A pipeline outcome.
+    """
+    if gate_labels is None or not outcome.extracted or outcome.error is not None or not outcome.preview:
+        return
+    if outcome.status in (JOB, NOT_JOB):
         try:
-            with open(filename, "r") as f:
-                content = f.read().strip()
-                if not content:
-                    return set()
-                return set(json.loads(content))
-        except json.JSONDecodeError as e:
-            logger.error(f"Error reading {filename}: {e}")
-            return set()
+            gate_labels.add(outcome.preview, outcome.status == JOB)
         except IOError as e:
-            logger.error(f"Failed to load {filename}: {e}")
-            return set()
-    return set()
+            logger.error(f"Failed to log gate label: {e}")
+
+
+def is_transient_error(error: Optional[Exception]) -> bool:
+    """
+    Check whether a pipeline error may clear up on a later run.
+
+    Args:
+        error: The outcome's error, if any.
+
+    Returns:
+        True for an open circuit breaker or an OpenAI call (gate or
+        extractor) that kept being throttled or failing server-side.
+    """
+    if isinstance(error, CircuitOpenError):
+        return True
+    return isinstance(error, LLMError) and error.retryable
 
 
 def signal_handler(sig: int, frame: Any) -> None:
@@ -181,95 +417,282 @@ def signal_handler(sig: int, frame: Any) -> None:
     interrupted = True
     logger.info("Interrupt received, saving progress...")
     save_results()
+    save_lifecycle()
     save_processed_ids(processed_email_ids)
     sys.exit(0)
 
 
-def process_all_emails(limit: Optional[int] = None, since_hours: Optional[int] = None) -> list[dict[str, Any]]:
+def log_limiter_metrics(limiter: AdaptiveRateLimiter) -> None:
+    """Log an API rate limiter's final rate, backoff and error counts, and add them to the run metrics."""
+    stats = limiter.metrics()
+    logger.info(
+        f"Rate limiter {stats['name']}: {stats['calls']} calls at {stats['rate']}/s, "
+        f"{stats['throttled']} throttled, {stats['server_errors']} server errors, "
+        f"{stats['retries']} retries, {stats['backoff_total']}s backoff, circuit {stats['state']}"
+    )
+    prefix = f"limiter_{stats['name']}"
+    for key in ("calls", "rate", "throttled", "server_errors", "retries", "backoff_total"):
+        metrics.set_gauge(f"{prefix}_{key}", stats[key])
+
+
+def build_pipeline(session: GmailSession, prefilter: PreFilter) -> EmailPipeline:
     """
-    Fetch and process all job-related emails.
+    Create the classification pipeline for one Gmail account.
 
     Args:
-        limit: Maximum number of emails to process (None for unlimited).
-        since_hours: Only process emails from the last N hours (None for all).
+        session: The account's Gmail session; each account gets its own Gmail
+            worker pool, so one mailbox's quota cannot slow down another.
+        prefilter: Shared rule-based pre-filter.
 
     Returns:
-        List of processed job application records.
+        Pipeline configured for the current CLASSIFY_MODE.
     """
-    global results, interrupted, processed_email_ids
-    signal.signal(signal.SIGINT, signal_handler)
+    single_call = CLASSIFY_MODE in ("single", "batch")
+    batched = CLASSIFY_MODE == "batch"
+    return EmailPipeline(
+        fetch_snippets=partial(get_email_metadata, session=session),
+        is_job=lambda metadata: is_job_email(metadata, prefilter, use_llm=not single_call),
+        fetch_contents=partial(get_email_contents, session=session),
+        extract=extract_details_structured if single_call else extract_details,
+        chunk_size=BATCH_SIZE,
+        extract_batch=extract_details_batch if batched else None,
+        batch_packer=lambda emails: pack_batches({m: e["content"] for m, e in emails.items()})
+    )
+
+
+def run_account(account: GmailAccount, session: GmailSession, prefilter: PreFilter, outcomes: queue.Queue,
+                stop: threading.Event, since_hours: Optional[int] = None, incremental: bool = True) -> None:
+    """
+    List and classify one account's new emails, streaming outcomes to a queue.
 
-    # Load existing state
-    results = load_existing_results()
-    processed_email_ids = load_processed_ids()
-    logger.info(f"Loaded {len(results)} existing records, {len(processed_email_ids)} processed IDs")
+    Runs on a worker thread. Each outcome is put as (account, outcome); the
+    last item is (account, (completed, new_cursor)), where completed is False
+    if listing failed or the run was stopped early.
 
+    Args:
+        account: The Gmail account to process.
+        session: The account's Gmail session, shared with has_new_mail.
+        prefilter: Shared rule-based pre-filter.
+        outcomes: Queue consumed by process_all_emails on the main thread.
+        stop: Set by the consumer to end the run early.
+        since_hours: Only process emails from the last N hours (None for all).
+        incremental: When since_hours is None, only list messages added since
+            the account's persisted Gmail history cursor.
+    """
+    completed = False
+    new_cursor = None
     try:
-        messages = fetch_emails(since_hours=since_hours)
+        if since_hours is None and incremental:
+            messages, new_cursor = iter_new_emails(load_sync_cursor(account=account.name), session=session)
+        else:
+            messages = iter_emails(since_hours=since_hours, session=session)
+
+        # Messages are listed lazily, so classification starts with the first page
+        pending_ids = (msg['id'] for msg in messages if msg['id'] not in processed_email_ids)
+        account_outcomes = build_pipeline(session, prefilter).run(pending_ids)
+        completed = True
+        try:
+            for outcome in account_outcomes:
+                if stop.is_set():
+                    completed = False
+                    break
+                outcomes.put((account, outcome))
+        finally:
+            account_outcomes.close()
+            log_limiter_metrics(session.limiter)
     except Exception as e:
-        logger.error(f"Failed to fetch emails: {e}")
-        return results
+        logger.error(f"[{account.name}] Failed to process emails: {e}")
+        completed = False
+    finally:
+        outcomes.put((account, (completed, new_cursor)))
 
-    logger.info(f"Processing {len(messages)} emails...")
 
-    processed = 0
-    for msg in messages:
-        if interrupted:
-            break
+def has_new_mail(sessions: dict[GmailAccount, GmailSession]) -> bool:
+    """
+    Cheaply check whether any account's mailbox changed since its last sync.
 
-        msg_id = msg['id']
-        if msg_id in processed_email_ids:
-            continue
+    Each account's current historyId is compared with its sync cursor using
+    one profile request, before the Gmail discovery client or OpenAI are
+    loaded.
 
-        if limit is not None and processed >= limit:
-            logger.info("Reached processing limit. Stopping.")
-            break
+    Args:
+        sessions: The Gmail session of each account to check; the run reuses
+            them, so credentials are loaded and refreshed once.
 
+    Returns:
+        False only if every account has a cursor and its mailbox is unchanged.
+    """
+    for account, session in sessions.items():
+        cursor = load_sync_cursor(account=account.name)
+        if cursor is None:
+            return True
         try:
-            snippet = get_email_snippet(msg_id)
-            if not is_job_application(snippet):
-                processed_email_ids.add(msg_id)
-                continue
+            if int(peek_history_id(session)) > int(cursor):
+                return True
+        except Exception as e:
+            logger.warning(f"[{account.name}] Could not check for new mail, running a full sync: {e}")
+            return True
+    return False
 
-            email_data = get_email_content(msg_id)
-            content = email_data["content"]
-            email_date = email_data["date"]
 
-            classification = classify_email(content)
-            processed_email_ids.add(msg_id)
+def process_all_emails(limit: Optional[int] = None, since_hours: Optional[int] = None,
+                       incremental: bool = True) -> list[dict[str, Any]]:
+    """
+    Fetch and process all job-related emails from every configured account.
 
-            if "not job application" in classification.lower():
-                continue
+    Accounts are processed concurrently, each with its own Gmail session,
+    worker pool and sync cursor. Outcomes are merged on the main thread, so
+    results and processed IDs are only ever updated from one thread.
 
-            details = parse_classification_details(classification)
-            details["Date"] = email_date
-            details["email_id"] = msg_id  # Keep internally for deduplication
+    Args:
+        limit: Maximum number of emails to process (None for unlimited).
+        since_hours: Only process emails from the last N hours (None for all).
+        incremental: When since_hours is None, only list messages added since
+            each account's persisted Gmail history cursor.
 
-            if details["Company"] or details["Job Title"] or details["Location"] or details["status"]:
-                logger.info(f"Found: {details['Company']} - {details['Job Title']} ({details['status']})")
-                results.append(details)
-                processed += 1
+    Returns:
+        List of all job application records, or an empty list if no mailbox
+        changed and the dataset was not loaded.
+    """
+    global results, interrupted, processed_email_ids, lifecycle, resolver, gate_model, gate_labels
+    signal.signal(signal.SIGINT, signal_handler)
 
-                if processed % 10 == 0:
-                    save_results()
-                    save_processed_ids(processed_email_ids)
+    accounts = discover_accounts()
+    sessions = {account: GmailSession(account.token_path, account.creds_path, name=account.name)
+                for account in accounts}
+    if since_hours is None and incremental and not has_new_mail(sessions):
+        logger.info("No mailbox changes since the last sync; nothing to process.")
+        metrics.increment("runs_skipped")
+        return []
 
-        except Exception as e:
-            logger.error(f"Error processing email {msg_id}: {e}")
-            processed_email_ids.add(msg_id)  # Mark as processed to avoid retry loops
-            continue
+    # Load existing state
+    results = load_existing_results()
+    processed_email_ids = load_processed_ids()
+    resolver = load_resolver()
+    tag_existing_results()
+    lifecycle = load_lifecycle(results, resolver=resolver)
+    logger.info(f"Loaded {len(results)} existing records, {len(processed_email_ids)} processed IDs")
+
+    prefilter = PreFilter(STATUS_KEYWORDS, llm_gate=CLASSIFY_MODE == "two_stage")
+    from scripts.gate_model import LabelLog, load_gate_model
+    gate_model = load_gate_model(llm_gate=CLASSIFY_MODE == "two_stage")
+    gate_labels = LabelLog()
+    outcomes: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    for account in accounts:
+        threading.Thread(
+            target=run_account, args=(account, sessions[account], prefilter, outcomes, stop, since_hours, incremental),
+            name=f"account-{account.name}", daemon=True
+        ).start()
+
+    processed = 0
+    running = len(accounts)
+    incomplete: set[str] = set()
+    cursors: dict[str, str] = {}
+    try:
+        while running:
+            account, outcome = outcomes.get()
+            if not isinstance(outcome, PipelineOutcome):
+                running -= 1
+                completed, new_cursor = outcome
+                if not completed:
+                    incomplete.add(account.name)
+                elif new_cursor:
+                    cursors[account.name] = new_cursor
+                continue
+            if interrupted:
+                break
+
+            msg_id = outcome.message_id
+            metrics.increment("emails_seen")
+            if outcome.status == SKIPPED or is_transient_error(outcome.error):
+                # Fetch failed or the API is down; leave unprocessed so the next run retries it
+                metrics.increment("emails_skipped")
+                incomplete.add(account.name)
+                continue
+            if outcome.error is not None:
+                metrics.increment("emails_failed")
+            record_gate_label(outcome)
+
+            # Other errors are marked as processed to avoid retry loops
+            processed_email_ids.add(msg_id)
+            if outcome.status != JOB:
+                continue
+
+            details = outcome.details
+            details["Account"] = account.name
+            details["email_id"] = msg_id  # Keep internally for deduplication
+            assign_application_ids([details], resolver)
+            logger.info(f"[{account.name}] Found: {details['Company']} - {details['Job Title']} ({details['status']})")
+            results.append(details)
+            lifecycle.record([details])
+            metrics.increment("jobs_found")
+            processed += 1
+
+            if processed % 10 == 0:
+                save_results()
+                save_lifecycle()
+                save_processed_ids(processed_email_ids)
+
+            if limit is not None and processed >= limit:
+                logger.info("Reached processing limit. Stopping.")
+                break
+    finally:
+        stop.set()
+
+    prefilter_stats = prefilter.stats()
+    logger.info(
+        f"Pre-filter: {prefilter_stats['calls_saved']} LLM calls saved "
+        f"({prefilter_stats['decided_job']} job, {prefilter_stats['decided_not_job']} not job, "
+        f"{prefilter_stats['ambiguous']} sent to LLM)"
+    )
+    for key, value in prefilter_stats.items():
+        metrics.set_gauge(f"prefilter_{key}", value)
+    if gate_model is not None:
+        gate_stats = gate_model.stats()
+        logger.info(
+            f"Gate model: {gate_stats['calls_saved']} LLM calls saved "
+            f"({gate_stats['decided_job']} job, {gate_stats['decided_not_job']} not job, "
+            f"{gate_stats['uncertain']} sent to LLM, {gate_stats['audited']} rejections audited)"
+        )
+        for key, value in gate_stats.items():
+            metrics.set_gauge(f"gate_model_{key}", value)
+    metrics.set_gauge("gate_labels_added", gate_labels.added)
+    cache = get_cache()
+    if cache is not None:
+        stats = cache.stats()
+        logger.info(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+        metrics.set_gauge("llm_cache_entries", stats["entries"])
+    log_limiter_metrics(openai_limiter)
+    compaction = compactor.stats()
+    metrics.set_gauge("prompt_tokens_saved", compaction["tokens_saved"])
+    if compaction["emails"]:
+        logger.info(
+            f"Prompt compaction: {compaction['tokens_saved']} tokens saved over {compaction['emails']} emails "
+            f"({compaction['tokens_before']} -> {compaction['tokens_after']}, "
+            f"{compaction['tokens_saved'] // compaction['emails']} per email)"
+        )
 
     if not interrupted:
-        save_results()
+        save_results(compact=True)
+        save_lifecycle()
         save_processed_ids(processed_email_ids)
+        # Only advance an account's cursor once every listed message has been handled
+        for name, new_cursor in cursors.items():
+            if name not in incomplete:
+                save_sync_cursor(new_cursor, account=name)
 
     return results
 
 
 if __name__ == '__main__':
     try:
-        process_all_emails(limit=None, since_hours=None)
+        with profiling():
+            process_all_emails(limit=None, since_hours=None)
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         save_results()
+        save_lifecycle()
         save_processed_ids(processed_email_ids)
+    finally:
+        write_run_report()
@@ -0,0 +1,304 @@
+# scripts/analytics.py
+"""Columnar analytics over the job application dataset."""
+
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import Any, Optional
+
+import numpy as np
+
+from scripts.dedup import file_stamp
+from scripts.entity_resolution import RESOLVER_PATH, EntityResolver, application_ids, load_resolver, normalize_company
+from scripts.lifecycle import STATUS_RANK, STATUSES
+from scripts.record_store import RESULTS_PATH, RecordStore, dataset_file
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+ANALYTICS_CACHE_PATH = "data/cache/analytics.npz"
+CACHE_VERSION = 1
+
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+# Days since the epoch never reach this; marks unknown or missing dates
+NO_DATE = np.iinfo(np.int32).max
+# 1970-01-05, the first Monday after the epoch, in days
+EPOCH_MONDAY = 4
+
+RECORD_COLUMNS = ("company", "status", "month")
+APPLICATION_COLUMNS = ("first_day", "applied_day", "decision_day", "reached")
+
+# Bit i of an application's 'reached' mask is set once it has a STATUSES[i] record
+REPLIED_MASK = sum(1 << STATUSES.index(s) for s in STATUSES if STATUS_RANK[s] > 0)
+
+
+def status_mask(*statuses: str) -> int:
+    """Return the 'reached' bit mask for statuses."""
+    return sum(1 << STATUSES.index(status) for status in statuses)
+
+
+class ApplicationFrame:
+    """
+    The dataset as NumPy columns, plus one row per canonical application.
+
+    Record columns are categorical codes: ``company`` indexes ``companies``
+    (one display name per normalized company), ``status`` indexes STATUSES
+    with -1 for unknown statuses, and ``month`` counts months since the
+    epoch with -1 for unknown dates. Application columns are reduced once
+    when the cache is built: the first record date, the first Applied and
+    first Offer/Declined dates (days since the epoch, NO_DATE if none) and
+    a bit mask of the statuses reached. Queries are then a handful of
+    vectorized passes with no per-record Python work.
+    """
+
+    def __init__(self, columns: dict[str, np.ndarray]):
+        self.company = columns["company"]
+        self.status = columns["status"]
+        self.month = columns["month"]
+        self.companies = columns["companies"]
+        self.first_day = columns["first_day"]
+        self.applied_day = columns["applied_day"]
+        self.decision_day = columns["decision_day"]
+        self.reached = columns["reached"]
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    @property
+    def application_count(self) -> int:
+        """Number of canonical applications."""
+        return len(self.reached)
+
+    @classmethod
+    def from_records(cls, records: list[dict[str, Any]], resolver: Optional[EntityResolver] = None) -> "ApplicationFrame":
+        """
+        Encode records as columns.
+
+        Args:
+            records: Job application records.
+            resolver: Shared resolver state for records without a stored application ID.
+
+        Returns:
+            The frame.
+        """
+        ids = application_ids(records, resolver or EntityResolver())
+        application_codes: dict[str, int] = {}
+        company_codes: dict[str, int] = {}
+        companies: list[str] = []
+        status_codes = {status: code for code, status in enumerate(STATUSES)}
+
+        application = np.empty(len(records), dtype=np.int32)
+        company = np.empty(len(records), dtype=np.int32)
+        status = np.empty(len(records), dtype=np.int8)
+        dates = []
+        for row, (record, application_id) in enumerate(zip(records, ids)):
+            application[row] = application_codes.setdefault(application_id, len(application_codes))
+            name = record.get("Company") or "Unknown"
+            key = normalize_company(name)
+            if key not in company_codes:
+                company_codes[key] = len(companies)
+                companies.append(name)
+            company[row] = company_codes[key]
+            status[row] = status_codes.get(record.get("status"), -1)
+            date = record.get("Date") or ""
+            dates.append(date if DATE_PATTERN.match(date) else "NaT")
+
+        parsed = np.array(dates, dtype="datetime64[D]")
+        unknown = np.isnat(parsed)
+        day = np.where(unknown, NO_DATE, parsed.astype(np.int64)).astype(np.int32)
+        month = np.where(unknown, -1, parsed.astype("datetime64[M]").astype(np.int64)).astype(np.int32)
+
+        # Per-application reductions over rows grouped by application code
+        order = np.argsort(application, kind="stable")
+        starts = np.flatnonzero(np.r_[True, np.diff(application[order]) != 0]) if len(order) else order
+        by_application = status[order]
+        dated = day[order]
+
+        def first(mask: np.ndarray) -> np.ndarray:
+            if not len(starts):
+                return np.empty(0, dtype=np.int32)
+            return np.minimum.reduceat(np.where(mask, dated, NO_DATE), starts)
+
+        # Records without a known status (code -1) pick the trailing 0
+        bits = np.array([1 << code for code in range(len(STATUSES))] + [0], dtype=np.uint8)[by_application]
+        return cls({
+            "company": company,
+            "status": status,
+            "month": month,
+            "companies": np.array(companies, dtype=str),
+            "first_day": first(np.ones(len(order), dtype=bool)),
+            "applied_day": first(by_application == STATUSES.index("Applied")),
+            # Offer and Declined are the last two status codes
+            "decision_day": first(by_application >= STATUSES.index("Offer")),
+            "reached": np.bitwise_or.reduceat(bits, starts) if len(starts) else np.empty(0, dtype=np.uint8),
+        })
+
+    def save(self, path: str, stamp: Any) -> None:
+        """Atomically write the columns and the source stamp to an .npz file."""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps({"version": CACHE_VERSION, "stamp": stamp})),
+                     companies=self.companies,
+                     **{name: getattr(self, name) for name in RECORD_COLUMNS + APPLICATION_COLUMNS})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, stamp: Any) -> Optional["ApplicationFrame"]:
+        """
+        Load a cached frame if it was built from the source with this stamp.
+
+        Returns:
+            The frame, or None if the cache is missing, stale or unreadable.
+        """
+        if stamp is None or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("version") != CACHE_VERSION or meta.get("stamp") != stamp:
+                    return None
+                return cls({name: data[name] for name in ("companies",) + RECORD_COLUMNS + APPLICATION_COLUMNS})
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable analytics cache {path}: {e}")
+            return None
+
+    def status_counts(self) -> dict[str, int]:
+        """Return the number of records with each status."""
+        counts = np.bincount(self.status[self.status >= 0], minlength=len(STATUSES))
+        return {status: int(count) for status, count in zip(STATUSES, counts)}
+
+    def month_counts(self) -> dict[str, dict[str, int]]:
+        """Return {'YYYY-MM': {status: records}} for records with a known date and status, oldest month first."""
+        known = (self.month >= 0) & (self.status >= 0)
+        months = self.month[known].astype(np.int64)
+        if not len(months):
+            return {}
+        first = months.min()
+        counts = np.bincount((months - first) * len(STATUSES) + self.status[known],
+                             minlength=(months.max() - first + 1) * len(STATUSES)).reshape(-1, len(STATUSES))
+        result = {}
+        for offset in np.flatnonzero(counts.sum(axis=1)):
+            month = str(np.datetime64(int(first + offset), "M"))
+            result[month] = {status: int(n) for status, n in zip(STATUSES, counts[offset])}
+        return result
+
+    def company_counts(self, limit: Optional[int] = 10) -> list[tuple[str, int]]:
+        """Return (company, records) pairs for the companies with the most records."""
+        counts = np.bincount(self.company, minlength=len(self.companies))
+        order = np.argsort(-counts, kind="stable")[:limit]
+        return [(str(self.companies[code]), int(counts[code])) for code in order if counts[code]]
+
+    def response_rate(self) -> float:
+        """Return the fraction of applications that got any reply (interview, offer or rejection)."""
+        if not self.application_count:
+            return 0.0
+        return float(np.count_nonzero(self.reached & REPLIED_MASK) / self.application_count)
+
+    def time_to_decision(self) -> dict[str, float]:
+        """
+        Summarize days from an application's first Applied record to its first offer or rejection.
+
+        Applications without a dated Applied record or a later decision are
+        left out, since when they were submitted is unknown.
+
+        Returns:
+            Dictionary with count, mean, median and p90 in days.
+        """
+        valid = (self.applied_day != NO_DATE) & (self.decision_day != NO_DATE) & (self.decision_day >= self.applied_day)
+        days = (self.decision_day - self.applied_day)[valid]
+        if not len(days):
+            return {"count": 0, "mean": 0.0, "median": 0.0, "p90": 0.0}
+        return {
+            "count": int(len(days)),
+            "mean": round(float(days.mean()), 2),
+            "median": float(np.median(days)),
+            "p90": round(float(np.percentile(days, 90)), 2),
+        }
+
+    def weekly_funnel(self) -> list[dict[str, Any]]:
+        """
+        Count applications by the week (starting Monday) of their first record.
+
+        Returns:
+            One dictionary per week, oldest first, with the number of
+            applications started and how many of them were interviewed,
+            got an offer or were declined.
+        """
+        known = self.first_day != NO_DATE
+        if not known.any():
+            return []
+        weeks = (self.first_day[known] - EPOCH_MONDAY) // 7
+        offset = weeks - weeks.min()
+        reached = self.reached[known]
+
+        columns = {"applied": np.bincount(offset)}
+        for stage, statuses in (("interviewed", ("Interviewed", "Offer")), ("offer", ("Offer",)),
+                                ("declined", ("Declined",))):
+            flags = (reached & status_mask(*statuses)) != 0
+            columns[stage] = np.bincount(offset, weights=flags, minlength=len(columns["applied"])).astype(np.int64)
+        first_monday = int(weeks.min()) * 7 + EPOCH_MONDAY
+        return [
+            {"week": str(np.datetime64(first_monday + 7 * int(i), "D")),
+             **{name: int(values[i]) for name, values in columns.items()}}
+            for i in np.flatnonzero(columns["applied"])
+        ]
+
+    def summary(self) -> dict[str, Any]:
+        """Return every query result in one JSON-serializable dictionary."""
+        return {
+            "records": len(self),
+            "applications": self.application_count,
+            "status_counts": self.status_counts(),
+            "month_counts": self.month_counts(),
+            "top_companies": self.company_counts(),
+            "response_rate": round(self.response_rate(), 4),
+            "time_to_decision": self.time_to_decision(),
+            "weekly_funnel": self.weekly_funnel(),
+        }
+
+
+def source_stamp(path: str = RESULTS_PATH) -> Optional[list[Any]]:
+    """Return the stamps of the JSON export (or partition manifest) and the journal, or None if there is no dataset."""
+    store = RecordStore(path)
+    stamp = file_stamp(dataset_file(path))
+    if stamp is None and not os.path.exists(store.journal_path):
+        return None
+    return [stamp, file_stamp(store.journal_path)]
+
+
+def load_frame(path: str = RESULTS_PATH, cache_path: str = ANALYTICS_CACHE_PATH,
+               resolver_path: str = RESOLVER_PATH) -> ApplicationFrame:
+    """
+    Return the dataset as columns, rebuilding the cache only when the source changed.
+
+    Args:
+        path: Path to the job applications JSON export.
+        cache_path: Path to the .npz column cache.
+        resolver_path: Path to the shared resolver state, for records without an application ID.
+
+    Returns:
+        The frame.
+    """
+    stamp = source_stamp(path)
+    frame = ApplicationFrame.load(cache_path, stamp)
+    if frame is not None:
+        return frame
+
+    # read() rather than load(): an analytics query must not finish a pipeline's interrupted compaction
+    records = RecordStore(path).read()
+    frame = ApplicationFrame.from_records(records, load_resolver(resolver_path))
+    if stamp is not None:
+        try:
+            frame.save(cache_path, stamp)
+        except OSError as e:
+            logger.warning(f"Failed to write analytics cache {cache_path}: {e}")
+    logger.info(f"Built analytics columns for {len(frame)} records ({frame.application_count} applications)")
+    return frame
@@ -0,0 +1,217 @@
+# scripts/batch_api.py
+"""OpenAI Batch API support for offline bulk classification."""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Optional, Protocol
+
+from scripts.process_emails import EXTRACT_PROMPT, MODEL, compactor, validate_extraction
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchTransport(Protocol):
+    """Operations needed to run a batch job; implemented by real and fake backends."""
+
+    def upload(self, path: str) -> str:
+        """Upload a JSONL request file and return its file ID."""
+
+    def create(self, input_file_id: str) -> str:
+        """Start a batch job over an uploaded file and return the batch ID."""
+
+    def retrieve(self, batch_id: str) -> dict[str, Any]:
+        """Return the batch's 'status', 'output_file_id' and 'error_file_id'."""
+
+    def download(self, file_id: str) -> str:
+        """Return the text content of a result file."""
+
+
+class OpenAIBatchTransport:
+    """BatchTransport backed by the OpenAI Files and Batches APIs."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def upload(self, path: str) -> str:
+        with open(path, "rb") as f:
+            return self.client.files.create(file=f, purpose="batch").id
+
+    def create(self, input_file_id: str) -> str:
+        batch = self.client.batches.create(
+            input_file_id=input_file_id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=COMPLETION_WINDOW
+        )
+        return batch.id
+
+    def retrieve(self, batch_id: str) -> dict[str, Any]:
+        batch = self.client.batches.retrieve(batch_id)
+        return {
+            "status": batch.status,
+            "output_file_id": batch.output_file_id,
+            "error_file_id": batch.error_file_id,
+        }
+
+    def download(self, file_id: str) -> str:
+        return self.client.files.content(file_id).text
+
+
+class LocalBatchTransport:
+    """
+    In-process stand-in for the Batch API, used in tests and dry runs.
+
+    Each request body is answered by ``responder``, which receives the chat
+    completion request body and returns the assistant message text.
+    """
+
+    def __init__(self, responder: Callable[[dict[str, Any]], str], polls_until_complete: int = 1):
+        self.responder = responder
+        self.polls_until_complete = polls_until_complete
+        self.files: dict[str, str] = {}
+        self.batches: dict[str, dict[str, Any]] = {}
+
+    def upload(self, path: str) -> str:
+        file_id = f"file-{len(self.files)}"
+        with open(path, "r") as f:
+            self.files[file_id] = f.read()
+        return file_id
+
+    def create(self, input_file_id: str) -> str:
+        batch_id = f"batch-{len(self.batches)}"
+        self.batches[batch_id] = {"input_file_id": input_file_id, "polls": 0}
+        return batch_id
+
+    def retrieve(self, batch_id: str) -> dict[str, Any]:
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        if batch["polls"] < self.polls_until_complete:
+            return {"status": "in_progress", "output_file_id": None, "error_file_id": None}
+        if "output_file_id" not in batch:
+            lines = []
+            for line in self.files[batch["input_file_id"]].splitlines():
+                request = json.loads(line)
+                content = self.responder(request["body"])
+                lines.append(json.dumps({
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": {
+                        "choices": [{"message": {"role": "assistant", "content": content}}]
+                    }},
+                    "error": None,
+                }))
+            batch["output_file_id"] = f"file-{len(self.files)}"
+            self.files[batch["output_file_id"]] = "\n".join(lines)
+        return {"status": "completed", "output_file_id": batch["output_file_id"], "error_file_id": None}
+
+    def download(self, file_id: str) -> str:
+        return self.files[file_id]
+
+
+def write_requests(emails: dict[str, str], path: str) -> int:
+    """
+    Write one structured-extraction request per email to a Batch API JSONL file.
+
+    Contents are compacted to the prompt token budget, as in the online path.
+
+    Args:
+        emails: Mapping of message ID to raw email content.
+        path: Output JSONL path.
+
+    Returns:
+        Number of requests written.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        for message_id, content in emails.items():
+            f.write(json.dumps({
+                "custom_id": message_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": MODEL,
+                    "messages": [
+                        {"role": "system", "content": EXTRACT_PROMPT},
+                        {"role": "user", "content": compactor.compact(content, label=message_id)}
+                    ],
+                    "response_format": {"type": "json_object"}
+                }
+            }) + "\n")
+    logger.info(f"Wrote {len(emails)} batch requests to {path}")
+    return len(emails)
+
+
+def wait_for_batch(transport: BatchTransport, batch_id: str, poll_interval: float = 60.0,
+                   timeout: Optional[float] = None) -> dict[str, Any]:
+    """
+    Poll a batch job until it reaches a terminal status.
+
+    Args:
+        transport: Batch backend.
+        batch_id: ID returned by transport.create.
+        poll_interval: Seconds between polls.
+        timeout: Maximum seconds to wait (None to wait indefinitely).
+
+    Returns:
+        The final status dictionary from transport.retrieve.
+
+    Raises:
+        TimeoutError: If the batch is still running after timeout seconds.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        batch = transport.retrieve(batch_id)
+        if batch["status"] in TERMINAL_STATUSES:
+            logger.info(f"Batch {batch_id} finished with status '{batch['status']}'")
+            return batch
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"Batch {batch_id} still '{batch['status']}' after {timeout}s")
+        logger.info(f"Batch {batch_id} is '{batch['status']}', checking again in {poll_interval:.0f}s")
+        time.sleep(poll_interval)
+
+
+def parse_results(output: str) -> tuple[dict[str, Optional[dict[str, str]]], list[str]]:
+    """
+    Parse a Batch API output file into validated extractions.
+
+    Args:
+        output: JSONL text downloaded from the batch's output file.
+
+    Returns:
+        Tuple of (extractions, failed_ids). Extractions maps custom_id to the
+        extraction dictionary, or None for non-job emails. Corrupt lines are
+        skipped, so their messages appear in neither.
+    """
+    extractions: dict[str, Optional[dict[str, str]]] = {}
+    failed: list[str] = []
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        try:
+            result = json.loads(line)
+            if not isinstance(result, dict):
+                raise ValueError("result is not a JSON object")
+        except ValueError as e:
+            # Its message is missing from the results, so callers treat it as failed
+            logger.warning(f"Skipping unreadable batch output line: {e}")
+            continue
+        message_id = result.get("custom_id")
+        try:
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                raise ValueError(result.get("error") or f"status {response.get('status_code')}")
+            content = response["body"]["choices"][0]["message"]["content"]
+            extractions[message_id] = validate_extraction(json.loads(content))
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            logger.warning(f"Batch result for {message_id} is unusable: {e}")
+            failed.append(message_id)
+    return extractions, failed
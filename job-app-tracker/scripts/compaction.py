@@ -0,0 +1,242 @@
+# scripts/compaction.py
+"""Prompt compaction: strip email boilerplate and trim to a token budget."""
+
+import logging
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+try:
+    import tiktoken
+except ImportError:  # Optional: token counts fall back to a character heuristic
+    tiktoken = None
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Maximum tokens of email text sent per classification (can be overridden via environment variables)
+EMAIL_TOKEN_BUDGET = int(os.getenv('LLM_EMAIL_TOKEN_BUDGET', '1000'))
+TOKENIZER_MODEL = "gpt-3.5-turbo"
+
+# Lines that start a quoted earlier message; everything after them is dropped
+REPLY_MARKER_PATTERN = re.compile(
+    r"^(?:On .{1,200}wrote:\s*$"
+    r"|-{2,}\s*(?:Original|Forwarded) Message\s*-{2,}"
+    r"|_{10,}\s*$"
+    r"|From: .+\n(?:Sent|Date): )",
+    re.IGNORECASE | re.MULTILINE
+)
+# Signature delimiter ("-- " on its own line)
+SIGNATURE_PATTERN = re.compile(r"^-- ?$", re.MULTILINE)
+# Footer boilerplate (unsubscribe blocks, legal notices), removed from the end of the body
+FOOTER_PATTERN = re.compile(
+    r"unsubscribe|manage (?:your )?(?:email )?(?:preferences|subscriptions)|email preferences"
+    r"|you (?:are )?receiv(?:ed|ing) this (?:email|message)|this (?:email|message) was sent to"
+    r"|privacy policy|terms of (?:use|service)|all rights reserved|\u00a9|\(c\) \d{4}"
+    r"|intended (?:solely )?for the (?:named )?(?:addressee|recipient)|confidential(?:ity)? notice"
+    r"|view (?:this email )?in (?:your|a) browser|do not reply to this (?:email|message)",
+    re.IGNORECASE
+)
+# Footer text longer than this is kept, in case it carries real content
+FOOTER_MAX_CHARS = 600
+# Where a footer can start within a line that also holds content
+FOOTER_SEPARATORS = (". ", "! ", "? ", "| ")
+URL_PATTERN = re.compile(r"https?://[^\s<>\"')\]]+", re.IGNORECASE)
+INVISIBLE_PATTERN = re.compile(r"[\u200b-\u200f\u2060\ufeff\u034f\u00ad]")
+SPACE_PATTERN = re.compile(r"[ \t\u00a0\u2007\u202f]+")
+
+HEURISTIC_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Any:
+    """Return the tiktoken encoding for TOKENIZER_MODEL, or None if unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(TOKENIZER_MODEL)
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens in a text.
+
+    Args:
+        text: Input text.
+
+    Returns:
+        Exact count with tiktoken, otherwise an estimate of four characters per token.
+    """
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + HEURISTIC_CHARS_PER_TOKEN - 1) // HEURISTIC_CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, token_budget: int) -> str:
+    """
+    Cut a text to at most token_budget tokens.
+
+    Args:
+        text: Input text.
+        token_budget: Maximum number of tokens to keep.
+
+    Returns:
+        The longest prefix within the budget.
+    """
+    encoding = _encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= token_budget:
+            return text
+        return encoding.decode(tokens[:token_budget])
+    return text[:token_budget * HEURISTIC_CHARS_PER_TOKEN]
+
+
+def _shorten_url(match: re.Match) -> str:
+    """Replace a URL (often a long tracking redirect) with its host."""
+    host = urlsplit(match.group(0)).hostname or ""
+    return f"<{host}>" if host else ""
+
+
+def _strip_footer(lines: list[str]) -> list[str]:
+    """
+    Drop footer boilerplate from the end of a body's lines.
+
+    Lines are examined from the last one up, stopping at the first line
+    with no footer text. A line that starts with content keeps the text
+    before the sentence holding the footer, since plain-text emails often
+    run the footer into the message. The last non-empty line is never
+    dropped whole.
+    """
+    lines = list(lines)
+    while lines:
+        line = lines[-1]
+        if not line:
+            lines.pop()
+            continue
+        match = FOOTER_PATTERN.search(line)
+        if not match:
+            break
+        cut = max(line.rfind(separator, 0, match.start()) for separator in FOOTER_SEPARATORS)
+        if len(line) - cut > FOOTER_MAX_CHARS:
+            break
+        content = line[:cut + 1].rstrip(" |") if cut >= 0 else ""
+        if content:
+            lines[-1] = content
+            break
+        if not any(lines[:-1]):
+            break
+        lines.pop()
+    return lines
+
+
+def strip_boilerplate(body: str) -> str:
+    """
+    Remove quoted replies, signatures, footers and tracking URLs from an email body.
+
+    Args:
+        body: Plain-text email body.
+
+    Returns:
+        The body with boilerplate removed and whitespace normalized.
+    """
+    body = INVISIBLE_PATTERN.sub("", body.replace("\r\n", "\n"))
+
+    # Drop quoted history and the signature; the new text comes first
+    for pattern in (REPLY_MARKER_PATTERN, SIGNATURE_PATTERN):
+        match = pattern.search(body)
+        if match and match.start() > 0:
+            body = body[:match.start()]
+    lines = [line for line in body.split("\n") if not line.lstrip().startswith(">")]
+
+    body = URL_PATTERN.sub(_shorten_url, "\n".join(lines))
+    lines = [SPACE_PATTERN.sub(" ", line).strip() for line in body.split("\n")]
+    body = "\n".join(_strip_footer(lines))
+
+    paragraphs = [p.strip() for p in re.split(r"\n{2,}", body)]
+    return "\n\n".join(p for p in paragraphs if p)
+
+
+# Batch packing sizes a chunk's emails right before the batch prompt compacts them again
+@lru_cache(maxsize=256)
+def compact_email(content: str, token_budget: int = EMAIL_TOKEN_BUDGET) -> str:
+    """
+    Compact email content for a prompt.
+
+    The header block (everything before the first blank line, e.g. From and
+    Subject) is kept as is; the body is stripped of boilerplate and the
+    result trimmed to the token budget.
+
+    Args:
+        content: Email content as built by parse_message_content.
+        token_budget: Maximum tokens of compacted text.
+
+    Returns:
+        The compacted content.
+    """
+    header, separator, body = content.partition("\n\n")
+    if not separator:
+        header, body = "", content
+    compacted = strip_boilerplate(body)
+    if header:
+        compacted = f"{header.strip()}\n\n{compacted}" if compacted else header.strip()
+    return truncate_to_tokens(compacted, token_budget)
+
+
+class PromptCompactor:
+    """Compacts emails before classification and tracks the tokens saved."""
+
+    def __init__(self, token_budget: int = EMAIL_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self._lock = threading.Lock()
+        self._emails = 0
+        self._tokens_before = 0
+        self._tokens_after = 0
+
+    def compact(self, content: str, label: Optional[str] = None) -> str:
+        """
+        Compact one email and record its token savings.
+
+        Args:
+            content: Email content.
+            label: Optional identifier used in the per-email log line.
+
+        Returns:
+            The compacted content.
+        """
+        compacted = compact_email(content, self.token_budget)
+        before = count_tokens(content)
+        after = count_tokens(compacted)
+        logger.debug(f"Compacted email{f' {label}' if label else ''}: {before} -> {after} tokens "
+                     f"({before - after} saved)")
+        with self._lock:
+            self._emails += 1
+            self._tokens_before += before
+            self._tokens_after += after
+        return compacted
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return compaction counters.
+
+        Returns:
+            Dictionary with emails, tokens_before, tokens_after and tokens_saved.
+        """
+        with self._lock:
+            return {
+                "emails": self._emails,
+                "tokens_before": self._tokens_before,
+                "tokens_after": self._tokens_after,
+                "tokens_saved": self._tokens_before - self._tokens_after,
+            }
@@ -0,0 +1,340 @@
+# scripts/dedup.py
+"""Incremental duplicate detection for job application records."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Optional
+
+from scripts.entity_resolution import EntityResolver, application_ids
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEDUP_INDEX_PATH = "data/dedup_index.json"
+INDEX_VERSION = 6
+# Hex digits kept from each record's SHA-256
+RECORD_HASH_CHARS = 16
+# The JSON export ends with EXPORT_END; appending records replaces it with EXPORT_CONTINUATION
+EXPORT_END = b"\n]"
+EXPORT_CONTINUATION = b",\n"
+
+
+def count_unknown_fields(app: dict[str, Any]) -> int:
+    """Count the number of 'Unknown' fields in an application record."""
+    return sum(1 for value in app.values() if value == "Unknown")
+
+
+def record_fingerprint(app: dict[str, Any]) -> str:
+    """Return a canonical JSON form of a record."""
+    return json.dumps(app, sort_keys=True)
+
+
+def record_hash(app: dict[str, Any]) -> str:
+    """Return a short SHA-256 of a record's canonical form, used to check the index still matches the file."""
+    return hashlib.sha256(record_fingerprint(app).encode("utf-8")).hexdigest()[:RECORD_HASH_CHARS]
+
+
+def file_stamp(path: str) -> Optional[str]:
+    """
+    Return the SHA-256 of a file's content, or None if it does not exist.
+
+    Content rather than size and mtime, since a fresh CI checkout gives
+    every file a new mtime. For a partitioned dataset, pass the manifest:
+    it lists each partition's SHA-256 and the record order.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def _parse_manifest(content: bytes) -> Optional[dict[str, Any]]:
+    """Decode a partition manifest, or return None if the content is not one."""
+    try:
+        manifest = json.loads(content)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("order"), list) \
+            or not isinstance(manifest.get("partitions"), dict):
+        return None
+    return manifest
+
+
+class DedupIndex:
+    """
+    Persistent per-group state for the duplicate rules.
+
+    Records are grouped by the canonical application ID stored on them
+    (resolved with the shared resolver state for older records), so
+    'Acme Inc.'/'Operation Assistant' and 'acme'/'Operations Assistant'
+    are one group. For every group the index keeps just what the
+    rules need: positions of Applied records (while the group has no
+    Declined record), whether a Declined record exists, and the position and
+    completeness of the kept Interviewed record. Records before ``count``
+    have already been cleaned, so each run only examines newer records.
+
+    A short hash of every cleaned record is kept to detect edits, and only
+    new records are hashed on each run. A dataset that merely gained
+    appended records is recognized from the export's bytes, or from the
+    manifest and the partitions that gained records, so the per-record
+    check is needed only when the dataset changed in some other way.
+
+    Rules (unchanged from the original cleaner):
+        - If a group has both Applied and Declined records, Applied ones are removed.
+        - Of several Interviewed records, the one with the fewest 'Unknown'
+          fields (earliest on ties) is kept.
+    """
+
+    def __init__(self, path: str = DEDUP_INDEX_PATH, resolver: Optional[EntityResolver] = None):
+        self.path = path
+        self.count = 0
+        self.hashes: list[str] = []
+        self.stamp: Optional[str] = None
+        # [size, SHA-256] of the stamped file without its closing EXPORT_END
+        self.head: Optional[list[Any]] = None
+        # Record order and partition entries of the stamped partition manifest
+        self.manifest: Optional[dict[str, Any]] = None
+        self.groups: dict[str, dict[str, Any]] = {}
+        self.resolver = resolver or EntityResolver()
+
+    @classmethod
+    def load(cls, path: str = DEDUP_INDEX_PATH, resolver: Optional[EntityResolver] = None) -> "DedupIndex":
+        """
+        Load the index, or return an empty one if it is missing or unreadable.
+
+        Args:
+            path: Path to the index JSON file.
+            resolver: Shared resolver state for records without an application ID.
+
+        Returns:
+            The loaded index.
+        """
+        index = cls(path, resolver)
+        if not os.path.exists(path):
+            return index
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                raise ValueError(f"unsupported version {data.get('version')}")
+            index.count = data["count"]
+            index.hashes = data["hashes"]
+            index.stamp = data["stamp"]
+            index.head = data["head"]
+            index.manifest = data["manifest"]
+            index.groups = data["groups"]
+        except (json.JSONDecodeError, KeyError, ValueError, TypeError, IndexError) as e:
+            logger.warning(f"Ignoring unreadable dedup index {path}: {e}")
+            return cls(path, resolver)
+        return index
+
+    def save(self) -> None:
+        """Atomically write the index."""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "count": self.count,
+                "hashes": self.hashes,
+                "stamp": self.stamp,
+                "head": self.head,
+                "manifest": self.manifest,
+                "groups": self.groups,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def is_current(self, stamp: Optional[str]) -> bool:
+        """Return True if the dataset file's content is unchanged since the index was saved."""
+        return stamp is not None and stamp == self.stamp
+
+    def stamp_file(self, path: str) -> None:
+        """
+        Remember the content of the dataset file the index now matches.
+
+        Args:
+            path: The JSON export, or the manifest of a partitioned dataset.
+        """
+        self.stamp = self.head = self.manifest = None
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            content = f.read()
+        # Same digest as file_stamp(), from the one read
+        self.stamp = hashlib.sha256(content).hexdigest()
+        if content.endswith(EXPORT_END):
+            head = content[:-len(EXPORT_END)]
+            self.head = [len(head), hashlib.sha256(head).hexdigest()]
+            return
+        manifest = _parse_manifest(content)
+        if manifest is not None:
+            self.manifest = {"order": manifest["order"], "partitions": manifest["partitions"]}
+
+    def only_appended(self, path: str) -> bool:
+        """
+        Check whether the dataset file is the stamped one with records appended.
+
+        Compares raw bytes, which is much cheaper than matches(). For a
+        manifest, only the partitions that gained records are read. A
+        reformatted export is never recognized, and falls back to it.
+
+        Args:
+            path: The JSON export, or the manifest of a partitioned dataset.
+
+        Returns:
+            True if the stamped content is an unchanged prefix of the dataset.
+        """
+        if not os.path.exists(path):
+            return False
+        if self.manifest is not None:
+            return self._manifest_appended(path)
+        if self.head is None:
+            return False
+        size, digest = self.head
+        with open(path, "rb") as f:
+            head = f.read(size)
+            continuation = f.read(len(EXPORT_CONTINUATION))
+        return continuation == EXPORT_CONTINUATION and hashlib.sha256(head).hexdigest() == digest
+
+    def _manifest_appended(self, path: str) -> bool:
+        """
+        Check whether a partition manifest is the stamped one with records appended.
+
+        The stamped record order must be a prefix of the new one (its last
+        run may have grown). Partitions that gained no records must keep
+        their SHA-256, and each one that did must still start with its
+        stamped records.
+        """
+        with open(path, "rb") as f:
+            manifest = _parse_manifest(f.read())
+        if manifest is None:
+            return False
+        old_order, new_order = self.manifest["order"], manifest["order"]
+        if old_order:
+            last = len(old_order) - 1
+            if (len(new_order) <= last or new_order[:last] != old_order[:last]
+                    or new_order[last][0] != old_order[last][0] or new_order[last][1] < old_order[last][1]):
+                return False
+
+        directory = os.path.dirname(path)
+        for key, old in self.manifest["partitions"].items():
+            new = manifest["partitions"].get(key)
+            if new is None or new["count"] < old["count"]:
+                return False
+            if new["count"] == old["count"]:
+                if new["sha256"] != old["sha256"]:
+                    return False
+                continue
+            try:
+                with open(os.path.join(directory, new["file"]), "r") as f:
+                    rows = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Could not read partition {key}: {e}")
+                return False
+            # Partitions are written as json.dumps(rows, indent=4), so the stamped rows re-serialize to the stamped hash
+            stamped = json.dumps(rows[:old["count"]], indent=4).encode("utf-8")
+            if len(rows) != new["count"] or hashlib.sha256(stamped).hexdigest() != old["sha256"]:
+                return False
+        return True
+
+    def matches(self, applications: list[dict[str, Any]]) -> bool:
+        """
+        Check that the indexed records are still the start of the dataset.
+
+        Args:
+            applications: All records in the dataset.
+
+        Returns:
+            False if any indexed record was removed, reordered or edited
+            outside the cleaner.
+        """
+        if self.count == 0:
+            return True
+        return (len(applications) >= self.count and len(self.hashes) == self.count
+                and all(record_hash(app) == expected for app, expected in zip(applications, self.hashes)))
+
+    def update(self, applications: list[dict[str, Any]]) -> set[int]:
+        """
+        Apply the duplicate rules to records added since the last update.
+
+        Args:
+            applications: All records in the dataset.
+
+        Returns:
+            Positions of records to remove.
+        """
+        removals: set[int] = set()
+        new_ids = application_ids(applications[self.count:], self.resolver)
+        for position, application_id in enumerate(new_ids, start=self.count):
+            app = applications[position]
+            group = self.groups.setdefault(
+                application_id, {"applied": [], "declined": False, "interviewed": None}
+            )
+            status = app.get("status")
+            if status == "Applied":
+                if group["declined"]:
+                    removals.add(position)
+                else:
+                    group["applied"].append(position)
+            elif status == "Declined":
+                group["declined"] = True
+                removals.update(group["applied"])
+                group["applied"] = []
+            elif status == "Interviewed":
+                unknowns = count_unknown_fields(app)
+                kept = group["interviewed"]
+                if kept is None:
+                    group["interviewed"] = [position, unknowns]
+                elif unknowns < kept[1]:
+                    removals.add(kept[0])
+                    group["interviewed"] = [position, unknowns]
+                else:
+                    removals.add(position)
+        self.hashes.extend(record_hash(app) for app in applications[self.count:])
+        self.count = len(applications)
+        return removals
+
+    def apply_removals(self, applications: list[dict[str, Any]], removals: set[int]) -> list[dict[str, Any]]:
+        """
+        Remove records in one pass and shift indexed positions to match.
+
+        Args:
+            applications: All records in the dataset.
+            removals: Positions returned by update().
+
+        Returns:
+            The remaining records, in their original order.
+        """
+        if not removals:
+            return applications
+        shift = []
+        removed = 0
+        kept_records = []
+        for position, app in enumerate(applications):
+            shift.append(removed)
+            if position in removals:
+                removed += 1
+            else:
+                kept_records.append(app)
+
+        for group in self.groups.values():
+            group["applied"] = [p - shift[p] for p in group["applied"] if p not in removals]
+            if group["interviewed"] is not None:
+                position = group["interviewed"][0]
+                group["interviewed"][0] = position - shift[position]
+        # Record hashes don't depend on position, so none are recomputed
+        self.hashes = [h for position, h in enumerate(self.hashes) if position not in removals]
+        self.count = len(kept_records)
+        return kept_records
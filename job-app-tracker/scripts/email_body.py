@@ -0,0 +1,230 @@
+# scripts/email_body.py
+"""Budgeted plain-text body extraction from Gmail message payloads."""
+
+import base64
+import codecs
+import logging
+import re
+from html.parser import HTMLParser
+from typing import Any, Iterator, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Partial-response mask for messages.get: top-level headers plus the MIME
+# tree's types, filenames and inline data (part headers are left out)
+_PART_FIELDS = "partId,mimeType,filename,body/data"
+BODY_FIELDS = (
+    "id,snippet,internalDate,"
+    f"payload({_PART_FIELDS},headers,"
+    f"parts({_PART_FIELDS},parts({_PART_FIELDS},parts({_PART_FIELDS},parts))))"
+)
+
+# Base64 characters decoded per step (a multiple of 4)
+DECODE_CHUNK_CHARS = 8192
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Elements whose text is never part of the readable body
+SKIPPED_TAGS = frozenset({"script", "style", "head", "title", "noscript", "template"})
+# Elements that start a new line of text
+BLOCK_TAGS = frozenset({
+    "p", "div", "br", "tr", "li", "ul", "ol", "table", "section", "article",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "hr", "header", "footer"
+})
+
+
+class _BudgetReached(Exception):
+    """Raised inside the HTML parser once enough text has been collected."""
+
+
+class HTMLTextExtractor(HTMLParser):
+    """
+    Streaming HTML-to-text converter that stops at a character budget.
+
+    Feed markup incrementally; once ``max_chars`` characters of text have
+    been collected, ``done`` is set and further input is ignored.
+    """
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = max_chars <= 0
+        self._parts: list[str] = []
+        self._length = 0
+        self._skip_depth = 0
+
+    def feed(self, data: str) -> None:
+        if self.done:
+            return
+        try:
+            super().feed(data)
+        except _BudgetReached:
+            self.done = True
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+        text = _WHITESPACE.sub(" ", data)
+        if not self._parts or self._parts[-1].endswith(("\n", " ")):
+            text = text.lstrip(" ")
+        if text:
+            self._append(text)
+
+    def _newline(self) -> None:
+        if self._parts and self._parts[-1].endswith(" "):
+            stripped = self._parts[-1].rstrip(" ")
+            self._length -= len(self._parts[-1]) - len(stripped)
+            self._parts[-1] = stripped
+        if self._parts and not self._parts[-1].endswith("\n"):
+            self._append("\n")
+
+    def _append(self, text: str) -> None:
+        remaining = self.max_chars - self._length
+        self._parts.append(text[:remaining])
+        self._length += min(len(text), remaining)
+        if self._length >= self.max_chars:
+            raise _BudgetReached()
+
+    def text(self) -> str:
+        """Return the text collected so far."""
+        return "".join(self._parts).strip()
+
+
+def iter_decoded(data: str, chunk_chars: int = DECODE_CHUNK_CHARS) -> Iterator[str]:
+    """
+    Decode base64url-encoded UTF-8 text incrementally.
+
+    Args:
+        data: Gmail body data (base64url, padding optional).
+        chunk_chars: Encoded characters decoded per step (rounded down to a multiple of 4).
+
+    Yields:
+        Successive pieces of decoded text.
+    """
+    step = max(4, chunk_chars - chunk_chars % 4)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    for start in range(0, len(data), step):
+        chunk = data[start:start + step]
+        final = start + step >= len(data)
+        if final:
+            chunk += "=" * (-len(chunk) % 4)
+        yield decoder.decode(base64.urlsafe_b64decode(chunk), final=final)
+
+
+def decode_text(data: str, max_chars: int) -> str:
+    """
+    Decode at most max_chars characters of a plain-text body.
+
+    Args:
+        data: Gmail body data (base64url).
+        max_chars: Character budget.
+
+    Returns:
+        The decoded text, truncated to the budget.
+    """
+    pieces: list[str] = []
+    length = 0
+    for piece in iter_decoded(data):
+        pieces.append(piece)
+        length += len(piece)
+        if length >= max_chars:
+            break
+    return "".join(pieces)[:max_chars]
+
+
+def html_to_text(data: str, max_chars: int) -> str:
+    """
+    Decode and strip an HTML body, stopping once the budget is reached.
+
+    Args:
+        data: Gmail body data (base64url-encoded HTML).
+        max_chars: Character budget for the extracted text.
+
+    Returns:
+        Readable text with block elements on separate lines.
+    """
+    parser = HTMLTextExtractor(max_chars)
+    for piece in iter_decoded(data):
+        parser.feed(piece)
+        if parser.done:
+            break
+    if not parser.done:
+        parser.close()
+    return parser.text()
+
+
+def iter_text_parts(part: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """
+    Walk a MIME tree depth-first, yielding inline text/plain and text/html leaves.
+
+    Attachments (parts with a filename) and parts without inline data are skipped.
+
+    Args:
+        part: A message payload or one of its parts.
+
+    Yields:
+        Leaf parts in document order.
+    """
+    children = part.get("parts")
+    if children:
+        for child in children:
+            yield from iter_text_parts(child)
+        return
+    if part.get("filename"):
+        return
+    if part.get("mimeType", "text/plain") in ("text/plain", "text/html") and part.get("body", {}).get("data"):
+        yield part
+
+
+def extract_body(payload: dict[str, Any], max_chars: int) -> str:
+    """
+    Extract up to max_chars of readable body text from a message payload.
+
+    Plain-text parts are preferred; HTML parts are only converted when a
+    message has no plain-text part (e.g. HTML-only mail).
+
+    Args:
+        payload: The message's 'payload' resource.
+        max_chars: Character budget for the body.
+
+    Returns:
+        The body text, or an empty string if the message has none.
+    """
+    leaves = list(iter_text_parts(payload))
+    plain = [p for p in leaves if p.get("mimeType", "text/plain") == "text/plain"]
+    chosen = plain or leaves
+    texts: list[str] = []
+    remaining = max_chars
+    for part in chosen:
+        if remaining <= 0:
+            break
+        data = part["body"]["data"]
+        try:
+            if part.get("mimeType") == "text/html":
+                text = html_to_text(data, remaining)
+            else:
+                text = decode_text(data, remaining)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Failed to decode body part {part.get('partId', '')}: {e}")
+            continue
+        if text:
+            texts.append(text)
+            remaining -= len(text) + 1
+    return "\n".join(texts)[:max_chars]
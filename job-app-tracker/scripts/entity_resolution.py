@@ -0,0 +1,311 @@
+# scripts/entity_resolution.py
+"""Fuzzy resolution of job application records to canonical applications."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import zlib
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+# numpy is imported when titles are first compared, keeping startup light
+if TYPE_CHECKING:
+    import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+RESOLVER_PATH = "data/entity_resolver.json"
+# Record field holding the canonical application ID, stored when the record is written
+APPLICATION_ID_FIELD = "Application ID"
+
+# Minimum cosine similarity for two titles to be the same role (can be overridden via environment variables)
+TITLE_SIMILARITY_THRESHOLD = float(os.getenv('ENTITY_TITLE_SIMILARITY', '0.85'))
+NGRAM_SIZE = 3
+HASH_DIMENSIONS = 1 << 14
+
+# Legal-entity suffixes dropped from company names
+COMPANY_SUFFIXES = frozenset({
+    "inc", "incorporated", "llc", "llp", "lp", "ltd", "limited", "corp", "corporation",
+    "co", "plc", "gmbh", "ag", "sa", "pllc", "pc", "pte", "pty",
+})
+# Seniority markers: titles that differ in these are different roles however similar
+LEVEL_TOKENS = {
+    "i": "i", "1": "i", "ii": "ii", "2": "ii", "iii": "iii", "3": "iii", "iv": "iv", "4": "iv",
+    "sr": "senior", "senior": "senior", "jr": "junior", "junior": "junior",
+    "lead": "lead", "principal": "principal", "staff": "staff",
+    "intern": "intern", "internship": "intern", "manager": "manager", "director": "director",
+}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+# Posting/requisition numbers such as '273984', 'r251052' or 'ref36860h'
+_REQUISITION = re.compile(r"^[a-z]{0,6}\d{5,}[a-z]?$")
+
+
+def _tokens(value: Any) -> list[str]:
+    text = str(value or "").casefold().replace("&", " and ").replace("'", "")
+    return _NON_ALNUM.sub(" ", text).split()
+
+
+def normalize_company(name: Any) -> str:
+    """
+    Normalize a company name for matching.
+
+    Lowercases, drops punctuation, a leading 'the' and trailing legal
+    suffixes, so 'UniUni Logistics Inc.' and 'uniuni logistics' match.
+
+    Args:
+        name: Company name as extracted.
+
+    Returns:
+        The normalized name ('unknown' if empty).
+    """
+    tokens = _tokens(name)
+    if tokens[:1] == ["the"] and len(tokens) > 1:
+        tokens = tokens[1:]
+    while len(tokens) > 1 and tokens[-1] in COMPANY_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens) or "unknown"
+
+
+def normalize_title(title: Any) -> str:
+    """Lowercase a job title and reduce punctuation to single spaces."""
+    return " ".join(_tokens(title)) or "unknown"
+
+
+def level_signature(normalized_title: str) -> str:
+    """Return the sorted seniority markers in a normalized title."""
+    return " ".join(sorted({LEVEL_TOKENS[t] for t in normalized_title.split() if t in LEVEL_TOKENS}))
+
+
+def block_key(company: Any, title: Any) -> tuple[str, str, str]:
+    """
+    Return (block, normalized company, normalized title) for a record.
+
+    Only titles in the same block are compared: same normalized company and
+    same seniority markers.
+    """
+    company_norm = normalize_company(company)
+    title_norm = normalize_title(title)
+    return f"{company_norm}\x1f{level_signature(title_norm)}", company_norm, title_norm
+
+
+def split_requisition(normalized_title: str) -> tuple[str, frozenset[str]]:
+    """
+    Separate requisition numbers from a normalized title.
+
+    Returns:
+        (title without requisition numbers, set of requisition numbers).
+    """
+    words, requisitions = [], set()
+    for token in normalized_title.split():
+        if _REQUISITION.match(token):
+            requisitions.add(token)
+        else:
+            words.append(token)
+    return " ".join(words), frozenset(requisitions)
+
+
+def ngram_buckets(text: str, n: int = NGRAM_SIZE) -> list[int]:
+    """Hash the character n-grams of a padded text into HASH_DIMENSIONS buckets."""
+    padded = f" {text} "
+    return [zlib.crc32(padded[i:i + n].encode("utf-8")) % HASH_DIMENSIONS
+            for i in range(max(1, len(padded) - n + 1))]
+
+
+def canonical_id(block: str, title_norm: str) -> str:
+    """Return a stable ID for a cluster from its block and founding title."""
+    return hashlib.sha1(f"{block}\x1f{title_norm}".encode("utf-8")).hexdigest()[:12]
+
+
+class EntityResolver:
+    """
+    Incrementally assigns records to canonical application IDs.
+
+    Records are blocked by normalized company and seniority markers; within
+    a block, a title joins the most similar existing cluster when the cosine
+    similarity of their hashed character n-gram vectors reaches the
+    threshold, and founds a new cluster otherwise. Requisition numbers are
+    left out of the comparison, but two titles carrying different ones are
+    never merged since they are separate postings. Each record is compared
+    only with the cluster leaders of its own block, so cost grows with block
+    size rather than dataset size.
+
+    Raw n-gram counts are used rather than TF-IDF: within one company, corpus
+    IDF up-weights the rare words the titles share (the team or product name)
+    and down-weights the common ones that tell roles apart ('analyst' vs
+    'associate'), which merged different roles.
+    """
+
+    def __init__(self, threshold: float = TITLE_SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.blocks: dict[str, list[list[str]]] = {}  # block -> [[leader title, canonical ID], ...]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the resolver state."""
+        return {"threshold": self.threshold, "blocks": self.blocks}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "EntityResolver":
+        """Restore a resolver serialized with to_dict()."""
+        resolver = cls(data["threshold"])
+        resolver.blocks = data["blocks"]
+        return resolver
+
+    @staticmethod
+    def _vectorize(titles: list[str]) -> "np.ndarray":
+        """
+        Return L2-normalized character n-gram count rows for titles.
+
+        Columns are limited to the buckets these titles use, so the matrix
+        stays small however large HASH_DIMENSIONS is.
+        """
+        import numpy as np
+
+        buckets = [ngram_buckets(title) for title in titles]
+        rows = np.repeat(np.arange(len(titles)), [len(b) for b in buckets])
+        columns, local = np.unique(np.concatenate(buckets), return_inverse=True)
+        counts = np.zeros((len(titles), len(columns)), dtype=np.float64)
+        np.add.at(counts, (rows, local), 1.0)
+        norms = np.linalg.norm(counts, axis=1, keepdims=True)
+        return counts / np.where(norms == 0, 1.0, norms)
+
+    def resolve(self, records: Iterable[dict[str, Any]]) -> list[str]:
+        """
+        Assign canonical IDs to records, in order.
+
+        Args:
+            records: Records with 'Company' and 'Job Title' fields.
+
+        Returns:
+            Canonical application ID for each record.
+        """
+        keyed = [block_key(r.get("Company"), r.get("Job Title")) for r in records]
+
+        by_block: dict[str, list[int]] = defaultdict(list)
+        for position, (block, _, _) in enumerate(keyed):
+            by_block[block].append(position)
+
+        ids: list[Optional[str]] = [None] * len(keyed)
+        for block, positions in by_block.items():
+            titles = [keyed[p][2] for p in positions]
+            for position, cluster_id in zip(positions, self._assign_block(block, titles)):
+                ids[position] = cluster_id
+        return ids  # type: ignore[return-value]
+
+    def _assign_block(self, block: str, titles: list[str]) -> list[str]:
+        """Assign one block's titles to existing or new clusters."""
+        import numpy as np
+
+        leaders = self.blocks.setdefault(block, [])
+        distinct = list(dict.fromkeys(titles))
+        known = {title: cluster_id for title, cluster_id in leaders}
+        pending = [t for t in distinct if t not in known]
+        if pending:
+            existing = len(leaders)
+            split = [split_requisition(title) for title, _ in leaders] + [split_requisition(t) for t in pending]
+            vectors = self._vectorize([text for text, _ in split])
+            leader_vectors = vectors[:existing]
+            leader_requisitions = [requisitions for _, requisitions in split[:existing]]
+            for title, vector, (_, requisitions) in zip(pending, vectors[existing:], split[existing:]):
+                if len(leader_vectors):
+                    similarities = leader_vectors @ vector
+                    if requisitions:
+                        conflicts = [bool(other) and not (other & requisitions) for other in leader_requisitions]
+                        similarities[np.asarray(conflicts)] = -1.0
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.threshold:
+                        known[title] = leaders[best][1]
+                        continue
+                known[title] = canonical_id(block, title)
+                leaders.append([title, known[title]])
+                leader_requisitions.append(requisitions)
+                leader_vectors = np.vstack([leader_vectors, vector]) if len(leader_vectors) else vector[None, :]
+        return [known[title] for title in titles]
+
+
+def resolve_entities(records: list[dict[str, Any]], threshold: float = TITLE_SIMILARITY_THRESHOLD) -> list[str]:
+    """
+    Assign a canonical application ID to every record.
+
+    Args:
+        records: Job application records.
+        threshold: Minimum title similarity for records to be the same application.
+
+    Returns:
+        Canonical ID per record, aligned with the input.
+    """
+    return EntityResolver(threshold).resolve(records)
+
+
+def load_resolver(path: str = RESOLVER_PATH) -> EntityResolver:
+    """
+    Load the shared resolver state, or return an empty resolver if it is missing or unreadable.
+
+    Args:
+        path: Path to the resolver JSON file.
+
+    Returns:
+        The loaded resolver.
+    """
+    if not os.path.exists(path):
+        return EntityResolver()
+    try:
+        with open(path, "r") as f:
+            return EntityResolver.from_dict(json.load(f))
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable resolver state {path}: {e}")
+        return EntityResolver()
+
+
+def save_resolver(resolver: EntityResolver, path: str = RESOLVER_PATH) -> None:
+    """Atomically write the shared resolver state."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(resolver.to_dict(), f)
+    os.replace(tmp_path, path)
+
+
+def application_ids(records: list[dict[str, Any]], resolver: EntityResolver) -> list[str]:
+    """
+    Return each record's canonical application ID.
+
+    The ID stored on the record is used when present, so dedup, lifecycle
+    and analytics agree however they order or slice the records; only
+    records saved without one are resolved.
+
+    Args:
+        records: Job application records.
+        resolver: Resolver for records without a stored ID.
+
+    Returns:
+        Canonical ID per record, aligned with the input.
+    """
+    resolved = iter(resolver.resolve([r for r in records if not r.get(APPLICATION_ID_FIELD)]))
+    return [r.get(APPLICATION_ID_FIELD) or next(resolved) for r in records]
+
+
+def assign_application_ids(records: list[dict[str, Any]], resolver: EntityResolver) -> int:
+    """
+    Store a canonical application ID on every record that has none.
+
+    Args:
+        records: Job application records, updated in place.
+        resolver: The shared resolver; save it with the records.
+
+    Returns:
+        Number of records given an ID.
+    """
+    missing = [r for r in records if not r.get(APPLICATION_ID_FIELD)]
+    for record, application_id in zip(missing, resolver.resolve(missing)):
+        record[APPLICATION_ID_FIELD] = application_id
+    return len(missing)
@@ -0,0 +1,447 @@
+# scripts/gate_model.py
+"""Local job/not-job classifier for the email gate, trained on labels from past runs."""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import tempfile
+import threading
+import zlib
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Configuration (can be overridden via environment variables)
+MODEL_PATH = os.getenv('GATE_MODEL_PATH', 'data/cache/gate_model.npz')
+LABELS_PATH = os.getenv('GATE_LABELS_PATH', 'data/cache/gate_labels.jsonl')
+# Minimum calibration precision for decisions the model may make without the LLM
+TARGET_PRECISION = float(os.getenv('GATE_MODEL_PRECISION', '0.98'))
+MIN_TRAINING_LABELS = int(os.getenv('GATE_MODEL_MIN_LABELS', '500'))
+# A threshold needs at least this many calibration messages behind it
+MIN_THRESHOLD_SUPPORT = int(os.getenv('GATE_MODEL_MIN_SUPPORT', '50'))
+# Share of confident not-job decisions still sent to the LLM, so their labels can correct the model
+AUDIT_RATE = float(os.getenv('GATE_MODEL_AUDIT_RATE', '0.02'))
+MODEL_VERSION = 2
+
+HASH_DIMENSIONS = 1 << 18
+# Labels held out to pick the thresholds, and to test them afterwards
+CALIBRATION_FRACTION = 0.2
+TEST_FRACTION = 0.2
+TRAINING_ITERATIONS = 300
+LEARNING_RATE = 0.5
+L2_PENALTY = 1e-4
+
+_WORD = re.compile(r"[a-z0-9]+")
+_DIGITS = re.compile(r"\d+")
+# Last address in a From header; much cheaper than email.utils.parseaddr on the hot path
+_ADDRESS = re.compile(r"([\w.+-]*)@([\w-]+(?:\.[\w-]+)+)")
+
+
+def _words(text: str) -> list[str]:
+    return _DIGITS.sub("0", " ".join(_WORD.findall(text.casefold()))).split()
+
+
+def feature_names(metadata: dict[str, str]) -> list[str]:
+    """
+    Return the features of an email's sender, subject and snippet.
+
+    Sender features are the domain and each parent domain plus the words
+    of the local part ('careers', 'noreply'); subjects contribute words and
+    word pairs, snippets words. Digit runs are folded to '0' so order and
+    requisition numbers do not become separate features.
+    """
+    addresses = _ADDRESS.findall(metadata.get("from", "").lower())
+    local, domain = addresses[-1] if addresses else ("", "")
+    parts = domain.split(".") if domain else []
+    features = [f"d:{'.'.join(parts[i:])}" for i in range(len(parts) - 1)]
+    features += [f"u:{w}" for w in _words(local)]
+    subject = _words(metadata.get("subject", ""))
+    features += [f"s:{w}" for w in subject] + [f"s:{a} {b}" for a, b in zip(subject, subject[1:])]
+    features += [f"b:{w}" for w in _words(metadata.get("snippet", ""))]
+    return features
+
+
+def hash_features(metadata: dict[str, str]) -> list[int]:
+    """Return the distinct hashed feature indices of an email (binary features), sorted."""
+    return sorted({zlib.crc32(name.encode("utf-8")) % HASH_DIMENSIONS for name in feature_names(metadata)})
+
+
+def label_key(metadata: dict[str, str]) -> str:
+    """Return a key identifying an email's gate input, used to keep one label per email."""
+    text = "\x1f".join(metadata.get(field, "") for field in ("from", "subject", "snippet"))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class LabelLog:
+    """
+    Append-only JSONL log of LLM-verified gate labels.
+
+    Each line holds an email's sender, subject and snippet with whether the
+    full classifier found a job application in it. The log lives next to
+    the LLM cache, outside the committed dataset, since it contains email
+    text. Safe to share between threads.
+    """
+
+    def __init__(self, path: str = LABELS_PATH):
+        self.path = path
+        self.added = 0
+        self._lock = threading.Lock()
+
+    def add(self, metadata: dict[str, str], is_job: bool) -> None:
+        """
+        Append one label.
+
+        Args:
+            metadata: Dictionary with 'from', 'subject' and 'snippet' fields.
+            is_job: Whether the email was a job application.
+        """
+        entry = {field: metadata.get(field, "") for field in ("from", "subject", "snippet")}
+        entry["label"] = bool(is_job)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+            self.added += 1
+
+    def load(self) -> list[dict[str, Any]]:
+        """
+        Read the labels, keeping the latest one per email and skipping corrupt lines.
+
+        Returns:
+            Label entries, oldest first.
+        """
+        if not os.path.exists(self.path):
+            return []
+        entries: dict[str, dict[str, Any]] = {}
+        with open(self.path, "r") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    key = label_key(entry)
+                    entry["label"] = bool(entry["label"])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    logger.warning(f"Skipping corrupt label line {line_number} in {self.path}")
+                    continue
+                entries.pop(key, None)
+                entries[key] = entry
+        return list(entries.values())
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30.0, 30.0)))
+
+
+def _stack(examples: list[list[int]]) -> tuple[np.ndarray, np.ndarray]:
+    """Return (row, column) index arrays of a sparse binary feature matrix."""
+    rows = np.repeat(np.arange(len(examples)), [len(e) for e in examples])
+    columns = np.fromiter((i for e in examples for i in e), dtype=np.int64, count=len(rows))
+    return rows, columns
+
+
+def _probability(weights: np.ndarray, bias: float, features: list[int]) -> float:
+    z = float(weights[features].sum(dtype=np.float64)) + bias
+    return 1.0 / (1.0 + math.exp(-max(min(z, 30.0), -30.0)))
+
+
+def _scores(weights: np.ndarray, bias: float, examples: list[list[int]]) -> np.ndarray:
+    # Scored exactly as GateModel.probability scores live emails, so a message
+    # tied with a calibration example lands on the same side of the threshold
+    return np.array([_probability(weights, bias, features) for features in examples])
+
+
+def fit_logistic(examples: list[list[int]], labels: np.ndarray, iterations: int = TRAINING_ITERATIONS,
+                 learning_rate: float = LEARNING_RATE, l2: float = L2_PENALTY) -> tuple[np.ndarray, float]:
+    """
+    Fit L2-regularized logistic regression on hashed binary features.
+
+    Full-batch gradient descent with Adagrad step sizes; each iteration is
+    two bincounts over the non-zero features, so training on a few thousand
+    labels takes about a second.
+
+    Args:
+        examples: Feature indices per email, from hash_features().
+        labels: 1.0 for job emails, 0.0 otherwise.
+        iterations: Gradient steps.
+        learning_rate: Adagrad base step size.
+        l2: L2 penalty on the weights.
+
+    Returns:
+        (weights, bias).
+    """
+    rows, columns = _stack(examples)
+    weights = np.zeros(HASH_DIMENSIONS)
+    bias = 0.0
+    weight_history = np.full(HASH_DIMENSIONS, 1e-8)
+    bias_history = 1e-8
+    count = max(len(examples), 1)
+    for _ in range(iterations):
+        residual = _sigmoid(np.bincount(rows, weights=weights[columns], minlength=len(examples)) + bias) - labels
+        weight_gradient = np.bincount(columns, weights=residual[rows], minlength=HASH_DIMENSIONS) / count
+        weight_gradient += l2 * weights
+        bias_gradient = float(residual.mean()) if len(residual) else 0.0
+        weight_history += weight_gradient ** 2
+        bias_history += bias_gradient ** 2
+        weights -= learning_rate * weight_gradient / np.sqrt(weight_history)
+        bias -= learning_rate * bias_gradient / math.sqrt(bias_history)
+    return weights.astype(np.float32), bias
+
+
+def calibrate_thresholds(probabilities: np.ndarray, labels: np.ndarray,
+                         target: float = TARGET_PRECISION) -> tuple[float, float]:
+    """
+    Pick the decision thresholds from held-out predictions.
+
+    The job threshold is the lowest probability at which every calibration
+    message scored at or above it is a job email with at least the target
+    precision; the not-job threshold is the highest probability at which
+    every message at or below it is not a job email with that precision.
+    Messages between the two go to the LLM. A side that cannot reach the
+    target on at least MIN_THRESHOLD_SUPPORT messages never decides, and
+    overlapping regions are split at probability 0.5.
+
+    Args:
+        probabilities: Calibration job probabilities.
+        labels: Calibration labels (1.0 job, 0.0 not job).
+        target: Minimum precision of local decisions.
+
+    Returns:
+        (not_job_below, job_above): decide 'not job' at or below the first
+        and 'job' at or above the second.
+    """
+    def widest(order: np.ndarray, correct: np.ndarray) -> Optional[float]:
+        hits = np.cumsum(correct[order])
+        precision = hits / np.arange(1, len(order) + 1)
+        # Cut only between distinct probabilities so ties are decided together
+        values = probabilities[order]
+        boundary = np.r_[values[1:] != values[:-1], True]
+        eligible = np.flatnonzero((precision >= target) & boundary)
+        eligible = eligible[eligible + 1 >= MIN_THRESHOLD_SUPPORT]
+        return float(values[eligible[-1]]) if len(eligible) else None
+
+    job_above = widest(np.argsort(-probabilities, kind="stable"), labels == 1)
+    not_job_below = widest(np.argsort(probabilities, kind="stable"), labels == 0)
+    job_above = math.inf if job_above is None else job_above
+    not_job_below = -math.inf if not_job_below is None else not_job_below
+    if not_job_below >= job_above:
+        # Each region meets the target on its own but they overlap; split them at the model's decision boundary
+        job_above = max(job_above, 0.5)
+        not_job_below = min(not_job_below, math.nextafter(0.5, 0.0))
+    return not_job_below, job_above
+
+
+def evaluate(probabilities: np.ndarray, labels: np.ndarray, not_job_below: float, job_above: float) -> dict[str, Any]:
+    """
+    Report precision and recall of the local decisions on labeled messages.
+
+    Recall is the share of all job (or not-job) messages the model settles
+    without the LLM; coverage is the share of messages it settles at all.
+    A threshold of None means that side never decides.
+
+    Returns:
+        Dictionary with per-class precision/recall and coverage.
+    """
+    decided_job = probabilities >= job_above
+    decided_not_job = probabilities <= not_job_below
+    jobs = labels == 1
+
+    def ratio(numerator: int, denominator: int) -> float:
+        return round(numerator / denominator, 4) if denominator else 0.0
+
+    def finite(threshold: float) -> Optional[float]:
+        return threshold if math.isfinite(threshold) else None
+
+    return {
+        "messages": int(len(labels)),
+        "job": {
+            "threshold": finite(job_above),
+            "precision": ratio(int(np.sum(decided_job & jobs)), int(decided_job.sum())),
+            "recall": ratio(int(np.sum(decided_job & jobs)), int(jobs.sum())),
+        },
+        "not_job": {
+            "threshold": finite(not_job_below),
+            "precision": ratio(int(np.sum(decided_not_job & ~jobs)), int(decided_not_job.sum())),
+            "recall": ratio(int(np.sum(decided_not_job & ~jobs)), int((~jobs).sum())),
+        },
+        "coverage": ratio(int(decided_job.sum() + decided_not_job.sum()), len(labels)),
+    }
+
+
+class GateModel:
+    """
+    Hashed-feature logistic regression with calibrated decision thresholds.
+
+    Like PreFilter, it answers True/False only when confident and None
+    otherwise, leaving those emails to the LLM. Scoring an email hashes
+    a few dozen features and sums their weights, tens of microseconds.
+
+    Emails it rejects never reach the extractor, so they would never be
+    labeled; audit() picks a random share of those rejections to send to
+    the LLM anyway, which lets retraining see the model's false negatives.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: float, not_job_below: float, job_above: float,
+                 report: Optional[dict[str, Any]] = None, audit_rate: float = AUDIT_RATE,
+                 seed: Optional[int] = None, llm_gate: bool = True):
+        self.weights = weights
+        self.bias = bias
+        self.not_job_below = not_job_below
+        self.job_above = job_above
+        self.report = report or {}
+        self.audit_rate = audit_rate
+        # Without an LLM gate call to skip, a "job" answer saves nothing (see PreFilter)
+        self.llm_gate = llm_gate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.decided_job = 0
+        self.decided_not_job = 0
+        self.uncertain = 0
+        self.audited = 0
+
+    def probability(self, metadata: dict[str, str]) -> float:
+        """Return the estimated probability that an email is job-related."""
+        return _probability(self.weights, self.bias, hash_features(metadata))
+
+    def classify(self, metadata: dict[str, str]) -> Optional[bool]:
+        """
+        Classify an email and update the decision counters.
+
+        Args:
+            metadata: Dictionary with 'from', 'subject' and 'snippet' fields.
+
+        Returns:
+            True for job-related, False for unrelated, None if unsure.
+        """
+        probability = self.probability(metadata)
+        decision = True if probability >= self.job_above else False if probability <= self.not_job_below else None
+        with self._lock:
+            if decision is None:
+                self.uncertain += 1
+            elif decision:
+                self.decided_job += 1
+            else:
+                self.decided_not_job += 1
+        return decision
+
+    def audit(self) -> bool:
+        """
+        Decide whether to send a confident not-job decision to the LLM for a label.
+
+        Returns:
+            True for a random audit_rate share of calls.
+        """
+        with self._lock:
+            if self._random.random() >= self.audit_rate:
+                return False
+            self.audited += 1
+            return True
+
+    def stats(self) -> dict[str, int]:
+        """Return decision counters and the number of LLM calls saved."""
+        return {
+            "decided_job": self.decided_job,
+            "decided_not_job": self.decided_not_job,
+            "uncertain": self.uncertain,
+            "audited": self.audited,
+            "calls_saved": self.decided_not_job - self.audited + (self.decided_job if self.llm_gate else 0),
+        }
+
+    def save(self, path: str = MODEL_PATH) -> None:
+        """Atomically write the model to a compressed .npz file."""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        meta = {"version": MODEL_VERSION, "bias": self.bias, "not_job_below": self.not_job_below,
+                "job_above": self.job_above, "report": self.report}
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, weights=self.weights, meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> Optional["GateModel"]:
+        """
+        Load a trained model.
+
+        Returns:
+            The model, or None if it is missing or unreadable.
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("version") != MODEL_VERSION:
+                    raise ValueError(f"unsupported version {meta.get('version')}")
+                return cls(data["weights"], meta["bias"], meta["not_job_below"], meta["job_above"], meta["report"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable gate model {path}: {e}")
+            return None
+
+
+def train_gate_model(entries: Iterable[dict[str, Any]], target: float = TARGET_PRECISION,
+                     seed: int = 0) -> GateModel:
+    """
+    Train a gate model, calibrate its thresholds and test them on separate held-out splits.
+
+    The thresholds are chosen to meet the target on the calibration split,
+    so precision there is optimistic by construction; the report's 'test'
+    section measures them on labels that played no part in training or
+    calibration.
+
+    Args:
+        entries: Label entries from LabelLog.load().
+        target: Minimum calibration precision of local decisions.
+        seed: Seed for the train/calibration/test shuffle.
+
+    Returns:
+        The model, with its calibration and test reports.
+
+    Raises:
+        ValueError: If there are too few labels, or only one class.
+    """
+    entries = list(entries)
+    labels = np.array([1.0 if e["label"] else 0.0 for e in entries])
+    if len(entries) < MIN_TRAINING_LABELS:
+        raise ValueError(f"need at least {MIN_TRAINING_LABELS} labels, have {len(entries)}")
+    if labels.min() == labels.max():
+        raise ValueError("labels contain only one class")
+
+    examples = [hash_features(e) for e in entries]
+    order = np.random.default_rng(seed).permutation(len(entries))
+    test_size = max(int(len(entries) * TEST_FRACTION), 1)
+    calibration_size = max(int(len(entries) * CALIBRATION_FRACTION), 1)
+    test = order[:test_size]
+    calibration = order[test_size:test_size + calibration_size]
+    train = order[test_size + calibration_size:]
+
+    weights, bias = fit_logistic([examples[i] for i in train], labels[train])
+    calibration_scores = _scores(weights, bias, [examples[i] for i in calibration])
+    not_job_below, job_above = calibrate_thresholds(calibration_scores, labels[calibration], target)
+    test_scores = _scores(weights, bias, [examples[i] for i in test])
+    report = {"labels": len(entries), "train": int(len(train)), "target_precision": target,
+              "calibration": evaluate(calibration_scores, labels[calibration], not_job_below, job_above),
+              "test": evaluate(test_scores, labels[test], not_job_below, job_above)}
+    return GateModel(weights, bias, not_job_below, job_above, report)
+
+
+def load_gate_model(path: str = MODEL_PATH, llm_gate: bool = True) -> Optional[GateModel]:
+    """Load the trained gate model if there is one, logging its test coverage."""
+    model = GateModel.load(path)
+    if model is not None:
+        model.llm_gate = llm_gate
+        test = model.report.get("test", {})
+        logger.info(f"Loaded gate model trained on {model.report.get('labels', 0)} labels "
+                    f"(test coverage {test.get('coverage', 0):.0%})")
+    return model
@@ -1,18 +1,28 @@
 # gmail_fetch.py
 """Gmail API integration for fetching job-related emails."""
 
-import base64
+import json
 import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from scripts.email_body import BODY_FIELDS, extract_body
+from scripts.metrics import metrics, timed
+from scripts.rate_limit import SERVER_ERROR, THROTTLED, AdaptiveRateLimiter, parse_duration
+
+# The Google auth and discovery stacks are imported on first use, so runs
+# that find nothing new never pay for them
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+    from google_auth_httplib2 import AuthorizedHttp
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,29 +35,89 @@ SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 # Configuration paths (can be overridden via environment variables)
 TOKEN_PATH = os.getenv('GMAIL_TOKEN_PATH', 'config/token.json')
 CREDS_PATH = os.getenv('GMAIL_CREDS_PATH', 'config/gmail_credentials.json')
+SYNC_STATE_PATH = os.getenv('GMAIL_SYNC_STATE_PATH', 'data/sync_state.json')
+ACCOUNTS_DIR = os.getenv('GMAIL_ACCOUNTS_DIR', 'config/accounts')
+DEFAULT_ACCOUNT = 'default'
 
 # Constants
 MAX_RESULTS_PER_PAGE = 500
-MAX_CONTENT_LENGTH = 4000
+# Raw characters kept per email; prompts are compacted to a token budget later
+MAX_CONTENT_LENGTH = int(os.getenv('GMAIL_MAX_CONTENT_CHARS', '8000'))
+HTTP_TIMEOUT = 30
+GMAIL_PROFILE_URL = "https://gmail.googleapis.com/gmail/v1/users/me/profile"
+BATCH_SIZE = 100  # Gmail accepts at most 100 calls per batch request
+BATCH_MAX_RETRIES = 5
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
 
+# Per-user Gmail quota, in quota units per second (can be overridden via environment variables)
+GMAIL_QUOTA_UNITS_PER_SECOND = float(os.getenv('GMAIL_QUOTA_UNITS_PER_SECOND', '250'))
+# Quota units charged per call
+LIST_UNITS = 5
+GET_UNITS = 5
+HISTORY_UNITS = 2
+PROFILE_UNITS = 1
 
-def get_gmail_service():
+
+@dataclass(frozen=True)
+class GmailAccount:
+    """A configured mailbox and the paths to its OAuth files."""
+
+    name: str
+    token_path: str
+    creds_path: str
+
+
+def discover_accounts(accounts_dir: str = ACCOUNTS_DIR) -> list[GmailAccount]:
     """
-    Authenticate and return Gmail API service.
+    Find every Gmail account configured under the accounts directory.
+
+    Each subdirectory with a token.json (e.g. config/accounts/personal_gmail)
+    is one account. Without any, the single TOKEN_PATH/CREDS_PATH account is used.
+
+    Args:
+        accounts_dir: Directory containing one subdirectory per account.
+
+    Returns:
+        Accounts sorted by name.
+    """
+    accounts = []
+    if os.path.isdir(accounts_dir):
+        for name in sorted(os.listdir(accounts_dir)):
+            account_dir = os.path.join(accounts_dir, name)
+            token_path = os.path.join(account_dir, 'token.json')
+            if os.path.isfile(token_path):
+                accounts.append(GmailAccount(name, token_path, os.path.join(account_dir, 'gmail_credentials.json')))
+    if not accounts:
+        accounts.append(GmailAccount(DEFAULT_ACCOUNT, TOKEN_PATH, CREDS_PATH))
+    logger.info(f"Gmail accounts: {', '.join(a.name for a in accounts)}")
+    return accounts
+
+
+def _load_credentials(token_path: str, creds_path: str) -> "Credentials":
+    """
+    Load OAuth credentials from disk, refreshing or re-authorizing if needed.
+
+    Args:
+        token_path: Path to the authorized user token file.
+        creds_path: Path to the OAuth client secrets file.
 
     Returns:
-        Gmail API service resource.
+        Valid Google OAuth credentials.
 
     Raises:
         FileNotFoundError: If authentication files are missing.
         Exception: If authentication fails.
     """
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     creds = None
 
-    if os.path.exists(TOKEN_PATH):
-        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
+    if os.path.exists(token_path):
+        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
     else:
-        logger.warning(f"No token found at {TOKEN_PATH}")
+        logger.warning(f"No token found at {token_path}")
 
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
@@ -57,36 +127,150 @@ def get_gmail_service():
             except Exception as e:
                 logger.error(f"Failed to refresh token: {e}")
                 raise
-        elif os.path.exists(CREDS_PATH):
+        elif os.path.exists(creds_path):
             logger.info("No valid token; running local auth (not suitable for CI)...")
-            flow = InstalledAppFlow.from_client_secrets_file(CREDS_PATH, SCOPES)
+            flow = InstalledAppFlow.from_client_secrets_file(creds_path, SCOPES)
             creds = flow.run_local_server(port=0)
-            with open(TOKEN_PATH, 'w') as token:
+            with open(token_path, 'w') as token:
                 token.write(creds.to_json())
         else:
             raise FileNotFoundError(
-                f"Authentication failed: No valid token at {TOKEN_PATH} "
-                f"and no credentials at {CREDS_PATH}"
+                f"Authentication failed: No valid token at {token_path} "
+                f"and no credentials at {creds_path}"
             )
 
-    return build('gmail', 'v1', credentials=creds)
+    return creds
 
 
-def fetch_emails(since_hours: Optional[int] = 1) -> list[dict[str, Any]]:
+class GmailSession:
     """
-    Fetch emails from Gmail inbox.
+    Authenticated Gmail client shared by every call in a run.
 
-    Args:
-        since_hours: Only fetch emails from the last N hours. None for all emails.
+    Credentials are loaded once and refreshed only when they expire, the
+    discovery-based service is built once, and each worker thread keeps its
+    own keep-alive HTTP connection (httplib2 connections are not thread-safe).
+    Every call goes through the session's rate limiter, which tracks the
+    account's per-user quota.
+    """
+
+    def __init__(self, token_path: str = TOKEN_PATH, creds_path: str = CREDS_PATH,
+                 name: str = DEFAULT_ACCOUNT):
+        self.token_path = token_path
+        self.creds_path = creds_path
+        self.limiter = AdaptiveRateLimiter(f"gmail:{name}", GMAIL_QUOTA_UNITS_PER_SECOND, classify_gmail_error)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._creds: Optional["Credentials"] = None
+        self._service = None
+
+    @property
+    def credentials(self) -> "Credentials":
+        """Return valid credentials, refreshing them at most once per expiry."""
+        with self._lock:
+            if self._creds is None:
+                self._creds = _load_credentials(self.token_path, self.creds_path)
+            elif not self._creds.valid and self._creds.refresh_token:
+                from google.auth.transport.requests import Request
+                logger.info("Token expired, refreshing...")
+                self._creds.refresh(Request())
+            return self._creds
+
+    @property
+    def service(self):
+        """Return the Gmail API service resource, building it on first use."""
+        creds = self.credentials
+        with self._lock:
+            if self._service is None:
+                from googleapiclient.discovery import build
+                self._service = build('gmail', 'v1', credentials=creds, cache_discovery=False)
+            return self._service
+
+    def http(self) -> "AuthorizedHttp":
+        """Return this thread's authorized, connection-reusing HTTP client."""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+            self._local.http = http
+        return http
+
+    def execute(self, request, cost: float = GET_UNITS) -> Any:
+        """
+        Execute a Gmail API request over this thread's pooled connection.
+
+        The call waits for quota, and throttling, 5xx and connection errors
+        are retried with backoff.
+
+        Args:
+            request: An HttpRequest built from ``self.service``.
+            cost: Quota units the request consumes.
+
+        Returns:
+            The decoded JSON response.
+
+        Raises:
+            CircuitOpenError: If Gmail has been failing persistently.
+        """
+        self.credentials  # refresh up front so concurrent threads don't race on 401s
+        metrics.increment("gmail_requests")
+        metrics.increment("gmail_quota_units", cost)
+        return self.limiter.call(lambda: request.execute(http=self.http()), cost=cost)
+
+
+_default_session: Optional[GmailSession] = None
+_default_session_lock = threading.Lock()
+
+
+def get_session() -> GmailSession:
+    """
+    Return the process-wide Gmail session for the configured token paths.
 
     Returns:
-        List of message objects with 'id' and 'threadId' fields.
+        The shared GmailSession instance.
     """
-    try:
-        service = get_gmail_service()
-    except Exception as e:
-        logger.error(f"Failed to get Gmail service: {e}")
-        return []
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = GmailSession()
+        return _default_session
+
+
+def get_gmail_service():
+    """
+    Authenticate and return Gmail API service.
+
+    Returns:
+        Gmail API service resource (shared across calls).
+
+    Raises:
+        FileNotFoundError: If authentication files are missing.
+        Exception: If authentication fails.
+    """
+    return get_session().service
+
+
+def iter_emails(since_hours: Optional[int] = 1,
+                session: Optional[GmailSession] = None) -> Iterator[dict[str, Any]]:
+    """
+    Stream inbox messages page by page.
+
+    The next page is requested on a background thread while the caller
+    works through the current one, so processing starts after the first
+    page and only about two pages are held in memory.
+
+    Args:
+        since_hours: Only list emails from the last N hours. None for all emails.
+        session: Gmail session to use (defaults to the shared session).
+
+    Yields:
+        Message objects with 'id' and 'threadId' fields.
+
+    Raises:
+        HttpError: If a page cannot be listed; messages already yielded stand.
+    """
+    session = session or get_session()
+    service = session.service
 
     query = ""
     if since_hours is not None:
@@ -94,121 +278,528 @@ def fetch_emails(since_hours: Optional[int] = 1) -> list[dict[str, Any]]:
         query = f"after:{time_threshold}"
     logger.info(f"Gmail query: '{query}'")
 
-    all_messages = []
-    try:
-        response = service.users().messages().list(
+    @timed("gmail_list_page")
+    def list_page(page_token: Optional[str]) -> dict[str, Any]:
+        return session.execute(service.users().messages().list(
             userId='me',
             labelIds=['INBOX'],
             q=query,
+            pageToken=page_token,
             maxResults=MAX_RESULTS_PER_PAGE
-        ).execute()
+        ), cost=LIST_UNITS)
 
-        messages = response.get('messages', [])
-        logger.info(f"Initial page: {len(messages)} emails")
-        all_messages.extend(messages or [])
-
-        page_count = 1
-        while 'nextPageToken' in response:
+    prefetcher = ThreadPoolExecutor(1, thread_name_prefix="gmail-list")
+    try:
+        page = prefetcher.submit(list_page, None)
+        page_count = 0
+        total = 0
+        while page is not None:
+            response = page.result()
             page_count += 1
-            page_token = response['nextPageToken']
-            response = service.users().messages().list(
+            next_token = response.get('nextPageToken')
+            page = prefetcher.submit(list_page, next_token) if next_token else None
+
+            messages = response.get('messages') or []
+            logger.info(f"Page {page_count}: {len(messages)} emails")
+            total += len(messages)
+            yield from messages
+        logger.info(f"Total emails listed: {total}")
+    finally:
+        prefetcher.shutdown(wait=False, cancel_futures=True)
+
+
+@timed("fetch_emails")
+def fetch_emails(since_hours: Optional[int] = 1,
+                 session: Optional[GmailSession] = None) -> list[dict[str, Any]]:
+    """
+    Fetch emails from Gmail inbox.
+
+    Args:
+        since_hours: Only fetch emails from the last N hours. None for all emails.
+        session: Gmail session to use (defaults to the shared session).
+
+    Returns:
+        List of message objects with 'id' and 'threadId' fields.
+    """
+    session = session or get_session()
+    try:
+        session.service
+    except Exception as e:
+        logger.error(f"Failed to get Gmail service: {e}")
+        return []
+
+    all_messages = []
+    try:
+        all_messages.extend(iter_emails(since_hours, session=session))
+    except HttpError as e:
+        logger.error(f"Gmail API error while fetching emails: {e}")
+    return all_messages
+
+
+_sync_state_lock = threading.Lock()
+
+
+def _read_sync_state(filename: str) -> dict[str, Any]:
+    if not os.path.exists(filename):
+        return {}
+    try:
+        with open(filename, "r") as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (json.JSONDecodeError, IOError) as e:
+        logger.error(f"Failed to load sync state from {filename}: {e}")
+        return {}
+
+
+def load_sync_cursor(filename: str = SYNC_STATE_PATH, account: str = DEFAULT_ACCOUNT) -> Optional[str]:
+    """
+    Load the persisted Gmail historyId sync cursor for an account.
+
+    Args:
+        filename: Path to the sync state JSON file.
+        account: Account name (the default account uses the top-level cursor).
+
+    Returns:
+        The last synced historyId, or None if no cursor has been saved.
+    """
+    with _sync_state_lock:
+        state = _read_sync_state(filename)
+    if account == DEFAULT_ACCOUNT:
+        return state.get("historyId")
+    return state.get("accounts", {}).get(account)
+
+
+def save_sync_cursor(history_id: str, filename: str = SYNC_STATE_PATH,
+                     account: str = DEFAULT_ACCOUNT) -> None:
+    """
+    Persist the Gmail historyId sync cursor for an account.
+
+    Args:
+        history_id: The historyId up to which the mailbox has been processed.
+        filename: Path to the sync state JSON file.
+        account: Account name (the default account uses the top-level cursor).
+    """
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with _sync_state_lock:
+        state = _read_sync_state(filename)
+        if account == DEFAULT_ACCOUNT:
+            state["historyId"] = str(history_id)
+        else:
+            state.setdefault("accounts", {})[account] = str(history_id)
+        try:
+            with open(filename, "w") as f:
+                json.dump(state, f, indent=4, sort_keys=True)
+            logger.info(f"Saved sync cursor {history_id} for account '{account}'")
+        except IOError as e:
+            logger.error(f"Failed to save sync cursor: {e}")
+
+
+def get_current_history_id(session: Optional[GmailSession] = None) -> str:
+    """
+    Get the mailbox's current historyId.
+
+    Args:
+        session: Gmail session to use (defaults to the shared session).
+
+    Returns:
+        The current historyId as a string.
+    """
+    session = session or get_session()
+    profile = session.execute(session.service.users().getProfile(userId='me'), cost=PROFILE_UNITS)
+    return str(profile['historyId'])
+
+
+def peek_history_id(session: GmailSession) -> str:
+    """
+    Get the mailbox's current historyId without building the API service.
+
+    The profile is read with a plain authorized request, so a pre-flight
+    "anything new?" check skips the discovery-based client entirely.
+
+    Args:
+        session: Gmail session to use.
+
+    Returns:
+        The current historyId as a string.
+
+    Raises:
+        HttpError: If the request fails.
+    """
+    def request() -> str:
+        response, content = session.http().request(GMAIL_PROFILE_URL)
+        if response.status >= 400:
+            raise HttpError(response, content, uri=GMAIL_PROFILE_URL)
+        return str(json.loads(content)['historyId'])
+
+    metrics.increment("gmail_requests")
+    metrics.increment("gmail_quota_units", PROFILE_UNITS)
+    return session.limiter.call(request, cost=PROFILE_UNITS)
+
+
+@timed("fetch_history")
+def fetch_history(start_history_id: str,
+                  session: Optional[GmailSession] = None) -> tuple[Optional[list[dict[str, Any]]], str]:
+    """
+    List inbox messages added since a historyId via users.history.list.
+
+    Args:
+        start_history_id: The historyId to resume from.
+        session: Gmail session to use (defaults to the shared session).
+
+    Returns:
+        Tuple of (messages, latest historyId). Messages is None if the cursor
+        is too old for Gmail to serve, in which case a full listing is needed.
+    """
+    session = session or get_session()
+    service = session.service
+    messages: dict[str, dict[str, Any]] = {}
+    latest_history_id = start_history_id
+    page_token = None
+
+    while True:
+        try:
+            response = session.execute(service.users().history().list(
                 userId='me',
-                labelIds=['INBOX'],
-                q=query,
+                startHistoryId=start_history_id,
+                historyTypes=['messageAdded'],
+                labelId='INBOX',
                 pageToken=page_token,
                 maxResults=MAX_RESULTS_PER_PAGE
-            ).execute()
-            messages = response.get('messages', [])
-            logger.info(f"Page {page_count}: {len(messages)} emails")
-            all_messages.extend(messages or [])
+            ), cost=HISTORY_UNITS)
+        except HttpError as e:
+            if e.resp.status == 404:
+                logger.warning(f"Sync cursor {start_history_id} has expired")
+                return None, start_history_id
+            raise
+
+        for record in response.get('history', []):
+            for added in record.get('messagesAdded', []):
+                message = added.get('message', {})
+                if 'INBOX' in message.get('labelIds', ['INBOX']):
+                    messages[message['id']] = {'id': message['id'], 'threadId': message.get('threadId')}
+        latest_history_id = response.get('historyId', latest_history_id)
+
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+
+    logger.info(f"History sync from {start_history_id}: {len(messages)} new emails")
+    return list(messages.values()), str(latest_history_id)
+
+
+def iter_new_emails(cursor: Optional[str],
+                    session: Optional[GmailSession] = None) -> tuple[Iterable[dict[str, Any]], Optional[str]]:
+    """
+    List inbox messages added since the sync cursor, streaming full listings.
+
+    Uses users.history.list when a valid cursor is available and falls back
+    to a streamed full inbox listing (see iter_emails) when there is no
+    cursor or it has expired.
+
+    Args:
+        cursor: The last synced historyId, or None for a full listing.
+        session: Gmail session to use (defaults to the shared session).
+
+    Returns:
+        Tuple of (messages, new cursor). The new cursor is None if the
+        mailbox state could not be determined.
+    """
+    session = session or get_session()
+    if cursor:
+        try:
+            messages, new_cursor = fetch_history(cursor, session=session)
+        except HttpError as e:
+            logger.error(f"Gmail API error while syncing history: {e}")
+            return [], None
+        if messages is not None:
+            return messages, new_cursor
+        logger.info("Falling back to a full inbox listing")
+
+    try:
+        # Read the historyId before listing so nothing added mid-listing is missed
+        new_cursor = get_current_history_id(session=session)
+    except Exception as e:
+        logger.error(f"Failed to read mailbox historyId: {e}")
+        new_cursor = None
+    return iter_emails(since_hours=None, session=session), new_cursor
 
+
+def fetch_new_emails(cursor: Optional[str],
+                     session: Optional[GmailSession] = None) -> tuple[list[dict[str, Any]], Optional[str]]:
+    """
+    Fetch inbox messages added since the sync cursor.
+
+    Args:
+        cursor: The last synced historyId, or None for a full listing.
+        session: Gmail session to use (defaults to the shared session).
+
+    Returns:
+        Tuple of (messages, new cursor). The new cursor is None if the
+        mailbox state could not be determined or the listing failed.
+    """
+    messages, new_cursor = iter_new_emails(cursor, session=session)
+    try:
+        return list(messages), new_cursor
     except HttpError as e:
         logger.error(f"Gmail API error while fetching emails: {e}")
-        return all_messages
-
-    logger.info(f"Total emails fetched: {len(all_messages)}")
-    return all_messages
+        return [], None
 
 
-def get_email_snippet(message_id: str) -> str:
+@timed("get_email_snippet")
+def get_email_snippet(message_id: str, session: Optional[GmailSession] = None) -> str:
     """
     Get a short preview snippet of an email.
 
     Args:
         message_id: The Gmail message ID.
+        session: Gmail session to use (defaults to the shared session).
 
     Returns:
         The email snippet text, or empty string on error.
     """
+    session = session or get_session()
     try:
-        service = get_gmail_service()
-        message = service.users().messages().get(
+        message = session.execute(session.service.users().messages().get(
             userId='me',
             id=message_id,
             format='minimal'
-        ).execute()
+        ))
         return message.get('snippet', '')
     except HttpError as e:
         logger.error(f"Failed to get snippet for message {message_id}: {e}")
         return ''
 
 
-def get_email_content(message_id: str) -> dict[str, str]:
+@timed("get_email_content")
+def get_email_content(message_id: str, session: Optional[GmailSession] = None) -> dict[str, str]:
     """
     Get full email content including headers and body.
 
     Args:
         message_id: The Gmail message ID.
+        session: Gmail session to use (defaults to the shared session).
 
     Returns:
         Dictionary with 'content' (truncated to MAX_CONTENT_LENGTH) and 'date' fields.
     """
+    session = session or get_session()
     try:
-        service = get_gmail_service()
-        message = service.users().messages().get(
+        message = session.execute(session.service.users().messages().get(
             userId='me',
             id=message_id,
-            format='full'
-        ).execute()
+            format='full',
+            fields=BODY_FIELDS
+        ))
     except HttpError as e:
         logger.error(f"Failed to get content for message {message_id}: {e}")
         return {"content": "", "date": "Unknown"}
 
-    payload = message.get('payload', {})
-    parts = payload.get('parts', [])
-    body = ""
-
-    # Extract body from message parts
-    if parts:
-        for part in parts:
-            if part.get('mimeType') == 'text/plain':
-                body += part.get('body', {}).get('data', '')
-    else:
-        body = payload.get('body', {}).get('data', '')
+    return parse_message_content(message)
 
-    # Decode base64 body
-    if body:
-        try:
-            body = base64.urlsafe_b64decode(body).decode('utf-8', errors='ignore')
-        except Exception as e:
-            logger.warning(f"Failed to decode email body: {e}")
-            body = message.get('snippet', '')
-    else:
-        body = message.get('snippet', '')
+
+def parse_message_content(message: dict[str, Any]) -> dict[str, str]:
+    """
+    Extract headers, body and date from a full-format Gmail message.
+
+    Nested MIME parts are walked and HTML-only bodies are converted to text;
+    decoding stops once MAX_CONTENT_LENGTH characters have been produced.
+
+    Args:
+        message: A message resource fetched with format='full' (optionally
+            masked with BODY_FIELDS).
+
+    Returns:
+        Dictionary with 'content' (truncated to MAX_CONTENT_LENGTH) and 'date' fields.
+    """
+    payload = message.get('payload', {})
 
     # Extract headers
     headers = payload.get('headers', [])
     from_header = next((h['value'] for h in headers if h['name'] == 'From'), '')
     subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '')
-    full_content = f"From: {from_header}\nSubject: {subject}\n\n{body}"
+    header_block = f"From: {from_header}\nSubject: {subject}\n\n"
 
-    # Truncate content if too long
-    if len(full_content) > MAX_CONTENT_LENGTH:
-        logger.debug(f"Truncating email content from {len(full_content)} to {MAX_CONTENT_LENGTH} chars")
-        full_content = full_content[:MAX_CONTENT_LENGTH]
+    # Decode only as much of the body as fits in the content budget
+    body = extract_body(payload, MAX_CONTENT_LENGTH - len(header_block)) or message.get('snippet', '')
+    full_content = (header_block + body)[:MAX_CONTENT_LENGTH]
 
     # Extract date
     internal_date = int(message.get('internalDate', 0)) / 1000
     email_date = datetime.fromtimestamp(internal_date).strftime('%Y-%m-%d') if internal_date else 'Unknown'
 
     return {"content": full_content, "date": email_date}
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """Return True if an API error is a 429 or a quota-based 403."""
+    if not isinstance(error, HttpError):
+        return False
+    if error.resp.status == 429:
+        return True
+    if error.resp.status == 403:
+        details = getattr(error, 'error_details', None) or []
+        if isinstance(details, list):
+            return any(isinstance(d, dict) and d.get('reason') in RATE_LIMIT_REASONS for d in details)
+    return False
+
+
+def classify_gmail_error(error: Exception) -> tuple[Optional[str], Optional[float]]:
+    """
+    Classify a Gmail call failure for the rate limiter.
+
+    Args:
+        error: The exception raised by the call.
+
+    Returns:
+        Tuple of (failure kind, Retry-After seconds). The kind is THROTTLED,
+        SERVER_ERROR, or None for errors that retrying cannot fix.
+    """
+    if isinstance(error, HttpError):
+        retry_after = parse_duration(error.resp.get('retry-after'))
+        if _is_rate_limited(error):
+            return THROTTLED, retry_after
+        if error.resp.status >= 500:
+            return SERVER_ERROR, retry_after
+        return None, None
+    import httplib2
+    if isinstance(error, (httplib2.HttpLib2Error, ConnectionError, TimeoutError)):
+        return SERVER_ERROR, None
+    return None, None
+
+
+def batch_get_messages(message_ids: list[str], format: str = 'minimal',
+                       session: Optional[GmailSession] = None,
+                       metadata_headers: Optional[list[str]] = None,
+                       fields: Optional[str] = None) -> dict[str, dict[str, Any]]:
+    """
+    Fetch many messages using Gmail batch requests of up to BATCH_SIZE calls.
+
+    Items rejected with a rate-limit error are reported to the session's
+    limiter and retried after its jittered backoff; other per-item failures
+    are logged and skipped. A batch request that fails as a whole has
+    already been retried by the limiter, so its messages are given up. The IDs that could not be fetched are logged
+    and counted in the gmail_fetch_failures metric.
+
+    Args:
+        message_ids: Gmail message IDs to fetch.
+        format: Gmail message format ('minimal', 'metadata' or 'full').
+        session: Gmail session to use (defaults to the shared session).
+        metadata_headers: Headers to include when format is 'metadata'.
+        fields: Partial-response mask limiting which message fields are returned.
+
+    Returns:
+        Dictionary mapping message ID to message resource. IDs that could not
+        be fetched are omitted, so callers can leave them for a later run.
+    """
+    session = session or get_session()
+    service = session.service
+    unique_ids = list(dict.fromkeys(message_ids))
+    messages: dict[str, dict[str, Any]] = {}
+    get_kwargs: dict[str, Any] = {'userId': 'me', 'format': format}
+    if metadata_headers:
+        get_kwargs['metadataHeaders'] = metadata_headers
+    if fields:
+        get_kwargs['fields'] = fields
+
+    for start in range(0, len(unique_ids), BATCH_SIZE):
+        pending = unique_ids[start:start + BATCH_SIZE]
+        attempt = 0
+        while pending:
+            throttled: list[str] = []
+
+            def callback(request_id: str, response: Any, exception: Optional[Exception]) -> None:
+                if exception is None:
+                    messages[request_id] = response
+                elif _is_rate_limited(exception):
+                    throttled.append(request_id)
+                else:
+                    logger.error(f"Failed to get message {request_id} ({format}): {exception}")
+
+            batch = service.new_batch_http_request(callback=callback)
+            for message_id in pending:
+                batch.add(service.users().messages().get(id=message_id, **get_kwargs), request_id=message_id)
+            try:
+                session.execute(batch, cost=GET_UNITS * len(pending))
+            except HttpError as e:
+                # The limiter already retried a throttled or failing batch request; don't retry it again
+                logger.error(f"Gmail batch request failed: {e}")
+                break
+
+            if not throttled:
+                break
+            attempt += 1
+            if attempt > BATCH_MAX_RETRIES:
+                logger.error(f"Giving up on {len(throttled)} rate-limited messages")
+                break
+            delay = session.limiter.record_failure(THROTTLED)
+            logger.warning(f"Rate limited on {len(throttled)} messages, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            pending = throttled
+
+    failed = [message_id for message_id in unique_ids if message_id not in messages]
+    if failed:
+        metrics.increment("gmail_fetch_failures", len(failed))
+        logger.warning(f"Could not fetch {len(failed)} of {len(unique_ids)} messages ({format}): {', '.join(failed)}")
+    return messages
+
+
+@timed("get_email_snippets")
+def get_email_snippets(message_ids: list[str],
+                       session: Optional[GmailSession] = None) -> dict[str, str]:
+    """
+    Get preview snippets for many emails using batch requests.
+
+    Args:
+        message_ids: Gmail message IDs.
+        session: Gmail session to use (defaults to the shared session).
+
+    Returns:
+        Dictionary mapping message ID to snippet text. Failed IDs are omitted.
+    """
+    messages = batch_get_messages(message_ids, format='minimal', session=session)
+    return {message_id: message.get('snippet', '') for message_id, message in messages.items()}
+
+
+@timed("get_email_metadata")
+def get_email_metadata(message_ids: list[str],
+                       session: Optional[GmailSession] = None) -> dict[str, dict[str, str]]:
+    """
+    Get snippet, sender and subject for many emails using batch requests.
+
+    Args:
+        message_ids: Gmail message IDs.
+        session: Gmail session to use (defaults to the shared session).
+
+    Returns:
+        Dictionary mapping message ID to a dictionary with 'snippet', 'from'
+        and 'subject' fields. Failed IDs are omitted.
+    """
+    messages = batch_get_messages(message_ids, format='metadata', session=session,
+                                  metadata_headers=['From', 'Subject'])
+    metadata = {}
+    for message_id, message in messages.items():
+        headers = message.get('payload', {}).get('headers', [])
+        metadata[message_id] = {
+            "snippet": message.get('snippet', ''),
+            "from": next((h['value'] for h in headers if h['name'] == 'From'), ''),
+            "subject": next((h['value'] for h in headers if h['name'] == 'Subject'), ''),
+        }
+    return metadata
+
+
+@timed("get_email_contents")
+def get_email_contents(message_ids: list[str],
+                       session: Optional[GmailSession] = None) -> dict[str, dict[str, str]]:
+    """
+    Get full content for many emails using batch requests.
+
+    Args:
+        message_ids: Gmail message IDs.
+        session: Gmail session to use (defaults to the shared session).
+
+    Returns:
+        Dictionary mapping message ID to a 'content'/'date' dictionary as
+        returned by get_email_content. Failed IDs are omitted.
+    """
+    messages = batch_get_messages(message_ids, format='full', session=session, fields=BODY_FIELDS)
+    return {message_id: parse_message_content(message) for message_id, message in messages.items()}
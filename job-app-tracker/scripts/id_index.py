@@ -0,0 +1,210 @@
+# scripts/id_index.py
+"""Compact on-disk index of processed Gmail message IDs."""
+
+import hashlib
+import heapq
+import json
+import logging
+import mmap
+import os
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = "data/processed_ids.bin"
+LEGACY_JSON_PATH = "data/processed_ids.json"
+COMPACT_THRESHOLD = int(os.getenv('PROCESSED_IDS_COMPACT_AT', '50000'))
+
+HEX_DIGITS = frozenset("0123456789abcdef")
+
+
+def encode_id(message_id: str) -> int:
+    """
+    Map a message ID to a 64-bit integer key.
+
+    Gmail IDs are hex strings of up to 16 digits and map to their exact
+    value; any other ID is hashed to 64 bits.
+
+    Args:
+        message_id: The Gmail message ID.
+
+    Returns:
+        Unsigned 64-bit key.
+    """
+    if 0 < len(message_id) <= 16 and HEX_DIGITS.issuperset(message_id):
+        return int(message_id, 16)
+    return int.from_bytes(hashlib.blake2b(message_id.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _to_little_endian(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array('Q', values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(data: bytes) -> array:
+    values = array('Q')
+    values.frombytes(data[:len(data) - len(data) % 8])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+class SeenIdIndex:
+    """
+    Set-like membership index of processed message IDs.
+
+    IDs are stored as 8-byte keys: a sorted, memory-mapped array searched
+    with bisect, plus an append-only log of IDs added since the last
+    compaction that is held in memory as a small set. Startup maps the
+    array instead of parsing it, and additions only append to the log.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str = INDEX_PATH, legacy_json_path: Optional[str] = LEGACY_JSON_PATH,
+                 compact_threshold: int = COMPACT_THRESHOLD):
+        self.path = path
+        self.log_path = os.path.splitext(path)[0] + ".log"
+        self.compact_threshold = compact_threshold
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._sorted = memoryview(b"").cast('Q')
+        self._recent: set[int] = set()
+        self._pending: list[int] = []
+        self._lock = threading.RLock()
+
+        if not os.path.exists(path) and not os.path.exists(self.log_path) \
+                and legacy_json_path and os.path.exists(legacy_json_path):
+            self._migrate(legacy_json_path)
+        self._open()
+
+    def _migrate(self, legacy_json_path: str) -> None:
+        """Import IDs from the legacy JSON list into a new index file."""
+        with open(legacy_json_path, "r") as f:
+            content = f.read().strip()
+        ids = json.loads(content) if content else []
+        self._write_sorted(sorted({encode_id(i) for i in ids}))
+        logger.info(f"Migrated {len(ids)} processed IDs from {legacy_json_path} to {self.path}")
+
+    def _open(self) -> None:
+        """Map the sorted array and load the append log."""
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= 8:
+            if sys.byteorder == 'little':
+                self._file = open(self.path, "rb")
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                usable = len(self._mmap) - len(self._mmap) % 8
+                self._sorted = memoryview(self._mmap)[:usable].cast('Q')
+            else:
+                with open(self.path, "rb") as f:
+                    self._sorted = memoryview(_from_little_endian(f.read()))
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "rb") as f:
+                self._recent = set(_from_little_endian(f.read()))
+
+    def _close(self) -> None:
+        """Release the memory map."""
+        self._sorted.release()
+        self._sorted = memoryview(b"").cast('Q')
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_sorted(self, keys: Iterable[int]) -> None:
+        """Atomically replace the sorted array file."""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(_to_little_endian(array('Q', keys)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _contains_sorted(self, key: int) -> bool:
+        i = bisect_left(self._sorted, key)
+        return i < len(self._sorted) and self._sorted[i] == key
+
+    def __contains__(self, message_id: object) -> bool:
+        if not isinstance(message_id, str):
+            return False
+        key = encode_id(message_id)
+        with self._lock:
+            return key in self._recent or self._contains_sorted(key)
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._recent)
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over stored keys (encoded IDs), not the original strings."""
+        yield from self._sorted
+        yield from self._recent
+
+    def add(self, message_id: str) -> None:
+        """
+        Mark a message ID as processed (persisted on the next flush).
+
+        Args:
+            message_id: The Gmail message ID.
+        """
+        key = encode_id(message_id)
+        with self._lock:
+            if key in self._recent or self._contains_sorted(key):
+                return
+            self._recent.add(key)
+            self._pending.append(key)
+
+    def update(self, message_ids: Iterable[str]) -> None:
+        """Mark several message IDs as processed."""
+        for message_id in message_ids:
+            self.add(message_id)
+
+    def _append_pending(self) -> None:
+        """Durably append IDs added since the last flush to the log."""
+        if not self._pending:
+            return
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with open(self.log_path, "ab") as f:
+            f.write(_to_little_endian(array('Q', self._pending)))
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending = []
+
+    def flush(self) -> None:
+        """Persist IDs added since the last flush, compacting once the log has grown large."""
+        with self._lock:
+            self._append_pending()
+            if len(self._recent) >= self.compact_threshold:
+                self.compact()
+
+    def compact(self) -> None:
+        """Merge the log into the sorted array and empty it."""
+        with self._lock:
+            self._append_pending()
+            merged = array('Q', heapq.merge(self._sorted, sorted(self._recent)))
+            self._close()
+            self._write_sorted(merged)
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+            self._recent = set()
+            self._open()
+        logger.info(f"Compacted processed ID index to {len(merged)} entries")
+
+    def close(self) -> None:
+        """Flush pending additions and release the memory map."""
+        with self._lock:
+            self._append_pending()
+            self._close()
@@ -0,0 +1,205 @@
+# scripts/lifecycle.py
+"""Per-application status history and transition counts."""
+
+import bisect
+import json
+import logging
+import os
+import tempfile
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+from scripts.entity_resolution import EntityResolver, application_ids
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+LIFECYCLE_PATH = "data/lifecycle.json"
+LIFECYCLE_VERSION = 2
+
+# Statuses in lifecycle order; Offer and Declined are both terminal
+STATUSES = ("Applied", "Interviewed", "Offer", "Declined")
+STATUS_RANK = {"Applied": 0, "Interviewed": 1, "Offer": 2, "Declined": 2}
+
+
+def event_key(record: dict[str, Any]) -> str:
+    """
+    Return the identity of the email event behind a record.
+
+    Records from the pipeline carry their Gmail message ID; legacy records
+    from the JSON export fall back to date and status.
+    """
+    return record.get("email_id") or f"{record.get('Date', 'Unknown')}\x1f{record.get('status', '')}"
+
+
+def status_path(events: list[list[str]]) -> list[str]:
+    """
+    Return the statuses an application moved through.
+
+    Every application starts as Applied, even if its confirmation email was
+    never seen. Events that would move it backwards (a late confirmation
+    after an interview, or a second outcome) are ignored.
+
+    Args:
+        events: [event key, date, status] lists in chronological order.
+
+    Returns:
+        The status path, starting with 'Applied'.
+    """
+    path = ["Applied"]
+    for _, _, status in events:
+        if STATUS_RANK[status] > STATUS_RANK[path[-1]]:
+            path.append(status)
+    return path
+
+
+def path_transitions(path: list[str]) -> list[str]:
+    """Return the 'From>To' transition keys along a status path."""
+    return [f"{source}>{target}" for source, target in zip(path, path[1:])]
+
+
+class ApplicationLifecycle:
+    """
+    Applications with an ordered event log, updated as emails arrive.
+
+    Each application (the canonical ID stored on its records) keeps the
+    events seen for it, sorted by date, and aggregate transition counts are
+    adjusted by the difference each new event makes to its application's
+    path, so recording an event never rescans other applications.
+    """
+
+    def __init__(self, path: str = LIFECYCLE_PATH, resolver: Optional[EntityResolver] = None):
+        self.path = path
+        self.applications: dict[str, dict[str, Any]] = {}
+        self.transitions: Counter = Counter()
+        # Shared resolver state, used only for records saved without an application ID
+        self.resolver = resolver or EntityResolver()
+
+    @classmethod
+    def load(cls, path: str = LIFECYCLE_PATH, resolver: Optional[EntityResolver] = None) -> "ApplicationLifecycle":
+        """
+        Load the lifecycle state, or return an empty one if it is missing or unreadable.
+
+        Args:
+            path: Path to the lifecycle JSON file.
+            resolver: Shared resolver state for records without an application ID.
+
+        Returns:
+            The loaded lifecycle.
+        """
+        lifecycle = cls(path, resolver)
+        if not os.path.exists(path):
+            return lifecycle
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != LIFECYCLE_VERSION:
+                raise ValueError(f"unsupported version {data.get('version')}")
+            lifecycle.applications = data["applications"]
+            lifecycle.transitions = Counter(data["transitions"])
+        except (json.JSONDecodeError, KeyError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable lifecycle state {path}: {e}")
+            return cls(path, resolver)
+        return lifecycle
+
+    def save(self) -> None:
+        """Atomically write the lifecycle state."""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump({
+                "version": LIFECYCLE_VERSION,
+                "transitions": dict(self.transitions),
+                "applications": self.applications,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def record(self, records: Iterable[dict[str, Any]]) -> int:
+        """
+        Add the events behind new records to their applications.
+
+        Records already recorded (same application and event key) are
+        ignored, so replaying records after a restart is safe.
+
+        Args:
+            records: Job application records, as appended to the results.
+
+        Returns:
+            Number of new events recorded.
+        """
+        records = [r for r in records if r.get("status") in STATUS_RANK]
+        added = 0
+        for application_id, record in zip(application_ids(records, self.resolver), records):
+            added += self._add_event(application_id, record)
+        return added
+
+    def _add_event(self, application_id: str, record: dict[str, Any]) -> bool:
+        """Insert one event in date order and update the transition counts."""
+        application = self.applications.get(application_id)
+        if application is None:
+            application = self.applications[application_id] = {
+                "company": record.get("Company", "Unknown"),
+                "title": record.get("Job Title", "Unknown"),
+                "location": record.get("Location", "Unknown"),
+                "status": "Applied",
+                "events": [],
+            }
+        key = event_key(record)
+        events = application["events"]
+        if any(existing[0] == key for existing in events):
+            return False
+
+        before = status_path(events)
+        event = [key, record.get("Date", "Unknown"), record["status"]]
+        # Same-day events are ordered by lifecycle stage
+        position = bisect.bisect_right(
+            [(e[1], STATUS_RANK[e[2]]) for e in events], (event[1], STATUS_RANK[event[2]])
+        )
+        events.insert(position, event)
+        after = status_path(events)
+        if after != before:
+            self.transitions.subtract(path_transitions(before))
+            self.transitions.update(path_transitions(after))
+            self.transitions = +self.transitions
+        application["status"] = after[-1]
+        if application["location"] == "Unknown":
+            application["location"] = record.get("Location", "Unknown")
+        return True
+
+    def get(self, application_id: str) -> Optional[dict[str, Any]]:
+        """Return an application by canonical ID, or None."""
+        return self.applications.get(application_id)
+
+    def transition_counts(self) -> dict[tuple[str, str], int]:
+        """Return {(from status, to status): number of applications} for every observed transition."""
+        return {tuple(key.split(">")): count for key, count in self.transitions.items()}
+
+    def status_counts(self) -> dict[str, int]:
+        """Return the number of applications currently in each status."""
+        counts = Counter(app["status"] for app in self.applications.values())
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+
+def load_lifecycle(records: list[dict[str, Any]], path: str = LIFECYCLE_PATH,
+                   resolver: Optional[EntityResolver] = None) -> ApplicationLifecycle:
+    """
+    Load the lifecycle state, building it from existing records on first use.
+
+    Args:
+        records: The current job application records.
+        path: Path to the lifecycle JSON file.
+        resolver: Shared resolver state for records without an application ID.
+
+    Returns:
+        The lifecycle state.
+    """
+    lifecycle = ApplicationLifecycle.load(path, resolver)
+    if not lifecycle.applications and records:
+        added = lifecycle.record(records)
+        logger.info(f"Built lifecycle state for {len(lifecycle.applications)} applications from {added} records")
+    return lifecycle
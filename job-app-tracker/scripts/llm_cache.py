@@ -0,0 +1,126 @@
+# scripts/llm_cache.py
+"""Persistent, size-bounded cache for LLM responses keyed by content hash."""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Configuration (can be overridden via environment variables)
+CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'data/cache/llm_cache.sqlite3')
+CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '50000'))
+
+
+def cache_key(model: str, system_prompt: str, text: str) -> str:
+    """
+    Build a cache key from everything that determines a completion.
+
+    Args:
+        model: The model name.
+        system_prompt: The system prompt sent with the request.
+        text: The user input text.
+
+    Returns:
+        Hex SHA-256 digest of the model, prompt and input.
+    """
+    digest = hashlib.sha256()
+    for part in (model, system_prompt, text):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """
+    SQLite-backed LRU cache of completion text.
+
+    Entries are evicted least-recently-used first once the cache holds more
+    than max_entries rows. Safe to share between threads.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+        self._clock = self._conn.execute("SELECT MAX(last_used) FROM responses").fetchone()[0] or 0.0
+
+    def _tick(self) -> float:
+        """Return a strictly increasing timestamp so LRU order has no ties."""
+        self._clock = max(time.time(), self._clock + 1e-6)
+        return self._clock
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response and mark it as recently used.
+
+        Args:
+            key: Key from cache_key().
+
+        Returns:
+            The cached response text, or None on a miss.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (self._tick(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Store a response, evicting the least recently used entries if full.
+
+        Args:
+            key: Key from cache_key().
+            value: The response text.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, last_used) VALUES (?, ?, ?)",
+                (key, value, self._tick())
+            )
+            excess = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and the current entry count."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,272 @@
+# scripts/metrics.py
+"""Lightweight run instrumentation: counters, gauges, timers and run reports."""
+
+import bisect
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Report output (can be overridden via environment variables)
+METRICS_DIR = os.getenv('METRICS_DIR', 'reports')
+METRICS_PREFIX = "job_tracker"
+# Set to 1 to profile the run with cProfile / record allocations with tracemalloc
+PROFILE_RUN = os.getenv('METRICS_PROFILE', '0') == '1'
+TRACE_MEMORY = os.getenv('METRICS_TRACEMALLOC', '0') == '1'
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+# Histogram bucket upper bounds, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with count, sum, min and max."""
+
+    def __init__(self, buckets: tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket it falls in (max for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict[str, Any]:
+        """Summarize the histogram for the JSON report."""
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "min": round(self.min, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe collection of named counters, gauges and histograms.
+
+    Pipeline stages run on worker threads, so every update takes the
+    registry lock; updates are a few arithmetic operations, so contention
+    is negligible next to the network calls being measured.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self.extra: dict[str, Any] = {}
+
+    def reset(self) -> None:
+        """Clear all metrics and restart the run clock."""
+        with self._lock:
+            self.started = time.time()
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+            self.extra.clear()
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Add to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to its latest value."""
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a value in a histogram."""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Time a block into the '<name>_seconds' histogram, counting failures in '<name>_errors'."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.increment(f"{name}_errors")
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the JSON run report."""
+        with self._lock:
+            return {
+                "started_at": datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+                "duration_seconds": round(time.time() - self.started, 3),
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "timers": {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+                **self.extra,
+            }
+
+    def to_prometheus(self, prefix: str = METRICS_PREFIX) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        def clean(name: str) -> str:
+            return _INVALID_NAME_CHARS.sub("_", name)
+
+        lines = []
+        with self._lock:
+            lines += [f"# TYPE {prefix}_run_duration_seconds gauge",
+                      f"{prefix}_run_duration_seconds {time.time() - self.started:.3f}"]
+            for name, value in sorted(self.counters.items()):
+                metric = f"{prefix}_{clean(name)}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+            for name, value in sorted(self.gauges.items()):
+                metric = f"{prefix}_{clean(name)}"
+                lines += [f"# TYPE {metric} gauge", f"{metric} {value:g}"]
+            for name, histogram in sorted(self.histograms.items()):
+                metric = f"{prefix}_{clean(name)}"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f'{metric}_bucket{{le="{le}"}} {cumulative}')
+                lines += [f"{metric}_sum {histogram.sum:.6f}", f"{metric}_count {histogram.count}"]
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def timed(name: str) -> Callable:
+    """
+    Decorator timing every call of a function into the shared registry.
+
+    Args:
+        name: Metric name; calls are recorded in '<name>_seconds'.
+
+    Returns:
+        The decorator.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with metrics.timer(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _write_atomic(path: str, content: str) -> None:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def write_run_report(registry: MetricsRegistry = metrics, directory: str = METRICS_DIR) -> dict[str, Any]:
+    """
+    Write the JSON run report and Prometheus textfile.
+
+    Args:
+        registry: Metrics to report.
+        directory: Output directory.
+
+    Returns:
+        The report that was written.
+    """
+    report = registry.snapshot()
+    try:
+        _write_atomic(os.path.join(directory, "run_report.json"), json.dumps(report, indent=2))
+        _write_atomic(os.path.join(directory, f"{METRICS_PREFIX}.prom"), registry.to_prometheus())
+        logger.info(f"Run report written to {directory}")
+    except IOError as e:
+        logger.error(f"Failed to write run report: {e}")
+    return report
+
+
+@contextmanager
+def profiling(profile: bool = PROFILE_RUN, trace_memory: bool = TRACE_MEMORY,
+              registry: MetricsRegistry = metrics, directory: str = METRICS_DIR) -> Iterator[None]:
+    """
+    Optionally profile a block with cProfile and/or tracemalloc.
+
+    The cProfile dump goes to '<directory>/profile.prof' and its top
+    functions by cumulative time into the report; tracemalloc adds the peak
+    traced memory gauge and the top allocation sites.
+
+    Args:
+        profile: Run cProfile.
+        trace_memory: Run tracemalloc.
+        registry: Registry receiving the results.
+        directory: Output directory for the profile dump.
+    """
+    profiler: Optional[cProfile.Profile] = cProfile.Profile() if profile else None
+    if trace_memory:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(directory, exist_ok=True)
+            profiler.dump_stats(os.path.join(directory, "profile.prof"))
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(20)
+            registry.extra["profile_top"] = summary.getvalue().splitlines()
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            registry.set_gauge("peak_traced_memory_bytes", peak)
+            registry.extra["top_allocations"] = [
+                {"site": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:10]
+            ]
@@ -0,0 +1,212 @@
+# scripts/pipeline.py
+"""Concurrent email processing pipeline with bounded Gmail and OpenAI stages."""
+
+import logging
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Concurrency limits (can be overridden via environment variables)
+GMAIL_CONCURRENCY = int(os.getenv('GMAIL_CONCURRENCY', '4'))
+OPENAI_CONCURRENCY = int(os.getenv('OPENAI_CONCURRENCY', '8'))
+CHUNK_SIZE = 100
+
+# Outcome statuses
+JOB = "job"
+NOT_JOB = "not_job"
+ERROR = "error"
+SKIPPED = "skipped"
+
+
+@dataclass
+class PipelineOutcome:
+    """Result of running one message through the pipeline."""
+
+    message_id: str
+    status: str
+    details: Optional[dict[str, Any]] = None
+    error: Optional[Exception] = None
+    # Preview the gate saw, and whether the status came from the extractor rather than the gate
+    preview: Any = None
+    extracted: bool = False
+
+
+class EmailPipeline:
+    """
+    Run the snippet -> gate -> content -> extract stages concurrently.
+
+    Gmail batch fetches and OpenAI calls run on separate bounded thread pools
+    while chunks of messages are pipelined through the stages. Outcomes are
+    yielded in input order, so callers can update shared state from a single
+    thread and get deterministic results.
+    """
+
+    def __init__(
+        self,
+        fetch_snippets: Callable[[list[str]], dict[str, Any]],
+        is_job: Callable[[Any], bool],
+        fetch_contents: Callable[[list[str]], dict[str, dict[str, str]]],
+        extract: Callable[[dict[str, str]], Optional[dict[str, Any]]],
+        gmail_workers: int = GMAIL_CONCURRENCY,
+        openai_workers: int = OPENAI_CONCURRENCY,
+        chunk_size: int = CHUNK_SIZE,
+        max_chunks_in_flight: Optional[int] = None,
+        extract_batch: Optional[Callable[[dict[str, dict[str, str]]], dict[str, Optional[dict[str, Any]]]]] = None,
+        batch_packer: Optional[Callable[[dict[str, dict[str, str]]], list[list[str]]]] = None,
+    ):
+        """
+        Args:
+            fetch_snippets: Batch preview fetcher returning {id: preview}, where a
+                preview is a snippet string or a metadata dictionary.
+            is_job: Preview-level gate returning True for job-related mail.
+            fetch_contents: Batch content fetcher returning {id: email_data}.
+            extract: Turns email data into record details, or None if not a job email.
+            gmail_workers: Maximum concurrent Gmail requests.
+            openai_workers: Maximum concurrent OpenAI requests.
+            chunk_size: Messages per Gmail batch.
+            max_chunks_in_flight: Chunks processed concurrently (defaults to gmail_workers).
+            extract_batch: Optional multi-email extractor taking {id: email_data} and
+                returning {id: details or None}; replaces per-message extract calls.
+            batch_packer: Splits a chunk's {id: email_data} into groups of IDs for
+                extract_batch (defaults to one group per chunk).
+        """
+        self.fetch_snippets = fetch_snippets
+        self.is_job = is_job
+        self.fetch_contents = fetch_contents
+        self.extract = extract
+        self.gmail_workers = max(1, gmail_workers)
+        self.openai_workers = max(1, openai_workers)
+        self.chunk_size = chunk_size
+        self.max_chunks_in_flight = max(1, max_chunks_in_flight or self.gmail_workers)
+        self.extract_batch = extract_batch
+        self.batch_packer = batch_packer
+
+    def run(self, message_ids: Iterable[str]) -> Iterator[PipelineOutcome]:
+        """
+        Process message IDs, yielding one outcome per ID in input order.
+
+        Messages whose preview or content could not be fetched are yielded
+        as SKIPPED, so callers can leave them for the next run.
+
+        The input is consumed lazily. Closing the returned generator (or an
+        exception in the caller) cancels all queued work.
+
+        Args:
+            message_ids: Gmail message IDs to process.
+
+        Yields:
+            PipelineOutcome for each message ID.
+        """
+        gmail_pool = ThreadPoolExecutor(self.gmail_workers, thread_name_prefix="gmail")
+        openai_pool = ThreadPoolExecutor(self.openai_workers, thread_name_prefix="openai")
+        chunk_pool = ThreadPoolExecutor(self.max_chunks_in_flight, thread_name_prefix="chunk")
+        in_flight: deque[Future] = deque()
+        ids = iter(message_ids)
+        try:
+            while True:
+                while len(in_flight) < self.max_chunks_in_flight:
+                    chunk = list(islice(ids, self.chunk_size))
+                    if not chunk:
+                        break
+                    in_flight.append(chunk_pool.submit(self._process_chunk, chunk, gmail_pool, openai_pool))
+                if not in_flight:
+                    break
+                yield from in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            for pool in (chunk_pool, gmail_pool, openai_pool):
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def _process_chunk(self, chunk: list[str], gmail_pool: ThreadPoolExecutor,
+                       openai_pool: ThreadPoolExecutor) -> list[PipelineOutcome]:
+        """Run one chunk through every stage and return outcomes in chunk order."""
+        outcomes = {message_id: PipelineOutcome(message_id, SKIPPED) for message_id in chunk}
+
+        try:
+            snippets = gmail_pool.submit(self.fetch_snippets, chunk).result()
+        except Exception as e:
+            logger.error(f"Failed to fetch snippets: {e}")
+            return list(outcomes.values())
+
+        # Fetchers omit messages they failed to get; those stay SKIPPED
+        fetched = [message_id for message_id in chunk if message_id in snippets]
+        for message_id in fetched:
+            outcomes[message_id].preview = snippets[message_id]
+        gates = {message_id: openai_pool.submit(self.is_job, snippets[message_id]) for message_id in fetched}
+        job_ids = []
+        for message_id, future in gates.items():
+            try:
+                if future.result():
+                    job_ids.append(message_id)
+                else:
+                    outcomes[message_id].status = NOT_JOB
+            except Exception as e:
+                logger.error(f"Error processing email {message_id}: {e}")
+                outcomes[message_id].status = ERROR
+                outcomes[message_id].error = e
+
+        if not job_ids:
+            return list(outcomes.values())
+        try:
+            contents = gmail_pool.submit(self.fetch_contents, job_ids).result()
+        except Exception as e:
+            logger.error(f"Failed to fetch email contents: {e}")
+            return list(outcomes.values())
+
+        job_ids = [message_id for message_id in job_ids if message_id in contents]
+        if not job_ids:
+            return list(outcomes.values())
+
+        if self.extract_batch is not None:
+            self._extract_batched(job_ids, contents, outcomes, openai_pool)
+            return list(outcomes.values())
+
+        extractions = {message_id: openai_pool.submit(self.extract, contents[message_id])
+                       for message_id in job_ids}
+        for message_id, future in extractions.items():
+            outcome = outcomes[message_id]
+            try:
+                outcome.details = future.result()
+                outcome.status = JOB if outcome.details else NOT_JOB
+                outcome.extracted = True
+            except Exception as e:
+                logger.error(f"Error processing email {message_id}: {e}")
+                outcome.status = ERROR
+                outcome.error = e
+
+        return list(outcomes.values())
+
+    def _extract_batched(self, job_ids: list[str], contents: dict[str, dict[str, str]],
+                         outcomes: dict[str, PipelineOutcome], openai_pool: ThreadPoolExecutor) -> None:
+        """Run the multi-email extractor over packed groups and record outcomes."""
+        items = {message_id: contents[message_id] for message_id in job_ids}
+        groups = self.batch_packer(items) if self.batch_packer is not None else [job_ids]
+        futures = [(group, openai_pool.submit(self.extract_batch, {m: items[m] for m in group}))
+                   for group in groups]
+        for group, future in futures:
+            error: Optional[Exception] = None
+            try:
+                batch_details = future.result()
+            except Exception as e:
+                logger.error(f"Error processing batch of {len(group)} emails: {e}")
+                error = e
+            for message_id in group:
+                outcome = outcomes[message_id]
+                if error is not None:
+                    outcome.status = ERROR
+                    outcome.error = error
+                    continue
+                outcome.details = batch_details.get(message_id)
+                outcome.status = JOB if outcome.details else NOT_JOB
+                outcome.extracted = True
@@ -0,0 +1,153 @@
+# scripts/prefilter.py
+"""Rule-based pre-filter that settles obvious job/non-job emails without an LLM call."""
+
+import logging
+import re
+import threading
+from email.utils import parseaddr
+from typing import Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Applicant tracking systems that only send candidate mail
+JOB_SENDER_DOMAINS = frozenset({
+    "greenhouse.io", "greenhouse-mail.io", "lever.co", "hire.lever.co", "myworkdayjobs.com",
+    "myworkday.com", "icims.com", "smartrecruiters.com", "jobvite.com", "ashbyhq.com",
+    "successfactors.com", "taleo.net", "bamboohr.com", "breezy.hr", "workablemail.com",
+    "recruitee.com", "applytojob.com", "ultipro.com", "paylocity.com", "eightfold.ai",
+    "avature.net", "jazzhr.com", "rippling-ats.com", "dover.com",
+})
+
+# Notification-only senders that never send application updates
+NON_JOB_SENDER_DOMAINS = frozenset({
+    "substack.com", "medium.com", "facebookmail.com", "redditmail.com", "quoramail.com",
+    "discord.com", "doordash.com", "ubereats.com", "venmo.com", "duolingo.com",
+})
+
+NON_JOB_SUBJECT_PATTERN = re.compile(
+    r"verification code|security code|one[- ]time (?:pass(?:code|word)|code)|\b2fa\b"
+    r"|password reset|reset your password|sign[- ]in attempt|security alert|new sign[- ]in"
+    r"|your (?:order|receipt|invoice|statement|subscription)|order #?\d|has shipped|out for delivery"
+    r"|payment (?:received|confirmation)|newsletter|webinar"
+    r"|job alert|jobs? (?:recommendations?|for you|you may be interested)|new jobs? (?:for|matching|posted)",
+    re.IGNORECASE
+)
+
+JOB_SUBJECT_PATTERN = re.compile(
+    r"thank(?:s| you) for (?:your )?(?:applying|application|interest in)"
+    r"|application (?:received|submitted|confirmation|status|update)"
+    r"|\byour (?:job )?application\b|your candidacy|interview (?:invitation|request|availability)",
+    re.IGNORECASE
+)
+
+JOB_CONTEXT_PATTERN = re.compile(r"\b(?:application|applying|applied|candida\w*|position|role)\b", re.IGNORECASE)
+
+
+def sender_domain(from_header: str) -> str:
+    """
+    Extract the lower-cased domain from a From header.
+
+    Args:
+        from_header: Raw From header value, e.g. 'Acme <jobs@acme.com>'.
+
+    Returns:
+        The sender's domain, or an empty string if none is present.
+    """
+    address = parseaddr(from_header)[1]
+    return address.rpartition('@')[2].lower().strip('>. ') if '@' in address else ''
+
+
+def _matches_domain(domain: str, domains: frozenset[str]) -> bool:
+    """Return True if domain or any parent domain is in the set."""
+    parts = domain.split('.')
+    return any('.'.join(parts[i:]) in domains for i in range(len(parts) - 1))
+
+
+class PreFilter:
+    """
+    Decide clear-cut emails locally and leave ambiguous ones to the LLM.
+
+    Only high-precision rules may answer "not a job email", because that
+    answer skips the email entirely. "Job email" answers are cheaper to get
+    wrong since the full classifier re-checks them.
+    """
+
+    def __init__(self, status_keywords: Optional[dict[str, list[str]]] = None, llm_gate: bool = True):
+        """
+        Args:
+            status_keywords: Status -> keyword table (main.STATUS_KEYWORDS); a
+                subject with one of these keywords and a job-context word is
+                treated as job-related.
+            llm_gate: Whether undecided emails go through an LLM gate call. If
+                not (single/batch mode, backfill), a "job email" answer saves
+                no call, since the email reaches the extractor either way.
+        """
+        self.llm_gate = llm_gate
+        keywords = [k for words in (status_keywords or {}).values() for k in words]
+        self._status_pattern = (
+            re.compile("|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)), re.IGNORECASE)
+            if keywords else None
+        )
+        self._lock = threading.Lock()
+        self.decided_job = 0
+        self.decided_not_job = 0
+        self.ambiguous = 0
+
+    def decide(self, from_header: str, subject: str) -> Optional[bool]:
+        """
+        Classify an email from its sender and subject without counting it.
+
+        Args:
+            from_header: Raw From header value.
+            subject: Subject line.
+
+        Returns:
+            True for job-related, False for clearly unrelated, None if unsure.
+        """
+        domain = sender_domain(from_header)
+        if NON_JOB_SUBJECT_PATTERN.search(subject):
+            return False
+        if domain and _matches_domain(domain, JOB_SENDER_DOMAINS):
+            return True
+        if domain and _matches_domain(domain, NON_JOB_SENDER_DOMAINS):
+            return False
+        if JOB_SUBJECT_PATTERN.search(subject):
+            return True
+        if self._status_pattern and self._status_pattern.search(subject) and JOB_CONTEXT_PATTERN.search(subject):
+            return True
+        return None
+
+    def classify(self, from_header: str, subject: str) -> Optional[bool]:
+        """
+        Classify an email and update the decision counters.
+
+        Args:
+            from_header: Raw From header value.
+            subject: Subject line.
+
+        Returns:
+            True for job-related, False for clearly unrelated, None if unsure.
+        """
+        decision = self.decide(from_header, subject)
+        with self._lock:
+            if decision is None:
+                self.ambiguous += 1
+            elif decision:
+                self.decided_job += 1
+            else:
+                self.decided_not_job += 1
+        return decision
+
+    def stats(self) -> dict[str, int]:
+        """Return decision counters and the number of LLM calls saved."""
+        return {
+            "decided_job": self.decided_job,
+            "decided_not_job": self.decided_not_job,
+            "ambiguous": self.ambiguous,
+            "calls_saved": self.decided_not_job + (self.decided_job if self.llm_gate else 0),
+        }
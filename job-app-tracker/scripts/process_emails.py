@@ -1,13 +1,16 @@
 # scripts/process_emails.py
 """Email processing module using OpenAI for job application classification."""
 
+import json
 import logging
 import os
-from typing import Optional
+import threading
+from typing import Any, Optional
 
-from dotenv import load_dotenv
-from openai import OpenAI, APIError, RateLimitError, APIConnectionError
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from scripts.compaction import PromptCompactor, compact_email, count_tokens
+from scripts.llm_cache import LLMCache, cache_key
+from scripts.metrics import metrics, timed
+from scripts.rate_limit import SERVER_ERROR, THROTTLED, AdaptiveRateLimiter, parse_duration
 
 # Configure logging
 logging.basicConfig(
@@ -16,24 +19,235 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv(dotenv_path='config/.env')
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY in your .env file.")
+ENV_PATH = 'config/.env'
+MODEL = "gpt-3.5-turbo"
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
 
-# Initialize OpenAI client (v1.0+ API)
-client = OpenAI(api_key=OPENAI_API_KEY)
+JOB_GATE_PROMPT = (
+    "Determine if this email snippet is related to a job application "
+    "(e.g., confirmation, rejection, interview). Return 'Yes' or 'No'."
+)
 
+CLASSIFY_PROMPT = (
+    "You are an expert at analyzing job application emails. "
+    "Analyze this email and confirm if it's a job application-related email "
+    "(e.g., confirmation, rejection, interview invite). "
+    "If not, return only: 'Not Job Application'. "
+    "If yes, extract: "
+    "1. Company name (infer from context if not explicit, else 'Unknown'), "
+    "2. Job title (infer from context if not explicit, else 'Unknown'), "
+    "3. Location (if not found, return 'Unknown'), "
+    "4. Status (e.g., 'Applied', 'Interviewed', 'Offer', 'Declined', or 'Unknown'). "
+    "Return in this format:\n"
+    "Company: [company name]\n"
+    "Job Title: [job title]\n"
+    "Location: [location]\n"
+    "Status: [status]\n"
+)
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
-    retry=retry_if_exception_type((RateLimitError, APIConnectionError)),
-    before_sleep=lambda retry_state: logger.warning(
-        f"Retrying API call (attempt {retry_state.attempt_number})..."
-    )
+EXTRACT_PROMPT = (
+    "You are an expert at analyzing job application emails. "
+    "Decide whether this email is about one of the recipient's job applications "
+    "(e.g., confirmation, rejection, interview invite, offer) and extract its details. "
+    "Respond with a single JSON object with exactly these keys:\n"
+    '{"is_job": true or false, '
+    '"company": company name (infer from context, else "Unknown"), '
+    '"title": job title (infer from context, else "Unknown"), '
+    '"location": location (else "Unknown"), '
+    '"status": one of "Applied", "Interviewed", "Offer", "Declined", "Unknown"}\n'
+    "If is_job is false, the other fields may be empty strings."
+)
+
+BATCH_EXTRACT_PROMPT = (
+    "You are an expert at analyzing job application emails. "
+    "You will receive several emails, each starting with a line '### Email <index>'. "
+    "For every email, decide whether it is about one of the recipient's job applications "
+    "(e.g., confirmation, rejection, interview invite, offer) and extract its details. "
+    "Respond with a single JSON object of the form:\n"
+    '{"results": [{"index": <index>, "is_job": true or false, '
+    '"company": company name (else "Unknown"), "title": job title (else "Unknown"), '
+    '"location": location (else "Unknown"), '
+    '"status": one of "Applied", "Interviewed", "Offer", "Declined", "Unknown"}, ...]}\n'
+    "Include exactly one result per email, in the same order."
 )
+
+EXTRACTION_FIELDS = ("company", "title", "location", "status")
+
+# Multi-email batching (can be overridden via environment variables)
+BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "6000"))
+BATCH_MAX_ITEMS = int(os.getenv("LLM_BATCH_MAX_ITEMS", "20"))
+BATCH_ITEM_MAX_CHARS = 2000
+# Tokens of the '### Email <index>' line and separator before each batched email
+BATCH_ITEM_HEADER_TOKENS = 8
+
+# Client-side request rate (can be overridden via environment variables)
+OPENAI_REQUESTS_PER_SECOND = float(os.getenv("OPENAI_REQUESTS_PER_SECOND", "5"))
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+# The OpenAI client (and the openai package) are loaded on first use
+_client: Optional[Any] = None
+_client_lock = threading.Lock()
+
+# Strips boilerplate from email content before it is sent to the model
+compactor = PromptCompactor()
+
+
+class LLMError(Exception):
+    """An OpenAI call failed after retries (wraps openai.APIError)."""
+
+    def __init__(self, message: str, retryable: bool = False):
+        """
+        Args:
+            message: Error description.
+            retryable: True if the failure was transient (throttling, 5xx or a
+                connection error), so the same request may succeed on a later run.
+        """
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def get_client() -> Any:
+    """
+    Return the shared OpenAI client, creating it on first use.
+
+    Retries are handled by openai_limiter, so the client's own are disabled.
+
+    Returns:
+        The OpenAI client.
+
+    Raises:
+        ValueError: If OPENAI_API_KEY is not set in the environment or config/.env.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            from dotenv import load_dotenv
+            from openai import OpenAI
+
+            load_dotenv(dotenv_path=ENV_PATH)
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY in your .env file.")
+            _client = OpenAI(api_key=api_key, max_retries=0)
+        return _client
+
+
+def classify_openai_error(error: Exception) -> tuple[Optional[str], Optional[float]]:
+    """
+    Classify an OpenAI call failure for the rate limiter.
+
+    Args:
+        error: The exception raised by the call.
+
+    Returns:
+        Tuple of (failure kind, retry-after seconds). The kind is THROTTLED,
+        SERVER_ERROR, or None for errors that retrying cannot fix.
+    """
+    from openai import APIConnectionError, APIStatusError, RateLimitError
+
+    if isinstance(error, APIConnectionError):  # Includes timeouts
+        return SERVER_ERROR, None
+    if isinstance(error, APIStatusError):
+        retry_after = parse_duration(error.response.headers.get("retry-after"))
+        if isinstance(error, RateLimitError):
+            return THROTTLED, retry_after
+        if error.status_code >= 500:
+            return SERVER_ERROR, retry_after
+    return None, None
+
+
+# Shared by every thread making OpenAI calls
+openai_limiter = AdaptiveRateLimiter("openai", OPENAI_REQUESTS_PER_SECOND, classify_openai_error)
+
+
+def _create_completion(**kwargs: Any) -> Any:
+    """Create a chat completion and feed the quota headers to openai_limiter."""
+    raw = get_client().chat.completions.with_raw_response.create(**kwargs)
+    openai_limiter.observe_quota(
+        _to_float(raw.headers.get("x-ratelimit-remaining-requests")),
+        parse_duration(raw.headers.get("x-ratelimit-reset-requests"))
+    )
+    return raw.parse()
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def get_cache() -> Optional[LLMCache]:
+    """
+    Return the shared LLM response cache, opening it on first use.
+
+    Returns:
+        The LLMCache, or None if caching is disabled.
+    """
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+
+def _complete(system_prompt: str, text: str, json_mode: bool = False) -> str:
+    """
+    Run a rate-limited chat completion, serving repeated requests from the cache.
+
+    Throttling, 5xx and connection errors are retried by openai_limiter.
+
+    Args:
+        system_prompt: The system prompt.
+        text: The user message.
+        json_mode: Request a JSON object response.
+
+    Returns:
+        The stripped response text.
+
+    Raises:
+        LLMError: If the call fails after retries.
+        CircuitOpenError: If the API has been failing persistently.
+    """
+    cache = get_cache()
+    key = cache_key(MODEL, system_prompt, text)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            metrics.increment("llm_cache_hits")
+            return cached
+
+    kwargs: dict[str, Any] = {}
+    if json_mode:
+        kwargs["response_format"] = {"type": "json_object"}
+    from openai import APIError
+
+    metrics.increment("openai_requests")
+    try:
+        with metrics.timer("openai_request"):
+            response = openai_limiter.call(
+                _create_completion,
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": text}
+                ],
+                **kwargs
+            )
+    except APIError as e:
+        kind, _ = classify_openai_error(e)
+        raise LLMError(str(e), retryable=kind is not None) from e
+    content = response.choices[0].message.content.strip()
+    if cache is not None:
+        cache.put(key, content)
+    return content
+
+
+@timed("is_job_application")
 def is_job_application(snippet: str) -> bool:
     """
     Quick check if email is job application-related using snippet.
@@ -43,37 +257,23 @@ def is_job_application(snippet: str) -> bool:
 
     Returns:
         True if the email appears to be job application-related, False otherwise.
+
+    Raises:
+        LLMError: If the call kept being throttled or failing server-side, so
+            the email can be retried on a later run.
     """
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "Determine if this email snippet is related to a job application "
-                        "(e.g., confirmation, rejection, interview). Return 'Yes' or 'No'."
-                    )
-                },
-                {"role": "user", "content": snippet}
-            ]
-        )
-        result = response.choices[0].message.content.strip().lower() == 'yes'
+        result = _complete(JOB_GATE_PROMPT, snippet).lower() == 'yes'
         logger.debug(f"Email snippet classified as job application: {result}")
         return result
-    except APIError as e:
+    except LLMError as e:
+        if e.retryable:
+            raise
         logger.error(f"OpenAI API error in is_job_application: {e}")
         return False
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
-    retry=retry_if_exception_type((RateLimitError, APIConnectionError)),
-    before_sleep=lambda retry_state: logger.warning(
-        f"Retrying API call (attempt {retry_state.attempt_number})..."
-    )
-)
+@timed("classify_email")
 def classify_email(email_content: str) -> str:
     """
     Extract job application details from full email content.
@@ -84,34 +284,13 @@ def classify_email(email_content: str) -> str:
     Returns:
         A formatted string with extracted job details, or "Not Job Application"
         if the email is not job-related.
+
+    Raises:
+        LLMError: If the call fails after retries.
+        ValueError: If the response is malformed.
     """
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an expert at analyzing job application emails. "
-                        "Analyze this email and confirm if it's a job application-related email "
-                        "(e.g., confirmation, rejection, interview invite). "
-                        "If not, return only: 'Not Job Application'. "
-                        "If yes, extract: "
-                        "1. Company name (infer from context if not explicit, else 'Unknown'), "
-                        "2. Job title (infer from context if not explicit, else 'Unknown'), "
-                        "3. Location (if not found, return 'Unknown'), "
-                        "4. Status (e.g., 'Applied', 'Interviewed', 'Offer', 'Declined', or 'Unknown'). "
-                        "Return in this format:\n"
-                        "Company: [company name]\n"
-                        "Job Title: [job title]\n"
-                        "Location: [location]\n"
-                        "Status: [status]\n"
-                    )
-                },
-                {"role": "user", "content": email_content}
-            ]
-        )
-        classification = response.choices[0].message.content.strip()
+        classification = _complete(CLASSIFY_PROMPT, compactor.compact(email_content))
 
         if not classification.startswith("Company:"):
             logger.debug("Email classified as not job application")
@@ -120,9 +299,169 @@ def classify_email(email_content: str) -> str:
         logger.debug(f"Email classified successfully: {classification[:100]}...")
         return classification
 
-    except APIError as e:
-        logger.error(f"OpenAI API error in classify_email: {e}")
-        return "Not Job Application"
     except (IndexError, AttributeError) as e:
-        logger.error(f"Error processing OpenAI response: {e}")
-        return "Not Job Application"
+        raise ValueError(f"Malformed OpenAI response: {e}") from e
+
+
+def validate_extraction(data: Any) -> Optional[dict[str, str]]:
+    """
+    Validate a decoded extraction object against the expected schema.
+
+    Args:
+        data: Decoded JSON object with is_job, company, title, location and status.
+
+    Returns:
+        Dictionary with company, title, location and status, or None if the
+        email is not a job application.
+
+    Raises:
+        ValueError: If the object does not match the schema.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a JSON object")
+    if not isinstance(data.get("is_job"), bool):
+        raise ValueError("'is_job' must be a boolean")
+    if not data["is_job"]:
+        return None
+
+    extraction = {}
+    for field in EXTRACTION_FIELDS:
+        value = data.get(field)
+        if value is None:
+            value = "Unknown"
+        if not isinstance(value, str):
+            raise ValueError(f"'{field}' must be a string")
+        extraction[field] = value.strip() or "Unknown"
+    return extraction
+
+
+def parse_extraction(raw: str) -> Optional[dict[str, str]]:
+    """
+    Parse and validate a structured extraction response.
+
+    Args:
+        raw: JSON text returned for EXTRACT_PROMPT.
+
+    Returns:
+        Dictionary with company, title, location and status, or None if the
+        email is not a job application.
+
+    Raises:
+        ValueError: If the response is not valid JSON or does not match the schema.
+    """
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Response is not valid JSON: {e}") from e
+    return validate_extraction(data)
+
+
+@timed("extract_application")
+def extract_application(email_content: str) -> Optional[dict[str, str]]:
+    """
+    Classify an email and extract its job details in a single JSON-mode call.
+
+    Args:
+        email_content: The full email content including headers and body.
+
+    Returns:
+        Dictionary with company, title, location and status, or None if the
+        model answered that the email is not job-related.
+
+    Raises:
+        LLMError: If the call fails after retries.
+        ValueError: If the response does not match the extraction schema.
+    """
+    try:
+        raw = _complete(EXTRACT_PROMPT, compactor.compact(email_content), json_mode=True)
+    except (IndexError, AttributeError) as e:
+        raise ValueError(f"Malformed OpenAI response: {e}") from e
+
+    extraction = parse_extraction(raw)
+    logger.debug(f"Structured extraction: {extraction}")
+    return extraction
+
+
+def pack_batches(texts: dict[str, str], token_budget: int = BATCH_TOKEN_BUDGET,
+                 max_items: int = BATCH_MAX_ITEMS) -> list[list[str]]:
+    """
+    Greedily group texts into batches that fit a prompt token budget.
+
+    Each email is sized as extract_applications_batch will send it:
+    compacted, then truncated to BATCH_ITEM_MAX_CHARS.
+
+    Args:
+        texts: Mapping of message ID to raw email text.
+        token_budget: Maximum input tokens per batch.
+        max_items: Maximum emails per batch.
+
+    Returns:
+        List of batches of message IDs, in input order. A text larger than the
+        budget gets a batch of its own.
+    """
+    budget = token_budget - count_tokens(BATCH_EXTRACT_PROMPT)
+    batches: list[list[str]] = []
+    current: list[str] = []
+    used = 0
+    for message_id, text in texts.items():
+        cost = count_tokens(compact_email(text)[:BATCH_ITEM_MAX_CHARS]) + BATCH_ITEM_HEADER_TOKENS
+        if current and (used + cost > budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append(message_id)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+@timed("extract_applications_batch")
+def extract_applications_batch(texts: dict[str, str]) -> tuple[dict[str, Optional[dict[str, str]]], list[str]]:
+    """
+    Classify several emails in one JSON-mode call with indexed outputs.
+
+    Each email is compacted and truncated to BATCH_ITEM_MAX_CHARS. Use pack_batches to keep
+    the combined prompt within the token budget.
+
+    Args:
+        texts: Mapping of message ID to email text.
+
+    Returns:
+        Tuple of (extractions, failed_ids). Extractions maps message ID to the
+        extraction dictionary, or None for non-job emails. failed_ids lists
+        messages whose result was missing or invalid and need the
+        single-message path.
+    """
+    message_ids = list(texts)
+    if not message_ids:
+        return {}, []
+    prompt = "\n\n".join(
+        f"### Email {index}\n{compactor.compact(texts[message_id])[:BATCH_ITEM_MAX_CHARS]}"
+        for index, message_id in enumerate(message_ids)
+    )
+
+    try:
+        raw = _complete(BATCH_EXTRACT_PROMPT, prompt, json_mode=True)
+        results = json.loads(raw).get("results", [])
+        if not isinstance(results, list):
+            raise ValueError("'results' must be a list")
+    except LLMError as e:
+        logger.error(f"OpenAI API error in extract_applications_batch: {e}")
+        return {}, message_ids
+    except (ValueError, AttributeError, IndexError) as e:
+        logger.warning(f"Invalid batch response for {len(message_ids)} emails: {e}")
+        return {}, message_ids
+
+    # Anything but an integer index (a list, a string, a bool, none) cannot be matched to an email
+    by_index = {item["index"]: item for item in results
+                if isinstance(item, dict) and type(item.get("index")) is int}
+    extractions: dict[str, Optional[dict[str, str]]] = {}
+    failed: list[str] = []
+    for index, message_id in enumerate(message_ids):
+        try:
+            extractions[message_id] = validate_extraction(by_index[index])
+        except (KeyError, ValueError):
+            failed.append(message_id)
+    if failed:
+        logger.warning(f"{len(failed)} of {len(message_ids)} batched emails need the single-message path")
+    return extractions, failed
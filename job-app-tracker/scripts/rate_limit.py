@@ -0,0 +1,307 @@
+# scripts/rate_limit.py
+"""Adaptive client-side rate limiting, retries and circuit breaking for API calls."""
+
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Retry and breaker defaults (can be overridden via environment variables)
+MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', '5'))
+BACKOFF_BASE_SECONDS = float(os.getenv('API_BACKOFF_BASE_SECONDS', '1.0'))
+BACKOFF_MAX_SECONDS = float(os.getenv('API_BACKOFF_MAX_SECONDS', '60.0'))
+FAILURE_THRESHOLD = int(os.getenv('API_CIRCUIT_FAILURE_THRESHOLD', '8'))
+RESET_TIMEOUT_SECONDS = float(os.getenv('API_CIRCUIT_RESET_SECONDS', '30.0'))
+
+# Failure kinds returned by error classifiers
+THROTTLED = "throttled"
+SERVER_ERROR = "server_error"
+
+# Circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+T = TypeVar("T")
+
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an API whose circuit breaker is open."""
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a duration such as '20ms', '1.5s', '6m0s' or '30' into seconds.
+
+    Args:
+        value: Header value (plain numbers are seconds).
+
+    Returns:
+        Seconds, or None if the value is missing or malformed.
+    """
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token-bucket limiter that adapts its rate to API feedback.
+
+    Shared by every thread calling one API. The rate grows additively after
+    successes and halves on throttling responses (AIMD), and can be capped
+    by quota headers. Retryable failures set a jittered, exponentially
+    growing backoff that pauses all callers, and a run of consecutive
+    failures opens a circuit breaker that fails calls fast until a single
+    probe call succeeds after reset_timeout seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        classify: Callable[[Exception], tuple[Optional[str], Optional[float]]],
+        burst: Optional[float] = None,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE_SECONDS,
+        backoff_max: float = BACKOFF_MAX_SECONDS,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT_SECONDS,
+    ):
+        """
+        Args:
+            name: Label used in logs and metrics.
+            rate: Initial permitted cost units per second.
+            classify: Maps an exception to (failure kind, retry-after seconds);
+                a kind of None means the error is not retryable.
+            burst: Bucket capacity (defaults to one second of the maximum rate).
+            min_rate: Lowest rate the limiter backs off to (defaults to rate / 20).
+            max_rate: Highest rate the limiter recovers to (defaults to rate).
+            max_retries: Retries per call for retryable failures.
+            backoff_base: Backoff after the first failure, in seconds.
+            backoff_max: Cap on a single backoff, in seconds.
+            failure_threshold: Consecutive failures that open the circuit.
+            reset_timeout: Seconds the circuit stays open before a probe call.
+        """
+        self.name = name
+        self.classify = classify
+        self.max_rate = max_rate or rate
+        self.min_rate = min_rate or rate / 20
+        self.rate = rate
+        self.capacity = burst or self.max_rate
+        self.increase = self.max_rate / 50
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._consecutive_failures = 0
+        self._counters = {
+            "calls": 0, "successes": 0, "throttled": 0, "server_errors": 0,
+            "retries": 0, "circuit_opens": 0, "rejected": 0,
+        }
+        self._backoff_total = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _check_circuit(self, now: float) -> None:
+        """Fail fast while open; let exactly one probe through once the timeout passes."""
+        if self._state == CLOSED:
+            return
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        if self._state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+        self._counters["rejected"] += 1
+        raise CircuitOpenError(f"{self.name} circuit is {self._state}")
+
+    def acquire(self, cost: float = 1.0) -> None:
+        """
+        Block until the bucket can pay for a call.
+
+        A call costing more than the bucket capacity waits for a full bucket
+        and leaves it in debt.
+
+        Args:
+            cost: Cost of the call in rate units.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._blocked_until:
+                    self._check_circuit(now)
+                    self._refill(now)
+                    needed = min(cost, self.capacity)
+                    if self._tokens >= needed:
+                        self._tokens -= cost
+                        self._counters["calls"] += 1
+                        return
+                    wait = (needed - self._tokens) / self.rate
+                    if self._state == HALF_OPEN:
+                        self._probe_in_flight = False
+                else:
+                    wait = self._blocked_until - now
+            time.sleep(wait)
+
+    def record_success(self) -> None:
+        """Record a successful call: close the circuit and raise the rate."""
+        with self._lock:
+            self._counters["successes"] += 1
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                logger.info(f"{self.name} circuit closed")
+            self._state = CLOSED
+            self._probe_in_flight = False
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def record_failure(self, kind: str, retry_after: Optional[float] = None) -> float:
+        """
+        Record a retryable failure and pause all callers for a jittered backoff.
+
+        Args:
+            kind: THROTTLED or SERVER_ERROR.
+            retry_after: Server-requested delay in seconds, if any.
+
+        Returns:
+            The backoff delay in seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._consecutive_failures += 1
+            if kind == THROTTLED:
+                self._counters["throttled"] += 1
+                self.rate = max(self.min_rate, self.rate / 2)
+            else:
+                self._counters["server_errors"] += 1
+
+            exponent = min(self._consecutive_failures - 1, 30)
+            delay = min(self.backoff_max, self.backoff_base * 2 ** exponent)
+            delay = random.uniform(delay / 2, delay)
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.backoff_max))
+            self._blocked_until = max(self._blocked_until, now + delay)
+            self._backoff_total += delay
+
+            if self._state == HALF_OPEN or (
+                    self._state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = now
+                self._probe_in_flight = False
+                self._counters["circuit_opens"] += 1
+                logger.warning(f"{self.name} circuit opened after {self._consecutive_failures} "
+                               f"consecutive failures; pausing for {self.reset_timeout:.0f}s")
+        return delay
+
+    def observe_quota(self, remaining: Optional[float], reset_seconds: Optional[float]) -> None:
+        """
+        Cap the rate so the remaining quota lasts until the quota window resets.
+
+        Args:
+            remaining: Requests (or units) left in the current window.
+            reset_seconds: Seconds until the window resets.
+        """
+        if remaining is None or not reset_seconds or reset_seconds <= 0:
+            return
+        sustainable = remaining / reset_seconds
+        with self._lock:
+            if sustainable < self.rate:
+                self.rate = max(self.min_rate, sustainable)
+
+    def call(self, fn: Callable[..., T], *args: Any, cost: float = 1.0, **kwargs: Any) -> T:
+        """
+        Run fn under the limiter, retrying retryable failures with backoff.
+
+        Args:
+            fn: The API call.
+            *args: Positional arguments for fn.
+            cost: Cost of the call in rate units.
+            **kwargs: Keyword arguments for fn.
+
+        Returns:
+            fn's return value.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            Exception: The last error once retries are exhausted, or any
+                non-retryable error immediately.
+        """
+        attempt = 0
+        while True:
+            self.acquire(cost)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                kind, retry_after = self.classify(e)
+                if kind is None:
+                    self.record_success()  # The API answered; the error is the request's
+                    raise
+                delay = self.record_failure(kind, retry_after)
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                with self._lock:
+                    self._counters["retries"] += 1
+                logger.warning(f"{self.name} {kind} ({e}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                continue
+            self.record_success()
+            return result
+
+    def metrics(self) -> dict[str, Any]:
+        """
+        Return the limiter's current rate, backoff and counters.
+
+        Returns:
+            Dictionary with name, rate, tokens, state, consecutive_failures,
+            backoff_remaining, backoff_total and the call counters.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "name": self.name,
+                "rate": round(self.rate, 3),
+                "tokens": round(self._tokens, 3),
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "backoff_remaining": round(max(0.0, self._blocked_until - now), 3),
+                "backoff_total": round(self._backoff_total, 3),
+                **self._counters,
+            }
@@ -0,0 +1,461 @@
+# scripts/record_store.py
+"""Append-only journal storage for job application records."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import Any, Iterable, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+RESULTS_PATH = "data/job_applications.json"
+COMPACT_THRESHOLD = int(os.getenv('RECORD_JOURNAL_COMPACT_AT', '1000'))
+# "none" keeps one JSON export; "month" splits it into data/job_applications/YYYY-MM.json plus a manifest
+RECORD_PARTITION = os.getenv('RECORD_PARTITION', 'none')
+MANIFEST_VERSION = 1
+UNKNOWN_PARTITION = "unknown"
+
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# Fields kept in the journal but left out of the exported JSON
+INTERNAL_FIELDS = ("email_id",)
+
+
+def export_record(record: dict[str, Any]) -> dict[str, Any]:
+    """Return a record without internal fields, as written to the JSON export."""
+    return {k: v for k, v in record.items() if k not in INTERNAL_FIELDS}
+
+
+def export_digest(records: Iterable[dict[str, Any]]) -> str:
+    """Return a SHA-256 of records' exported forms, identifying the content of an export."""
+    digest = hashlib.sha256()
+    for record in records:
+        digest.update(json.dumps(export_record(record), sort_keys=True).encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+
+def partition_key(record: dict[str, Any]) -> str:
+    """Return the 'YYYY-MM' partition of a record, or 'unknown' if its date is not a valid date."""
+    date = record.get("Date") or ""
+    return date[:7] if DATE_PATTERN.match(date) else UNKNOWN_PARTITION
+
+
+def dated_since(record: dict[str, Any], since: str) -> bool:
+    """Return True if a record has a valid date on or after since ('YYYY-MM-DD')."""
+    date = record.get("Date") or ""
+    return bool(DATE_PATTERN.match(date)) and date >= since
+
+
+def partition_dir(filename: str = RESULTS_PATH) -> str:
+    """Return the directory holding the month partitions of a dataset."""
+    return filename[:-len(".json")] if filename.endswith(".json") else filename + ".d"
+
+
+def manifest_path(filename: str = RESULTS_PATH) -> str:
+    """Return the path of the partition manifest of a dataset."""
+    return os.path.join(partition_dir(filename), "manifest.json")
+
+
+def dataset_file(filename: str = RESULTS_PATH) -> str:
+    """
+    Return the file that currently holds a dataset: its JSON export or its partition manifest.
+
+    If both exist (a layout switch was interrupted), the newer one wins.
+    Change detection (stamps and content hashes) should use this file.
+    """
+    manifest = manifest_path(filename)
+    if not os.path.exists(manifest):
+        return filename
+    if os.path.exists(filename) and os.stat(filename).st_mtime_ns > os.stat(manifest).st_mtime_ns:
+        return filename
+    return manifest
+
+
+def read_manifest(filename: str = RESULTS_PATH) -> Optional[dict[str, Any]]:
+    """
+    Read the partition manifest of a dataset.
+
+    Returns:
+        The manifest, or None if the dataset is not partitioned.
+
+    Raises:
+        json.JSONDecodeError: If the manifest is not valid JSON.
+        ValueError: If the manifest version is unsupported.
+    """
+    path = manifest_path(filename)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"unsupported manifest version {manifest.get('version')}")
+    return manifest
+
+
+def read_partitions(filename: str = RESULTS_PATH, keys: Optional[Iterable[str]] = None) -> dict[str, list[dict[str, Any]]]:
+    """
+    Read month partitions listed in the manifest.
+
+    Args:
+        filename: Path of the dataset (its legacy JSON export).
+        keys: Partitions to read (None for all).
+
+    Returns:
+        Records per partition key, each in stored order.
+    """
+    manifest = read_manifest(filename) or {"partitions": {}}
+    wanted = manifest["partitions"].keys() if keys is None else set(keys) & manifest["partitions"].keys()
+    directory = partition_dir(filename)
+    return {key: read_applications(os.path.join(directory, manifest["partitions"][key]["file"]))
+            for key in sorted(wanted)}
+
+
+def _assemble(manifest: dict[str, Any], partitions: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    """Interleave partitions back into the original record order recorded in the manifest."""
+    counts = {key: entry["count"] for key, entry in manifest["partitions"].items()}
+    if any(len(partitions.get(key, [])) != count for key, count in counts.items()):
+        logger.warning("Partition sizes do not match the manifest; returning records in month order")
+        return [r for key in sorted(partitions) for r in partitions[key]]
+    records = []
+    cursors = dict.fromkeys(partitions, 0)
+    for key, run in manifest["order"]:
+        records.extend(partitions[key][cursors[key]:cursors[key] + run])
+        cursors[key] += run
+    return records
+
+
+def read_applications(filename: str = RESULTS_PATH) -> list[dict[str, Any]]:
+    """
+    Read a JSON array of job application records.
+
+    If the dataset has been partitioned by month, the partitions are
+    reassembled into the single-file view, in the original order.
+
+    Args:
+        filename: Path to the JSON file.
+
+    Returns:
+        List of records, or an empty list if the file is missing or empty.
+
+    Raises:
+        json.JSONDecodeError: If the file is not valid JSON.
+    """
+    if dataset_file(filename) != filename:
+        manifest = read_manifest(filename)
+        return _assemble(manifest, read_partitions(filename))
+    if not os.path.exists(filename):
+        return []
+    with open(filename, "r") as f:
+        content = f.read().strip()
+    return json.loads(content) if content else []
+
+
+def read_window(filename: str, since: str) -> list[dict[str, Any]]:
+    """
+    Read the records dated on or after a day, touching only the partitions that can hold them.
+
+    Args:
+        filename: Path of the dataset (its legacy JSON export).
+        since: First day to include, as 'YYYY-MM-DD'.
+
+    Returns:
+        Matching records, oldest partition first, in stored order within a partition.
+    """
+    if dataset_file(filename) != filename:
+        manifest = read_manifest(filename)
+        keys = [key for key in manifest["partitions"] if key != UNKNOWN_PARTITION and key >= since[:7]]
+        records = [r for rows in read_partitions(filename, keys).values() for r in rows]
+    else:
+        records = read_applications(filename)
+    return [r for r in records if dated_since(r, since)]
+
+
+def write_applications(records: Iterable[dict[str, Any]], filename: str = RESULTS_PATH) -> int:
+    """
+    Atomically write records as the pretty-printed JSON export.
+
+    The data is written to a temporary file in the same directory, synced
+    and renamed over the target, so readers never see a partial file.
+
+    Args:
+        records: Records to write (internal fields are dropped).
+        filename: Path to the JSON file.
+
+    Returns:
+        Number of records written.
+    """
+    directory = os.path.dirname(filename) or "."
+    os.makedirs(directory, exist_ok=True)
+    exported = [export_record(r) for r in records]
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(exported, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(exported)
+
+
+def _write_text(path: str, text: str) -> str:
+    """Write text to a synced temporary file next to path and return its name."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp_path
+
+
+def write_partitions(records: Iterable[dict[str, Any]], filename: str = RESULTS_PATH) -> int:
+    """
+    Write records as month partitions, rewriting only the partitions whose content changed.
+
+    Each partition is pretty-printed like the single-file export. The
+    manifest keeps per-partition counts and SHA-256 hashes, plus the
+    original record order as runs of (partition, count), so the single-file
+    view can be reassembled exactly. Changed partitions are staged in
+    temporary files and renamed into place just before the manifest.
+
+    Args:
+        records: Records to write (internal fields are dropped).
+        filename: Path of the dataset (its legacy JSON export).
+
+    Returns:
+        Number of partitions rewritten.
+    """
+    directory = partition_dir(filename)
+    os.makedirs(directory, exist_ok=True)
+    try:
+        previous = (read_manifest(filename) or {}).get("partitions", {})
+    except (json.JSONDecodeError, ValueError):
+        previous = {}
+
+    partitions: dict[str, list[dict[str, Any]]] = {}
+    order: list[list[Any]] = []
+    for record in records:
+        key = partition_key(record)
+        partitions.setdefault(key, []).append(export_record(record))
+        if order and order[-1][0] == key:
+            order[-1][1] += 1
+        else:
+            order.append([key, 1])
+
+    entries = {}
+    staged = []
+    try:
+        for key, rows in sorted(partitions.items()):
+            text = json.dumps(rows, indent=4)
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            entries[key] = {"file": f"{key}.json", "count": len(rows), "sha256": digest}
+            path = os.path.join(directory, entries[key]["file"])
+            if previous.get(key, {}).get("sha256") == digest and os.path.exists(path):
+                continue
+            staged.append((_write_text(path, text), path))
+        manifest = {"version": MANIFEST_VERSION, "count": sum(len(rows) for rows in partitions.values()),
+                    "order": order, "partitions": entries}
+        staged.append((_write_text(manifest_path(filename), json.dumps(manifest, indent=2)), manifest_path(filename)))
+    except BaseException:
+        for tmp_path, _ in staged:
+            os.remove(tmp_path)
+        raise
+
+    for tmp_path, path in staged:
+        os.replace(tmp_path, path)
+    for key in set(previous) - set(entries):
+        stale = os.path.join(directory, previous[key]["file"])
+        if os.path.exists(stale):
+            os.remove(stale)
+    return len(staged) - 1
+
+
+def remove_partitions(filename: str = RESULTS_PATH) -> None:
+    """Delete the manifest and month partitions of a dataset, if any."""
+    try:
+        manifest = read_manifest(filename)
+    except (json.JSONDecodeError, ValueError):
+        manifest = None
+    if manifest is None:
+        return
+    os.remove(manifest_path(filename))
+    for entry in manifest["partitions"].values():
+        path = os.path.join(partition_dir(filename), entry["file"])
+        if os.path.exists(path):
+            os.remove(path)
+    if not os.listdir(partition_dir(filename)):
+        os.rmdir(partition_dir(filename))
+
+
+class RecordStore:
+    """
+    JSON export plus an append-only JSONL journal of newer records.
+
+    Checkpoints append only the records added since the last save, so their
+    cost is proportional to the new records. The journal is folded into the
+    JSON export by compact(), at the end of a run or once it grows past
+    compact_threshold records. With partition='month' the export is a set
+    of month partitions plus a manifest, and compaction rewrites only the
+    months whose records changed; reads work with either layout.
+    """
+
+    def __init__(self, path: str = RESULTS_PATH, compact_threshold: int = COMPACT_THRESHOLD,
+                 partition: str = RECORD_PARTITION):
+        self.path = path
+        self.partition = partition
+        base = path[:-len(".json")] if path.endswith(".json") else path
+        self.journal_path = base + ".journal.jsonl"
+        self.marker_path = base + ".compacting"
+        self.compact_threshold = compact_threshold
+        self.count = 0
+        self.journal_count = 0
+
+    def load(self) -> list[dict[str, Any]]:
+        """
+        Load the JSON export and replay the journal on top of it.
+
+        Finishes an interrupted compaction first, so a crash between writing
+        the export and truncating the journal cannot duplicate records.
+
+        Returns:
+            All stored records, oldest first.
+        """
+        records = read_applications(self.path)
+        if os.path.exists(self.marker_path):
+            if self._journal_folded(records):
+                logger.info("Completing interrupted compaction")
+                self._truncate_journal()
+            os.remove(self.marker_path)
+
+        journal = self._read_journal()
+        self.count = len(records) + len(journal)
+        self.journal_count = len(journal)
+        return records + journal
+
+    def read(self) -> list[dict[str, Any]]:
+        """
+        Return the same records as load() without modifying any file.
+
+        An interrupted compaction is left for the next load(): if it already
+        wrote the journaled records to the export, the journal is ignored.
+        For read-only consumers such as analytics.
+
+        Returns:
+            All stored records, oldest first.
+        """
+        records = read_applications(self.path)
+        if self._journal_folded(records):
+            return records
+        return records + self._read_journal()
+
+    def load_since(self, since: str) -> list[dict[str, Any]]:
+        """
+        Load only the records dated on or after a day, including journaled ones.
+
+        With month partitions, only the partitions from that month on are
+        read. Records with unknown dates are left out.
+
+        Like read(), this never modifies any file.
+
+        Args:
+            since: First day to include, as 'YYYY-MM-DD'.
+
+        Returns:
+            Matching records; stored records first, then journaled ones.
+        """
+        if os.path.exists(self.marker_path):
+            # An interrupted compaction must be resolved against the full dataset
+            return [r for r in self.read() if dated_since(r, since)]
+        return read_window(self.path, since) + [r for r in self._read_journal() if dated_since(r, since)]
+
+    def _journal_folded(self, records: list[dict[str, Any]]) -> bool:
+        """
+        Return True if an interrupted compaction already wrote these records as the export.
+
+        The marker names the export by content rather than record count: a
+        compaction that removed as many records as the journal held leaves
+        the count unchanged, and the journal must then be kept.
+        """
+        if not os.path.exists(self.marker_path):
+            return False
+        try:
+            with open(self.marker_path, "r") as f:
+                expected = json.load(f)
+            return len(records) == expected["count"] and export_digest(records) == expected["sha256"]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable compaction marker {self.marker_path}: {e}")
+            return False
+
+    def _read_journal(self) -> list[dict[str, Any]]:
+        """Read journal records, ignoring a torn final line from a crash."""
+        if not os.path.exists(self.journal_path):
+            return []
+        records = []
+        with open(self.journal_path, "r") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt journal line {line_number} in {self.journal_path}")
+        return records
+
+    def append(self, records: list[dict[str, Any]]) -> None:
+        """
+        Durably append new records to the journal.
+
+        Args:
+            records: Records added since the last save.
+        """
+        if not records:
+            return
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        with open(self.journal_path, "a") as f:
+            f.write("".join(json.dumps(r) + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+        self.count += len(records)
+        self.journal_count += len(records)
+
+    def should_compact(self) -> bool:
+        """Return True once the journal has grown past the compaction threshold."""
+        return self.journal_count >= self.compact_threshold
+
+    def compact(self, records: list[dict[str, Any]]) -> None:
+        """
+        Rewrite the JSON export from all records and empty the journal.
+
+        Args:
+            records: Every stored record (as returned by load() plus appends).
+        """
+        os.makedirs(os.path.dirname(self.marker_path) or ".", exist_ok=True)
+        with open(self.marker_path, "w") as f:
+            json.dump({"count": len(records), "sha256": export_digest(records)}, f)
+        if self.partition == "month":
+            rewritten = write_partitions(records, self.path)
+            logger.info(f"Rewrote {rewritten} month partitions of {self.path}")
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        else:
+            write_applications(records, self.path)
+            remove_partitions(self.path)
+        self._truncate_journal()
+        os.remove(self.marker_path)
+        self.count = len(records)
+        self.journal_count = 0
+
+    def _truncate_journal(self) -> None:
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
@@ -0,0 +1,100 @@
+# tests/test_analytics.py
+"""Unit tests for scripts/analytics.py functionality."""
+
+import json
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.analytics import ApplicationFrame, load_frame
+from scripts.record_store import RecordStore
+
+
+def record(company, status, date, title="Analyst"):
+    return {"Company": company, "Job Title": title, "Location": "NYC", "status": status, "Date": date}
+
+
+RECORDS = [
+    record("Acme Inc.", "Applied", "2025-03-03"),
+    record("acme", "Interviewed", "2025-03-10"),
+    record("Acme", "Offer", "2025-03-20"),
+    record("Beta", "Applied", "2025-03-05"),
+    record("Beta", "Declined", "2025-04-04"),
+    record("Gamma", "Applied", "2025-03-12"),
+    record("Delta", "Declined", "Unknown"),
+    record("Gamma", "", "2025-03-13", title="Engineer"),
+]
+
+
+class TestQueries:
+    """Tests for the vectorized queries."""
+
+    def test_counts(self):
+        """Test status, month and company counts, with companies matched after normalization."""
+        frame = ApplicationFrame.from_records(RECORDS)
+        assert frame.status_counts() == {"Applied": 3, "Interviewed": 1, "Offer": 1, "Declined": 2}
+        assert frame.month_counts() == {
+            "2025-03": {"Applied": 3, "Interviewed": 1, "Offer": 1, "Declined": 0},
+            "2025-04": {"Applied": 0, "Interviewed": 0, "Offer": 0, "Declined": 1},
+        }
+        assert frame.company_counts(limit=2) == [("Acme Inc.", 3), ("Beta", 2)]
+
+    def test_application_metrics(self):
+        """Test response rate, time to decision and the weekly funnel per application."""
+        frame = ApplicationFrame.from_records(RECORDS)
+        assert frame.application_count == 5
+        assert frame.response_rate() == pytest.approx(3 / 5)
+        assert frame.time_to_decision() == {"count": 2, "mean": 23.5, "median": 23.5, "p90": 28.7}
+        assert frame.weekly_funnel() == [
+            {"week": "2025-03-03", "applied": 2, "interviewed": 1, "offer": 1, "declined": 1},
+            {"week": "2025-03-10", "applied": 2, "interviewed": 0, "offer": 0, "declined": 0},
+        ]
+
+    def test_empty_dataset(self):
+        """Test that queries on no records return empty results."""
+        summary = ApplicationFrame.from_records([]).summary()
+        assert summary["records"] == 0
+        assert summary["month_counts"] == {} and summary["weekly_funnel"] == []
+        assert summary["response_rate"] == 0.0
+
+
+class TestCache:
+    """Tests for the column cache."""
+
+    def test_rebuilt_only_when_source_changes(self, tmp_path, monkeypatch):
+        """Test that an unchanged dataset is served from the cache and a changed one is re-read."""
+        path = str(tmp_path / "job_applications.json")
+        cache_path = str(tmp_path / "cache" / "analytics.npz")
+        with open(path, "w") as f:
+            json.dump(RECORDS, f)
+        assert load_frame(path, cache_path).summary() == ApplicationFrame.from_records(RECORDS).summary()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("cache should have been used")
+        monkeypatch.setattr(ApplicationFrame, "from_records", fail)
+        assert len(load_frame(path, cache_path)) == len(RECORDS)
+        monkeypatch.undo()
+
+        with open(path, "w") as f:
+            json.dump(RECORDS + [record("Epsilon", "Applied", "2025-05-01")], f)
+        assert load_frame(path, cache_path).status_counts()["Applied"] == 4
+
+    def test_does_not_modify_the_dataset(self, tmp_path):
+        """Test that building the columns leaves an interrupted compaction for the pipeline to finish."""
+        path = str(tmp_path / "job_applications.json")
+        store = RecordStore(path)
+        store.append(RECORDS[-1:])
+        # Crash after the export was written but before the journal was removed
+        with patch.object(store, "_truncate_journal", side_effect=OSError("crash")), pytest.raises(OSError):
+            store.compact(RECORDS)
+
+        assert len(load_frame(path, str(tmp_path / "analytics.npz"))) == len(RECORDS)
+        assert os.path.exists(store.marker_path) and os.path.exists(store.journal_path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
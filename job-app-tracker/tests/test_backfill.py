@@ -0,0 +1,173 @@
+"""Tests for the Batch API backfill flow using the local stand-in transport."""
+
+import json
+import pytest
+import sys
+import os
+from contextlib import ExitStack, contextmanager
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backfill
+from scripts.batch_api import LocalBatchTransport, parse_results, write_requests
+from scripts.gmail_fetch import GmailAccount
+from scripts.lifecycle import ApplicationLifecycle
+
+
+INBOX = {
+    "m1": {"from": "Acme <no-reply@greenhouse.io>", "subject": "Thanks for applying", "snippet": "",
+           "content": "Thanks for applying to Acme for the Analyst role", "date": "2025-02-01"},
+    "m2": {"from": "Shop <orders@shop.com>", "subject": "Your receipt", "snippet": "",
+           "content": "receipt", "date": "2025-02-02"},
+    "m3": {"from": "Friend <pal@example.com>", "subject": "Dinner?", "snippet": "",
+           "content": "dinner on friday?", "date": "2025-02-03"},
+    "m4": {"from": "Beta <jobs@beta.com>", "subject": "Re: application", "snippet": "",
+           "content": "garbled", "date": "2025-02-04"},
+}
+
+
+def responder(body):
+    """Fake model: answers by looking at the email text."""
+    content = body["messages"][-1]["content"]
+    if "Acme" in content:
+        return json.dumps({"is_job": True, "company": "Acme", "title": "Analyst",
+                           "location": "Remote", "status": "Applied"})
+    if "garbled" in content:
+        return "not json"
+    return json.dumps({"is_job": False})
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    with open("data/job_applications.json", "w") as f:
+        json.dump([], f)
+    with open("data/processed_ids.json", "w") as f:
+        json.dump(["m0"], f)
+    return tmp_path
+
+
+# Message IDs in each account's mailbox; a session is identified by its token path
+MAILBOXES = {"personal/token.json": ["m0", "m1", "m2"], "school/token.json": ["m3", "m4"]}
+ACCOUNTS = [GmailAccount("personal", "personal/token.json", "personal/creds.json"),
+            GmailAccount("school", "school/token.json", "school/creds.json")]
+
+
+@contextmanager
+def fake_gmail():
+    metadata = {m: {k: v for k, v in e.items() if k in ("from", "subject", "snippet")} for m, e in INBOX.items()}
+    contents = {m: {"content": e["content"], "date": e["date"]} for m, e in INBOX.items()}
+
+    def owned(ids, session):
+        return [m for m in ids if m in MAILBOXES[session]]
+
+    with ExitStack() as stack:
+        for name, kwargs in {
+            "discover_accounts": dict(return_value=ACCOUNTS),
+            "GmailSession": dict(side_effect=lambda token_path, creds_path, name: token_path),
+            "fetch_emails": dict(side_effect=lambda since_hours, session: [{"id": m} for m in MAILBOXES[session]]),
+            "get_email_metadata": dict(side_effect=lambda ids, session: {m: metadata[m] for m in owned(ids, session)}),
+            "get_email_contents": dict(side_effect=lambda ids, session: {m: contents[m] for m in owned(ids, session)}),
+        }.items():
+            stack.enter_context(patch.object(backfill, name, **kwargs))
+        yield
+
+
+class TestBackfill:
+    """End-to-end tests of run_backfill against LocalBatchTransport."""
+
+    def test_full_flow(self, workdir):
+        """Test collect -> submit -> poll -> merge with the local transport."""
+        transport = LocalBatchTransport(responder, polls_until_complete=3)
+        with fake_gmail():
+            added = backfill.run_backfill(transport, poll_interval=0)
+
+        assert added == 1
+        with open("data/job_applications.json") as f:
+            records = json.load(f)
+        # Records name the account they were backfilled from and carry their application ID, like the hourly run's
+        lifecycle = ApplicationLifecycle.load()
+        assert records == [{"Company": "Acme", "Job Title": "Analyst", "Location": "Remote",
+                            "status": "Applied", "Date": "2025-02-01", "Account": "personal",
+                            "Application ID": next(iter(lifecycle.applications))}]
+        processed = backfill.main.load_processed_ids()
+        # m2 rejected locally, m3 classified not-job; m4 failed and is left for a later run
+        assert [m in processed for m in ["m0", "m1", "m2", "m3", "m4"]] == [True, True, True, True, False]
+        assert not os.path.exists(backfill.STATE_PATH)
+
+        with open(backfill.REQUESTS_PATH) as f:
+            requested = [json.loads(line)["custom_id"] for line in f]
+        assert requested == ["m1", "m3", "m4"]
+
+    def test_resume_pending_batch(self, workdir):
+        """Test that a saved batch is resumed instead of re-submitted."""
+        transport = LocalBatchTransport(responder)
+        with fake_gmail():
+            emails, rejected = backfill.collect_emails()
+            backfill.submit(transport, emails, rejected)
+
+        with patch.object(backfill, "collect_emails") as collect:
+            added = backfill.run_backfill(transport, poll_interval=0)
+        collect.assert_not_called()
+        assert added == 1
+
+    def test_accounts_share_the_limit(self, workdir):
+        """Test that every account is read with its own session until the limit is reached."""
+        with fake_gmail():
+            emails, rejected = backfill.collect_emails()
+            assert {m: e["account"] for m, e in emails.items()} == {"m1": "personal", "m3": "school", "m4": "school"}
+            emails, rejected = backfill.collect_emails(limit=2)
+        assert (list(emails), rejected) == (["m1"], ["m2"])
+
+    def test_merge_updates_existing_lifecycle(self, workdir):
+        """Test that merged records reach lifecycle history even after it was first built."""
+        applied = {"company": "Acme", "title": "Analyst", "location": "Remote", "status": "Applied"}
+        backfill.merge_results({"m1": applied}, [], {"m1": "2025-02-01"}, [])
+        backfill.merge_results({"m2": dict(applied, status="Interviewed")}, [], {"m2": "2025-02-10"}, [])
+
+        lifecycle = ApplicationLifecycle.load()
+        assert len(lifecycle.applications) == 1
+        assert lifecycle.transition_counts() == {("Applied", "Interviewed"): 1}
+
+    def test_merge_is_idempotent(self, workdir):
+        """Test that merging the same results twice adds no duplicates."""
+        extraction = {"company": "Acme", "title": "Analyst", "location": "Remote", "status": "Applied"}
+        assert backfill.merge_results({"m1": extraction}, [], {"m1": "2025-02-01"}, []) == 1
+        assert backfill.merge_results({"m1": extraction}, [], {"m1": "2025-02-01"}, []) == 0
+
+
+class TestWriteRequests:
+    """Tests for the write_requests function."""
+
+    def test_contents_are_compacted(self, tmp_path):
+        """Test that requests carry compacted content, not the raw email."""
+        content = "From: jobs@acme.com\nSubject: Interview\n\nSee you Monday.\n\n"
+        path = str(tmp_path / "requests.jsonl")
+        write_requests({"m1": content + "> quoted\n" * 200}, path)
+        with open(path) as f:
+            request = json.loads(f.readline())
+        assert request["body"]["messages"][-1]["content"] == "From: jobs@acme.com\nSubject: Interview\n\nSee you Monday."
+
+
+class TestParseResults:
+    """Tests for the parse_results function."""
+
+    def test_error_lines_fail(self):
+        """Test that API errors in the output file are reported as failures."""
+        output = json.dumps({"custom_id": "a", "response": {"status_code": 500, "body": {}}, "error": None})
+        assert parse_results(output) == ({}, ["a"])
+
+    def test_corrupt_lines_skipped(self):
+        """Test that a truncated or non-object line is skipped without losing the other results."""
+        content = json.dumps({"is_job": False})
+        good = json.dumps({"custom_id": "b", "error": None, "response": {
+            "status_code": 200, "body": {"choices": [{"message": {"content": content}}]}}})
+        output = "\n".join(['{"custom_id": "a", "respo', "[1]", good])
+        assert parse_results(output) == ({"b": None}, [])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
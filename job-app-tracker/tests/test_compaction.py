@@ -0,0 +1,100 @@
+# tests/test_compaction.py
+"""Unit tests for scripts/compaction.py functionality."""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.compaction import PromptCompactor, compact_email, count_tokens, strip_boilerplate
+
+
+class TestStripBoilerplate:
+    """Tests for boilerplate removal."""
+
+    def test_drops_quoted_reply(self):
+        """Test that the quoted thread after an attribution line is removed."""
+        body = ("Thanks, we'd like to schedule an interview.\n\n"
+                "On Mon, Mar 3, 2025 at 9:00 AM Jane <jane@example.com> wrote:\n"
+                "> I applied for the Analyst role.\n> Best, Jane")
+        assert strip_boilerplate(body) == "Thanks, we'd like to schedule an interview."
+
+    def test_drops_quoted_lines_and_signature(self):
+        """Test that '>' lines and everything after the signature delimiter go."""
+        body = "Your application was received.\n> earlier text\n\n-- \nAcme Recruiting\n555-0100"
+        assert strip_boilerplate(body) == "Your application was received."
+
+    def test_drops_footer_paragraphs(self):
+        """Test that unsubscribe and legal paragraphs are removed but content stays."""
+        body = ("Unfortunately we will not be moving forward.\n\n"
+                "You received this email because you applied on our careers site. "
+                "Unsubscribe | Privacy Policy\n\n"
+                "© 2025 Acme Inc. All rights reserved.")
+        assert strip_boilerplate(body) == "Unfortunately we will not be moving forward."
+
+    def test_footer_sharing_a_paragraph_with_content(self):
+        """Test that a footer run into the message is cut without losing the message."""
+        body = ("Hi Sam,\nThank you for applying for the Data Analyst role at Acme Corp. "
+                "Unfortunately we will not be moving forward.\nAcme Corp | Privacy Policy | Unsubscribe")
+        assert strip_boilerplate(body) == ("Hi Sam,\nThank you for applying for the Data Analyst role at Acme Corp. "
+                                           "Unfortunately we will not be moving forward.\nAcme Corp")
+        invite = "We'd like to invite you to interview for the Analyst role on Monday. (c) 2025 Acme Inc."
+        assert strip_boilerplate(invite) == "We'd like to invite you to interview for the Analyst role on Monday."
+
+    def test_only_content_line_kept(self):
+        """Test that a body consisting of one footer-like line is never emptied."""
+        body = "Do not reply to this email. Your interview with Acme is on Monday."
+        assert strip_boilerplate(body) == body
+
+    def test_footer_text_mid_message_kept(self):
+        """Test that footer phrases before the end of the body are left alone."""
+        body = "Please review our privacy policy.\n\nYour interview is on Monday at 10am."
+        assert strip_boilerplate(body) == body
+
+    def test_shortens_tracking_urls_and_whitespace(self):
+        """Test that URLs collapse to their host and whitespace is normalized."""
+        body = ("View   your application:\u200b "
+                "https://click.greenhouse.io/ls/click?upn=abc123&utm_source=email\n\n\n\nThanks")
+        assert strip_boilerplate(body) == "View your application: <click.greenhouse.io>\n\nThanks"
+
+
+class TestCompactEmail:
+    """Tests for full-content compaction."""
+
+    def test_headers_kept(self):
+        """Test that the From/Subject block is preserved."""
+        content = "From: jobs@acme.com\nSubject: Application\n\nHello\n\n-- \nSignature"
+        assert compact_email(content) == "From: jobs@acme.com\nSubject: Application\n\nHello"
+
+    def test_footer_in_single_paragraph_body(self):
+        """Test that a one-paragraph body with a trailing footer keeps its content."""
+        content = ("From: jobs@acme.com\nSubject: Your application\n\nThank you for applying for the Data Analyst "
+                   "role at Acme Corp.\nAcme Corp | Privacy Policy | Unsubscribe")
+        assert compact_email(content) == ("From: jobs@acme.com\nSubject: Your application\n\nThank you for applying "
+                                          "for the Data Analyst role at Acme Corp.\nAcme Corp")
+
+    def test_token_budget(self):
+        """Test that compacted text fits the token budget."""
+        content = "From: a\nSubject: b\n\n" + "word " * 5000
+        assert count_tokens(compact_email(content, token_budget=100)) <= 100
+
+
+class TestPromptCompactor:
+    """Tests for token savings accounting."""
+
+    def test_stats(self):
+        """Test that tokens before and after compaction are tracked."""
+        compactor = PromptCompactor(token_budget=1000)
+        content = "From: a\nSubject: b\n\nShort body.\n\nTo unsubscribe click here. " + "x" * 400
+        compacted = compactor.compact(content)
+        stats = compactor.stats()
+        assert stats["emails"] == 1
+        assert stats["tokens_before"] == count_tokens(content)
+        assert stats["tokens_after"] == count_tokens(compacted)
+        assert stats["tokens_saved"] > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
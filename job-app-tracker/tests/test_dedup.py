@@ -0,0 +1,216 @@
+# tests/test_dedup.py
+"""Unit tests for scripts/dedup.py and clean_duplicates.py functionality."""
+
+import json
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clean_duplicates import clean_duplicates
+import scripts.dedup as dedup
+from scripts.dedup import DedupIndex
+from scripts.record_store import RecordStore, write_applications
+
+
+def record(company, status, title="Analyst", location="NYC", date="2025-03-01"):
+    return {"Company": company, "Job Title": title, "Location": location, "status": status, "Date": date}
+
+
+def clean(applications, index=None):
+    index = index or DedupIndex()
+    if not index.matches(applications):
+        index = DedupIndex()
+    removals = index.update(applications)
+    return index.apply_removals(applications, removals), index
+
+
+class TestGrouping:
+    """Tests for grouping records by resolved application."""
+
+    def test_near_duplicates_grouped(self):
+        """Test that formatting and small title differences map to the same group."""
+        apps = [record("UniUni Logistics Inc.", "Applied", title="Operation Assistant"),
+                record("uniuni  logistics", "Declined", title="Operations Assistant"),
+                record("Acme", "Applied", title="Analyst"), record("Acme", "Declined", title="Engineer")]
+        cleaned, _ = clean(apps)
+        assert [(a["Company"], a["status"]) for a in cleaned] == [
+            ("uniuni  logistics", "Declined"), ("Acme", "Applied"), ("Acme", "Declined")
+        ]
+
+
+class TestDedupRules:
+    """Tests for the duplicate rules."""
+
+    def test_declined_removes_applied(self):
+        """Test that Applied records are dropped once a Declined record exists, in either order."""
+        apps = [record("Acme", "Applied"), record("Beta", "Declined"), record("Acme", "Declined"),
+                record("Beta", "Applied"), record("Gamma", "Applied")]
+        cleaned, _ = clean(apps)
+        assert [(a["Company"], a["status"]) for a in cleaned] == [
+            ("Beta", "Declined"), ("Acme", "Declined"), ("Gamma", "Applied")
+        ]
+
+    def test_keeps_most_complete_interview(self):
+        """Test that the Interviewed record with the fewest Unknown fields is kept."""
+        apps = [record("Acme", "Interviewed", location="Unknown"), record("Acme", "Interviewed"),
+                record("Acme", "Interviewed", date="2025-04-01")]
+        cleaned, _ = clean(apps)
+        assert cleaned == [record("Acme", "Interviewed")]
+
+    def test_incremental_matches_full_clean(self):
+        """Test that cleaning in two runs gives the same result as one full clean."""
+        first = [record("Acme", "Applied"), record("Beta", "Interviewed", location="Unknown"),
+                 record("Gamma", "Applied")]
+        second = [record("Beta", "Interviewed"), record("Acme", "Declined"), record("Gamma", "Offer")]
+
+        full, _ = clean(first + second)
+        partial, index = clean(first)
+        incremental, _ = clean(partial + second, index)
+        assert incremental == full
+
+    def test_untouched_index_removes_nothing(self):
+        """Test that a rerun without new records finds no duplicates."""
+        cleaned, index = clean([record("Acme", "Applied"), record("Acme", "Declined")])
+        assert index.update(cleaned) == set()
+
+
+class TestCleanDuplicates:
+    """Tests for the clean_duplicates entry point."""
+
+    def test_persists_index_and_skips_unchanged_file(self, tmp_path, capsys):
+        """Test that the file is rewritten only when duplicates are removed."""
+        path = str(tmp_path / "job_applications.json")
+        index_path = str(tmp_path / "dedup_index.json")
+        with open(path, "w") as f:
+            json.dump([record("Acme", "Applied"), record("Acme", "Declined")], f)
+
+        clean_duplicates(path, index_path)
+        with open(path) as f:
+            assert json.load(f) == [record("Acme", "Declined")]
+        assert DedupIndex.load(index_path).count == 1
+
+        mtime = os.stat(path).st_mtime_ns
+        clean_duplicates(path, index_path)
+        assert os.stat(path).st_mtime_ns == mtime
+        assert "No new records" in capsys.readouterr().out
+
+    def test_folds_in_journal(self, tmp_path):
+        """Test that journaled records from an interrupted run are cleaned too."""
+        path = str(tmp_path / "job_applications.json")
+        store = RecordStore(path)
+        store.compact([record("Acme", "Applied")])
+        store.append([dict(record("Acme", "Declined"), email_id="m1")])
+
+        clean_duplicates(path, str(tmp_path / "dedup_index.json"))
+        assert RecordStore(path).load() == [record("Acme", "Declined")]
+        assert not os.path.exists(store.journal_path)
+
+    def test_unchanged_content_skips_after_checkout(self, tmp_path, capsys):
+        """Test that a new mtime alone, as after a fresh checkout, does not force a clean."""
+        path = str(tmp_path / "job_applications.json")
+        index_path = str(tmp_path / "dedup_index.json")
+        with open(path, "w") as f:
+            json.dump([record("Acme", "Declined")], f)
+        clean_duplicates(path, index_path)
+
+        os.utime(path, ns=(0, 0))
+        clean_duplicates(path, index_path)
+        assert "No new records" in capsys.readouterr().out
+
+    def test_rebuilds_after_edit_in_the_middle(self, tmp_path):
+        """Test that editing an earlier record is detected even if the last record is untouched."""
+        path = str(tmp_path / "job_applications.json")
+        index_path = str(tmp_path / "dedup_index.json")
+        with open(path, "w") as f:
+            json.dump([record("Acme", "Applied"), record("Beta", "Declined"), record("Gamma", "Offer")], f)
+        clean_duplicates(path, index_path)
+
+        with open(path, "w") as f:
+            json.dump([record("Beta", "Applied"), record("Beta", "Declined"), record("Gamma", "Offer")], f)
+        clean_duplicates(path, index_path)
+        with open(path) as f:
+            assert json.load(f) == [record("Beta", "Declined"), record("Gamma", "Offer")]
+
+    def test_appended_records_skip_the_full_check(self, tmp_path):
+        """Test that a pipeline run that only appended records is cleaned without re-checking the rest."""
+        path = str(tmp_path / "job_applications.json")
+        index_path = str(tmp_path / "dedup_index.json")
+        write_applications([record("Acme", "Applied"), record("Beta", "Offer")], path)
+        clean_duplicates(path, index_path)
+
+        store = RecordStore(path)
+        records = store.load() + [record("Acme", "Declined")]
+        store.compact(records)
+        with patch.object(DedupIndex, "matches", side_effect=AssertionError("full check")):
+            clean_duplicates(path, index_path)
+        assert RecordStore(path).load() == [record("Beta", "Offer"), record("Acme", "Declined")]
+
+    def test_appended_month_partitions_skip_the_full_check(self, tmp_path):
+        """Test that records appended to a partitioned dataset are recognized from the manifest."""
+        path = str(tmp_path / "job_applications.json")
+        index_path = str(tmp_path / "dedup_index.json")
+        RecordStore(path, partition="month").compact(
+            [record("Acme", "Applied"), record("Beta", "Offer", date="2025-04-02")])
+        clean_duplicates(path, index_path)
+
+        store = RecordStore(path, partition="month")
+        records = store.load() + [record("Acme", "Declined", date="2025-04-05"), record("Gamma", "Offer")]
+        store.compact(records)
+        with patch.object(DedupIndex, "matches", side_effect=AssertionError("full check")):
+            clean_duplicates(path, index_path)
+        assert RecordStore(path).load() == [
+            record("Beta", "Offer", date="2025-04-02"), record("Acme", "Declined", date="2025-04-05"),
+            record("Gamma", "Offer")
+        ]
+
+        # An edit inside a partition that also gained records is still caught
+        store = RecordStore(path, partition="month")
+        records = store.load()
+        records[0] = record("Delta", "Offer", date="2025-04-02")
+        store.compact(records + [record("Delta", "Offer", date="2025-04-09")])
+        index = DedupIndex.load(index_path)
+        assert not index.only_appended(os.path.join(str(tmp_path), "job_applications", "manifest.json"))
+
+    def test_edit_with_appended_records_rebuilds(self, tmp_path):
+        """Test that an edited record is still caught when records were appended too."""
+        path = str(tmp_path / "job_applications.json")
+        index_path = str(tmp_path / "dedup_index.json")
+        write_applications([record("Acme", "Applied"), record("Gamma", "Offer")], path)
+        clean_duplicates(path, index_path)
+
+        write_applications([record("Beta", "Applied"), record("Gamma", "Offer"), record("Beta", "Declined")], path)
+        clean_duplicates(path, index_path)
+        assert RecordStore(path).load() == [record("Gamma", "Offer"), record("Beta", "Declined")]
+
+    def test_only_new_records_hashed(self):
+        """Test that updates and removals hash only the records added since the last update."""
+        apps = [record("Acme", "Applied"), record("Beta", "Offer"), record("Acme", "Declined")]
+        index = DedupIndex()
+        index.update(apps[:2])
+        with patch.object(dedup, "record_hash", wraps=dedup.record_hash) as hashed:
+            removals = index.update(apps)
+            cleaned = index.apply_removals(apps, removals)
+        assert hashed.call_count == 1
+        assert index.matches(cleaned) and index.hashes == [dedup.record_hash(app) for app in cleaned]
+
+    def test_rebuilds_after_external_edit(self, tmp_path):
+        """Test that a hand-edited dataset triggers a full rebuild."""
+        path = str(tmp_path / "job_applications.json")
+        index_path = str(tmp_path / "dedup_index.json")
+        with open(path, "w") as f:
+            json.dump([record("Acme", "Applied")], f)
+        clean_duplicates(path, index_path)
+
+        with open(path, "w") as f:
+            json.dump([record("Beta", "Declined"), record("Beta", "Applied")], f)
+        clean_duplicates(path, index_path)
+        with open(path) as f:
+            assert json.load(f) == [record("Beta", "Declined")]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
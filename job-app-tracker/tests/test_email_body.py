@@ -0,0 +1,95 @@
+# tests/test_email_body.py
+"""Unit tests for scripts/email_body.py functionality."""
+
+import base64
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.email_body import decode_text, extract_body, html_to_text, iter_decoded
+from scripts.gmail_fetch import MAX_CONTENT_LENGTH, parse_message_content
+
+
+def encode(text):
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def leaf(mime_type, text, **extra):
+    return {"mimeType": mime_type, "body": {"data": encode(text)}, **extra}
+
+
+class TestDecoding:
+    """Tests for incremental base64url decoding."""
+
+    def test_chunked_decode_matches_whole(self):
+        """Test that chunked decoding handles multibyte characters split across chunks."""
+        text = "Café résumé — ünïcode " * 50
+        assert "".join(iter_decoded(encode(text), chunk_chars=8)) == text
+
+    def test_decode_stops_at_budget(self):
+        """Test that only the budgeted prefix is returned."""
+        assert decode_text(encode("x" * 10000), 100) == "x" * 100
+
+
+class TestHtmlToText:
+    """Tests for HTML stripping."""
+
+    def test_strips_markup_scripts_and_styles(self):
+        """Test that tags, scripts and styles are dropped and blocks become lines."""
+        html = ("<html><head><style>p {color: red}</style></head><body>"
+                "<p>Thank you for applying to <b>Acme</b>.</p><script>track()</script>"
+                "<div>Status:&nbsp;received</div></body></html>")
+        assert html_to_text(encode(html), 1000) == "Thank you for applying to Acme.\nStatus: received"
+
+    def test_stops_at_budget(self):
+        """Test that parsing stops once the budget is filled."""
+        html = "<p>" + "word " * 5000 + "</p>"
+        assert len(html_to_text(encode(html), 50)) <= 50
+
+
+class TestExtractBody:
+    """Tests for MIME tree walking."""
+
+    def test_nested_multipart_plain_text(self):
+        """Test that text parts inside nested multiparts are found."""
+        payload = {"mimeType": "multipart/mixed", "parts": [
+            {"mimeType": "multipart/alternative", "parts": [
+                leaf("text/plain", "Plain body"),
+                leaf("text/html", "<p>HTML body</p>"),
+            ]},
+            leaf("text/plain", "ignored attachment", filename="notes.txt"),
+        ]}
+        assert extract_body(payload, 1000) == "Plain body"
+
+    def test_html_only_message(self):
+        """Test that HTML-only mail yields its text."""
+        payload = {"mimeType": "multipart/alternative", "parts": [leaf("text/html", "<p>Interview invite</p>")]}
+        assert extract_body(payload, 1000) == "Interview invite"
+
+    def test_single_part_body(self):
+        """Test that a non-multipart payload uses its own body."""
+        assert extract_body(leaf("text/plain", "Hello"), 1000) == "Hello"
+
+
+class TestParseMessageContent:
+    """Tests for building classifier input from a message."""
+
+    def test_headers_body_and_budget(self):
+        """Test that content includes headers, respects MAX_CONTENT_LENGTH and falls back to the snippet."""
+        message = {"internalDate": "0", "snippet": "snip", "payload": {
+            "headers": [{"name": "From", "value": "jobs@acme.com"}, {"name": "Subject", "value": "Hi"}],
+            "mimeType": "text/html", "body": {"data": encode("<p>" + "a " * MAX_CONTENT_LENGTH + "</p>")},
+        }}
+        content = parse_message_content(message)["content"]
+        assert content.startswith("From: jobs@acme.com\nSubject: Hi\n\na a")
+        assert len(content) <= MAX_CONTENT_LENGTH
+
+        message["payload"]["body"] = {}
+        assert parse_message_content(message)["content"].endswith("\n\nsnip")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,108 @@
+# tests/test_entity_resolution.py
+"""Unit tests for scripts/entity_resolution.py functionality."""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.entity_resolution import (
+    APPLICATION_ID_FIELD, EntityResolver, application_ids, assign_application_ids, level_signature, load_resolver,
+    normalize_company, normalize_title, resolve_entities, save_resolver, split_requisition
+)
+
+
+def record(company, title):
+    return {"Company": company, "Job Title": title}
+
+
+class TestNormalization:
+    """Tests for company and title normalization."""
+
+    def test_company_suffixes_case_and_punctuation(self):
+        """Test that legal suffixes, case and punctuation are ignored."""
+        assert normalize_company("UniUni Logistics Inc.") == "uniuni logistics"
+        assert normalize_company("The Walt Disney Company") == normalize_company("walt disney company")
+        assert normalize_company("Alliant Insurance Services, Inc.") == "alliant insurance services"
+        assert normalize_company("Co") == "co"
+        assert normalize_company("") == "unknown"
+
+    def test_title_and_markers(self):
+        """Test title normalization, seniority markers and requisition numbers."""
+        assert normalize_title("Data Analyst,  Marketing") == "data analyst marketing"
+        assert level_signature("sr data analyst ii") == level_signature("data analyst senior 2")
+        assert split_requisition("data scientist 2 280716") == ("data scientist 2", frozenset({"280716"}))
+
+
+class TestResolution:
+    """Tests for clustering records into canonical applications."""
+
+    def test_near_duplicate_titles_share_id(self):
+        """Test that small title variations at the same company resolve to one ID."""
+        ids = resolve_entities([
+            record("UniUni Logistics Inc.", "Operation Assistant"),
+            record("uniuni logistics", "Operations Assistant"),
+            record("Oracle", "Data Scientist 2 - 280716"),
+            record("Oracle", "Data Scientist 2-280716"),
+        ])
+        assert ids[0] == ids[1]
+        assert ids[2] == ids[3]
+        assert ids[0] != ids[2]
+
+    def test_distinct_roles_kept_apart(self):
+        """Test that different roles, levels, companies and postings get different IDs."""
+        ids = resolve_entities([
+            record("Acme", "Data Analyst"),
+            record("Acme", "Data Engineer"),
+            record("Acme", "Data Analyst II"),
+            record("Beta", "Data Analyst"),
+            record("Acme", "Quality Analyst 881759"),
+            record("Acme", "Quality Analyst 881683"),
+        ])
+        assert len(set(ids)) == 6
+
+    def test_incremental_state_round_trip(self):
+        """Test that a restored resolver assigns new records to existing clusters."""
+        resolver = EntityResolver()
+        first = resolver.resolve([record("Acme", "Operation Assistant")])
+        restored = EntityResolver.from_dict(resolver.to_dict())
+        assert restored.resolve([record("ACME, Inc.", "Operations Assistant")]) == first
+
+    def test_scales_with_block_size(self):
+        """Test that many companies resolve quickly since only same-company titles are compared."""
+        records = [record(f"Company {i}", f"Analyst {i % 7}") for i in range(20000)]
+        ids = resolve_entities(records)
+        assert len(set(ids)) == 20000
+
+
+class TestApplicationIds:
+    """Tests for application IDs stored on records."""
+
+    def test_stored_ids_are_read_back(self):
+        """Test that a stored ID wins over resolution, whatever the record order."""
+        stored = dict(record("Acme", "Data Engineer"), **{APPLICATION_ID_FIELD: "a1"})
+        records = [record("Acme", "Data Analyst"), stored, record("Acme", "Data Analyst")]
+        ids = application_ids(records, EntityResolver())
+        assert ids[1] == "a1"
+        assert ids[0] == ids[2] != "a1"
+        assert application_ids(records[::-1], EntityResolver()) == ids[::-1]
+        assert APPLICATION_ID_FIELD not in records[0]
+
+    def test_assign_and_persist(self, tmp_path):
+        """Test that assigned IDs are kept and a saved resolver extends the same clusters."""
+        path = str(tmp_path / "resolver.json")
+        resolver = load_resolver(path)
+        records = [record("Acme", "Operation Assistant"), dict(record("Beta", "Analyst"), **{APPLICATION_ID_FIELD: "b1"})]
+        assert assign_application_ids(records, resolver) == 1
+        assert records[1][APPLICATION_ID_FIELD] == "b1"
+        save_resolver(resolver, path)
+
+        later = [record("ACME, Inc.", "Operations Assistant")]
+        assign_application_ids(later, load_resolver(path))
+        assert later[0][APPLICATION_ID_FIELD] == records[0][APPLICATION_ID_FIELD]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
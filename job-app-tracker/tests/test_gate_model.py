@@ -0,0 +1,137 @@
+# tests/test_gate_model.py
+"""Unit tests for scripts/gate_model.py and train_gate.py functionality."""
+
+import math
+import random
+import pytest
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.gate_model import GateModel, LabelLog, calibrate_thresholds, train_gate_model
+from train_gate import retrain
+
+
+def email(is_job, n):
+    company = f"company{n % 7}"
+    if is_job:
+        return {"from": f"Careers <jobs@talent.{company}.com>", "subject": f"Your application to {company}",
+                "snippet": f"Thank you for applying, we received your application {n}"}
+    return {"from": f"News <hello@news.{company}.com>", "subject": f"{company} weekly digest",
+            "snippet": f"Top stories and deals for you this week {n}"}
+
+
+def labels(count=1000, seed=0):
+    rng = random.Random(seed)
+    return [dict(email(job, n), label=job) for n, job in ((n, rng.random() < 0.4) for n in range(count))]
+
+
+class TestLabelLog:
+    """Tests for the label log."""
+
+    def test_latest_label_wins_and_corrupt_lines_skipped(self, tmp_path):
+        """Test that relabeling an email replaces its label and torn lines are ignored."""
+        log = LabelLog(str(tmp_path / "labels.jsonl"))
+        log.add(email(True, 1), True)
+        log.add(email(False, 2), False)
+        log.add(email(True, 1), False)
+        with open(log.path, "a") as f:
+            f.write('{"from": "x", "subj')
+
+        entries = log.load()
+        assert [(e["subject"], e["label"]) for e in entries] == [
+            ("company2 weekly digest", False), ("Your application to company1", False)
+        ]
+
+
+class TestCalibration:
+    """Tests for threshold calibration."""
+
+    def test_thresholds_meet_target_precision(self):
+        """Test that each decided region is as wide as its calibration precision allows."""
+        probabilities = np.linspace(0.0, 1.0, 200)
+        truth = (probabilities > 0.5).astype(float)
+        truth[[25, 150]] = 1 - truth[[25, 150]]
+        # One mistake in each half of 100 gives exactly 99% precision
+        assert calibrate_thresholds(probabilities, truth, target=0.99) == (probabilities[99], probabilities[100])
+        # Above 99% only the 25 and 49 messages beyond the mistakes qualify, fewer than the minimum support
+        assert calibrate_thresholds(probabilities, truth, target=0.995) == (-math.inf, math.inf)
+
+    def test_unseparated_classes_never_decide(self):
+        """Test that tied, mixed probabilities leave every email to the LLM."""
+        probabilities = np.full(100, 0.5)
+        truth = np.array([1.0, 0.0] * 50)
+        assert calibrate_thresholds(probabilities, truth, target=0.9) == (-math.inf, math.inf)
+
+
+class TestGateModel:
+    """Tests for training and using the gate model."""
+
+    def test_train_decides_clear_emails(self, tmp_path):
+        """Test that a trained model settles clear emails and survives a save/load round trip."""
+        model = train_gate_model(labels())
+        report = model.report
+        # Thresholds are picked on one split and tested on another, and neither is trained on
+        assert (report["train"], report["calibration"]["messages"], report["test"]["messages"]) == (600, 200, 200)
+        test = report["test"]
+        assert test["job"]["precision"] >= 0.98 and test["not_job"]["precision"] >= 0.98
+        assert test["coverage"] > 0.9
+
+        path = str(tmp_path / "model.npz")
+        model.save(path)
+        loaded = GateModel.load(path)
+        assert loaded.probability(email(True, 999)) == pytest.approx(model.probability(email(True, 999)))
+        assert loaded.classify(email(True, 999)) is True
+        assert loaded.classify(email(False, 999)) is False
+        assert loaded.stats()["calls_saved"] == 2
+
+    def test_audit_samples_rejections(self):
+        """Test that a share of confident rejections is sent to the LLM and not counted as saved."""
+        model = train_gate_model(labels())
+        never = GateModel(model.weights, model.bias, model.not_job_below, model.job_above, audit_rate=0.0)
+        assert not any(never.audit() for _ in range(100))
+
+        model.audit_rate = 0.25
+        for n in range(400):
+            if model.classify(email(False, n)) is False:
+                model.audit()
+        stats = model.stats()
+        assert stats["decided_not_job"] == 400
+        assert 60 < stats["audited"] < 140
+        assert stats["calls_saved"] == 400 - stats["audited"]
+
+    def test_job_decisions_save_nothing_without_llm_gate(self):
+        """Test that only rejections count as saved calls when there is no LLM gate to skip."""
+        model = train_gate_model(labels())
+        model.audit_rate = 0.0
+        model.llm_gate = False
+        assert model.classify(email(True, 1)) is True
+        assert model.classify(email(False, 2)) is False
+        assert model.stats()["calls_saved"] == 1
+
+    def test_too_few_labels(self):
+        """Test that training refuses a label log that is too small or has one class."""
+        with pytest.raises(ValueError):
+            train_gate_model(labels(count=50))
+        with pytest.raises(ValueError):
+            train_gate_model([dict(e, label=True) for e in labels()])
+
+    def test_retrain_command(self, tmp_path, capsys):
+        """Test that retraining saves the model and prints its precision/recall report."""
+        log = LabelLog(str(tmp_path / "labels.jsonl"))
+        for entry in labels():
+            log.add(entry, entry["label"])
+        model_path = str(tmp_path / "model.npz")
+
+        assert retrain(log.path, model_path)
+        assert GateModel.load(model_path) is not None
+        assert '"precision"' in capsys.readouterr().out
+        assert not retrain(str(tmp_path / "missing.jsonl"), str(tmp_path / "other.npz"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
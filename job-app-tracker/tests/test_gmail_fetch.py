@@ -0,0 +1,308 @@
+"""Unit tests for scripts/gmail_fetch.py functionality."""
+
+import pytest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import gmail_fetch
+from scripts.metrics import metrics
+from scripts.rate_limit import AdaptiveRateLimiter
+from scripts.gmail_fetch import (
+    GmailSession, batch_get_messages, discover_accounts, fetch_emails, fetch_new_emails, get_email_snippets,
+    iter_emails,
+    load_sync_cursor, save_sync_cursor
+)
+
+
+def make_credentials(valid=True):
+    creds = MagicMock()
+    creds.valid = valid
+    creds.refresh_token = "refresh"
+    return creds
+
+
+class TestGmailSession:
+    """Tests for the GmailSession client cache."""
+
+    def test_credentials_loaded_once(self):
+        """Test that the token file is read only once per session."""
+        creds = make_credentials()
+        with patch.object(gmail_fetch, "_load_credentials", return_value=creds) as load:
+            session = GmailSession("token.json", "creds.json")
+            assert session.credentials is creds
+            assert session.credentials is creds
+        load.assert_called_once_with("token.json", "creds.json")
+
+    def test_service_built_once(self):
+        """Test that the discovery-based service is built once and shared across threads."""
+        creds = make_credentials()
+        with patch.object(gmail_fetch, "_load_credentials", return_value=creds), \
+                patch("googleapiclient.discovery.build") as build:
+            session = GmailSession()
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                services = list(pool.map(lambda _: session.service, range(32)))
+        build.assert_called_once()
+        assert all(s is services[0] for s in services)
+
+    def test_refresh_only_when_expired(self):
+        """Test that credentials are refreshed only after they expire."""
+        creds = make_credentials()
+        with patch.object(gmail_fetch, "_load_credentials", return_value=creds):
+            session = GmailSession()
+            session.credentials
+            session.credentials
+            creds.refresh.assert_not_called()
+
+            creds.valid = False
+            creds.refresh.side_effect = lambda request: setattr(creds, "valid", True)
+            session.credentials
+            session.credentials
+            creds.refresh.assert_called_once()
+
+    def test_http_is_per_thread(self):
+        """Test that each thread reuses its own HTTP connection object."""
+        creds = make_credentials()
+        with patch.object(gmail_fetch, "_load_credentials", return_value=creds):
+            session = GmailSession()
+            assert session.http() is session.http()
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                other = pool.submit(session.http).result()
+            assert other is not session.http()
+
+    def test_execute_uses_pooled_http(self):
+        """Test that requests are executed over the session's HTTP client."""
+        creds = make_credentials()
+        request = MagicMock()
+        request.execute.return_value = {"snippet": "hello"}
+        with patch.object(gmail_fetch, "_load_credentials", return_value=creds):
+            session = GmailSession()
+            assert session.execute(request) == {"snippet": "hello"}
+            request.execute.assert_called_once_with(http=session.http())
+
+
+def http_error(status):
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+
+class FakeBatch:
+    """Minimal stand-in for googleapiclient's BatchHttpRequest."""
+
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append(request_id)
+
+    def execute(self, http=None):
+        self.service.batches.append(list(self.requests))
+        for message_id in self.requests:
+            failures = self.service.failures.get(message_id, [])
+            if failures:
+                self.callback(message_id, None, failures.pop(0))
+            else:
+                self.callback(message_id, {"id": message_id, "snippet": f"snippet {message_id}"}, None)
+
+
+class FakeService:
+    """Gmail service double recording each batch it executes."""
+
+    def __init__(self, failures=None):
+        self.failures = failures or {}
+        self.batches = []
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+    def users(self):
+        return MagicMock()
+
+
+def make_session(service):
+    session = MagicMock(spec=GmailSession)
+    session.service = service
+    session.limiter = AdaptiveRateLimiter("test", 1000, gmail_fetch.classify_gmail_error)
+    session.execute.side_effect = lambda request, cost=1: request.execute()
+    return session
+
+
+class TestBatchGetMessages:
+    """Tests for batched message retrieval."""
+
+    def test_groups_into_batches_of_100(self):
+        """Test that IDs are split into batch requests of at most BATCH_SIZE."""
+        service = FakeService()
+        ids = [f"m{i}" for i in range(250)]
+        messages = batch_get_messages(ids, session=make_session(service))
+        assert [len(b) for b in service.batches] == [100, 100, 50]
+        assert set(messages) == set(ids)
+
+    def test_retries_rate_limited_items(self):
+        """Test that 429 items are retried with backoff and others are not."""
+        service = FakeService(failures={"a": [http_error(429)], "b": [http_error(404)]})
+        with patch.object(gmail_fetch.time, "sleep") as sleep:
+            messages = batch_get_messages(["a", "b", "c"], session=make_session(service))
+        assert service.batches == [["a", "b", "c"], ["a"]]
+        assert set(messages) == {"a", "c"}
+        sleep.assert_called_once()
+
+    def test_gives_up_after_max_retries(self):
+        """Test that persistently throttled items are eventually dropped."""
+        failures = {"a": [http_error(429)] * (gmail_fetch.BATCH_MAX_RETRIES + 1)}
+        service = FakeService(failures=failures)
+        with patch.object(gmail_fetch.time, "sleep"):
+            messages = batch_get_messages(["a"], session=make_session(service))
+        assert messages == {}
+        assert len(service.batches) == gmail_fetch.BATCH_MAX_RETRIES + 1
+
+    def test_throttled_batch_not_retried_again(self):
+        """Test that a batch the limiter gave up on is not retried or counted as a failure again."""
+        session = make_session(FakeService())
+        session.execute.side_effect = http_error(429)
+        with patch.object(session.limiter, "record_failure") as record_failure, \
+                patch.object(gmail_fetch.time, "sleep") as sleep:
+            assert batch_get_messages(["a", "b"], session=session) == {}
+        session.execute.assert_called_once()
+        record_failure.assert_not_called()
+        sleep.assert_not_called()
+
+    def test_failed_ids_are_reported(self, caplog):
+        """Test that messages lost to a failed batch request are logged and counted."""
+        session = make_session(FakeService())
+        session.execute.side_effect = http_error(503)
+        metrics.reset()
+        messages = batch_get_messages(["a", "b"], session=session)
+        assert messages == {}
+        assert metrics.snapshot()["counters"]["gmail_fetch_failures"] == 2
+        assert "Could not fetch 2 of 2 messages (minimal): a, b" in caplog.text
+
+    def test_snippets_keyed_by_id(self):
+        """Test that snippets are returned keyed by message ID."""
+        service = FakeService()
+        snippets = get_email_snippets(["x", "y", "x"], session=make_session(service))
+        assert snippets == {"x": "snippet x", "y": "snippet y"}
+        assert service.batches == [["x", "y"]]
+
+
+class TestIncrementalSync:
+    """Tests for historyId-based incremental sync."""
+
+    def test_cursor_round_trip(self, tmp_path):
+        """Test that the sync cursor persists across runs."""
+        path = str(tmp_path / "sync_state.json")
+        assert load_sync_cursor(path) is None
+        save_sync_cursor("12345", path)
+        assert load_sync_cursor(path) == "12345"
+
+    def test_cursors_are_per_account(self, tmp_path):
+        """Test that each account keeps its own cursor next to the legacy default one."""
+        path = str(tmp_path / "sync_state.json")
+        save_sync_cursor("10", path)
+        save_sync_cursor("20", path, account="personal_gmail")
+        save_sync_cursor("30", path, account="school_gmail")
+        assert load_sync_cursor(path) == "10"
+        assert load_sync_cursor(path, account="personal_gmail") == "20"
+        assert load_sync_cursor(path, account="school_gmail") == "30"
+        assert load_sync_cursor(path, account="other") is None
+
+    def test_history_lists_only_new_inbox_messages(self):
+        """Test that history pages are followed and non-inbox additions skipped."""
+        session = MagicMock(spec=GmailSession)
+        session.service = MagicMock()
+        session.execute.side_effect = [
+            {"history": [{"messagesAdded": [{"message": {"id": "a", "labelIds": ["INBOX"]}}]}],
+             "historyId": "105", "nextPageToken": "p2"},
+            {"history": [{"messagesAdded": [{"message": {"id": "b", "labelIds": ["SENT"]}},
+                                            {"message": {"id": "c", "labelIds": ["INBOX"]}}]}],
+             "historyId": "110"},
+        ]
+        messages, cursor = fetch_new_emails("100", session=session)
+        assert [m["id"] for m in messages] == ["a", "c"]
+        assert cursor == "110"
+
+    def test_expired_cursor_falls_back_to_full_listing(self):
+        """Test that a 404 from history.list triggers a full inbox listing."""
+        session = MagicMock(spec=GmailSession)
+        session.service = MagicMock()
+        session.execute.side_effect = [
+            http_error(404),
+            {"historyId": "200"},
+            {"messages": [{"id": "x", "threadId": "t"}]},
+        ]
+        messages, cursor = fetch_new_emails("1", session=session)
+        assert messages == [{"id": "x", "threadId": "t"}]
+        assert cursor == "200"
+
+
+class TestStreamingListing:
+    """Tests for page-by-page inbox listing."""
+
+    def make_session(self, pages):
+        session = MagicMock(spec=GmailSession)
+        session.service = MagicMock()
+        session.execute.side_effect = pages
+        return session
+
+    def test_yields_every_page_in_order(self):
+        """Test that messages from all pages are streamed in listing order."""
+        session = self.make_session([
+            {"messages": [{"id": "a"}, {"id": "b"}], "nextPageToken": "p2"},
+            {"messages": [{"id": "c"}], "nextPageToken": "p3"},
+            {},
+        ])
+        assert [m["id"] for m in iter_emails(since_hours=None, session=session)] == ["a", "b", "c"]
+        assert session.execute.call_count == 3
+
+    def test_prefetches_only_one_page_ahead(self):
+        """Test that consuming the first page requests at most the next one."""
+        session = self.make_session([
+            {"messages": [{"id": "a"}], "nextPageToken": "p2"},
+            {"messages": [{"id": "b"}], "nextPageToken": "p3"},
+            {"messages": [{"id": "c"}]},
+        ])
+        messages = iter_emails(since_hours=None, session=session)
+        assert next(messages)["id"] == "a"
+        messages.close()
+        assert session.execute.call_count <= 2
+
+    def test_listing_error_keeps_earlier_pages(self):
+        """Test that fetch_emails returns the pages listed before an API error."""
+        session = self.make_session([
+            {"messages": [{"id": "a"}], "nextPageToken": "p2"},
+            http_error(500),
+        ])
+        assert fetch_emails(since_hours=None, session=session) == [{"id": "a"}]
+
+
+class TestDiscoverAccounts:
+    """Tests for discovering configured Gmail accounts."""
+
+    def test_finds_account_directories_with_tokens(self, tmp_path):
+        """Test that every account directory holding a token is discovered."""
+        for name in ("school_gmail", "personal_gmail", "incomplete"):
+            (tmp_path / name).mkdir()
+        (tmp_path / "school_gmail" / "token.json").write_text("{}")
+        (tmp_path / "personal_gmail" / "token.json").write_text("{}")
+        accounts = discover_accounts(str(tmp_path))
+        assert [a.name for a in accounts] == ["personal_gmail", "school_gmail"]
+        assert accounts[0].token_path == str(tmp_path / "personal_gmail" / "token.json")
+        assert accounts[0].creds_path == str(tmp_path / "personal_gmail" / "gmail_credentials.json")
+
+    def test_falls_back_to_default_account(self, tmp_path):
+        """Test that the single configured token is used when no accounts exist."""
+        accounts = discover_accounts(str(tmp_path / "missing"))
+        assert [a.name for a in accounts] == ["default"]
+        assert accounts[0].token_path == gmail_fetch.TOKEN_PATH
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
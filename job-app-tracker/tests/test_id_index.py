@@ -0,0 +1,94 @@
+"""Unit tests for scripts/id_index.py functionality."""
+
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.id_index import SeenIdIndex, encode_id
+
+
+class TestEncodeId:
+    """Tests for the encode_id function."""
+
+    def test_gmail_ids_map_exactly(self):
+        """Test that hex Gmail IDs map to their integer value."""
+        assert encode_id("195b26d86bfe444f") == 0x195b26d86bfe444f
+        assert encode_id("ffffffffffffffff") == 2 ** 64 - 1
+
+    def test_other_ids_are_hashed(self):
+        """Test that non-hex IDs get a stable 64-bit hash."""
+        key = encode_id("example_email_id_001")
+        assert key == encode_id("example_email_id_001")
+        assert 0 <= key < 2 ** 64
+        assert key != encode_id("example_email_id_002")
+
+
+class TestSeenIdIndex:
+    """Tests for the SeenIdIndex class."""
+
+    def test_add_flush_reload(self, tmp_path):
+        """Test that flushed IDs are visible after reopening."""
+        path = str(tmp_path / "ids.bin")
+        index = SeenIdIndex(path, legacy_json_path=None)
+        index.add("195b26d86bfe444f")
+        index.add("195b26d86bfe444f")
+        assert "195b26d86bfe444f" in index
+        assert len(index) == 1
+        index.flush()
+        index.close()
+
+        reopened = SeenIdIndex(path, legacy_json_path=None)
+        assert "195b26d86bfe444f" in reopened
+        assert "196da0fdbd2a52ce" not in reopened
+
+    def test_flush_appends_only_new_ids(self, tmp_path):
+        """Test that each flush writes 8 bytes per new ID to the log."""
+        index = SeenIdIndex(str(tmp_path / "ids.bin"), legacy_json_path=None)
+        index.update(["a1", "a2"])
+        index.flush()
+        index.update(["a2", "a3"])
+        index.flush()
+        assert os.path.getsize(index.log_path) == 3 * 8
+
+    def test_compaction(self, tmp_path):
+        """Test that compaction merges the log into the sorted array."""
+        path = str(tmp_path / "ids.bin")
+        index = SeenIdIndex(path, legacy_json_path=None, compact_threshold=3)
+        ids = [f"{i:016x}" for i in (50, 10, 30, 20, 40)]
+        for message_id in ids[:3]:
+            index.add(message_id)
+        index.flush()
+        assert not os.path.exists(index.log_path)
+        assert os.path.getsize(path) == 3 * 8
+
+        index.update(ids[3:])
+        index.compact()
+        assert all(message_id in index for message_id in ids)
+        assert list(index) == [10, 20, 30, 40, 50]
+        assert f"{25:016x}" not in index
+        index.close()
+
+    def test_migrates_legacy_json(self, tmp_path):
+        """Test that an existing processed_ids.json is imported on first open."""
+        legacy = tmp_path / "processed_ids.json"
+        legacy.write_text(json.dumps(["195b26d86bfe444f", "example_email_id_001"]))
+        index = SeenIdIndex(str(tmp_path / "processed_ids.bin"), legacy_json_path=str(legacy))
+        assert "195b26d86bfe444f" in index
+        assert "example_email_id_001" in index
+        assert len(index) == 2
+
+    def test_existing_index_ignores_legacy_json(self, tmp_path):
+        """Test that the legacy file is only read when no index exists yet."""
+        path = str(tmp_path / "ids.bin")
+        SeenIdIndex(path, legacy_json_path=None).compact()
+        legacy = tmp_path / "processed_ids.json"
+        legacy.write_text(json.dumps(["abc"]))
+        assert "abc" not in SeenIdIndex(path, legacy_json_path=str(legacy))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,67 @@
+# tests/test_lifecycle.py
+"""Unit tests for scripts/lifecycle.py functionality."""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.lifecycle import ApplicationLifecycle, load_lifecycle, status_path
+
+
+def event(status, date, email_id=None, company="Acme", title="Data Analyst"):
+    record = {"Company": company, "Job Title": title, "Location": "NYC", "status": status, "Date": date}
+    if email_id:
+        record["email_id"] = email_id
+    return record
+
+
+class TestStatusPath:
+    """Tests for deriving an application's path from its events."""
+
+    def test_forward_only(self):
+        """Test that implicit Applied starts the path and backward moves are ignored."""
+        events = [["m1", "2025-03-02", "Interviewed"], ["m2", "2025-03-03", "Applied"],
+                  ["m3", "2025-03-04", "Declined"], ["m4", "2025-03-05", "Offer"]]
+        assert status_path(events) == ["Applied", "Interviewed", "Declined"]
+
+
+class TestApplicationLifecycle:
+    """Tests for incremental event logs and transition counts."""
+
+    def test_transitions_across_applications(self):
+        """Test that each application contributes its own transitions."""
+        lifecycle = ApplicationLifecycle()
+        lifecycle.record([event("Applied", "2025-03-01", "m1"), event("Applied", "2025-03-01", "m2", company="Beta")])
+        lifecycle.record([event("Interviewed", "2025-03-10", "m3"), event("Declined", "2025-03-12", "m4", company="Beta")])
+        lifecycle.record([event("Offer", "2025-03-20", "m5", title="Data  Analyst")])
+        assert lifecycle.transition_counts() == {
+            ("Applied", "Interviewed"): 1, ("Interviewed", "Offer"): 1, ("Applied", "Declined"): 1
+        }
+        assert lifecycle.status_counts() == {"Applied": 0, "Interviewed": 0, "Offer": 1, "Declined": 1}
+
+    def test_out_of_order_and_replayed_events(self):
+        """Test that late emails are placed by date and replays are ignored."""
+        lifecycle = ApplicationLifecycle()
+        lifecycle.record([event("Declined", "2025-03-12", "m2")])
+        lifecycle.record([event("Interviewed", "2025-03-05", "m1"), event("Declined", "2025-03-12", "m2")])
+        (application,) = lifecycle.applications.values()
+        assert [e[0] for e in application["events"]] == ["m1", "m2"]
+        assert lifecycle.transition_counts() == {("Applied", "Interviewed"): 1, ("Interviewed", "Declined"): 1}
+
+    def test_round_trip_and_bootstrap(self, tmp_path):
+        """Test that state is built from legacy records once and then reloaded."""
+        path = str(tmp_path / "lifecycle.json")
+        lifecycle = load_lifecycle([event("Applied", "2025-03-01"), event("Declined", "2025-03-09")], path)
+        lifecycle.save()
+
+        reloaded = load_lifecycle([], path)
+        assert reloaded.transition_counts() == {("Applied", "Declined"): 1}
+        reloaded.record([event("Declined", "2025-03-09")])
+        assert len(next(iter(reloaded.applications.values()))["events"]) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,62 @@
+"""Unit tests for scripts/llm_cache.py functionality."""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.llm_cache import LLMCache, cache_key
+
+
+class TestCacheKey:
+    """Tests for the cache_key function."""
+
+    def test_key_depends_on_all_parts(self):
+        """Test that model, prompt and input all change the key."""
+        base = cache_key("gpt", "prompt", "text")
+        assert base == cache_key("gpt", "prompt", "text")
+        assert base != cache_key("gpt-4", "prompt", "text")
+        assert base != cache_key("gpt", "prompt v2", "text")
+        assert base != cache_key("gpt", "prompt", "other text")
+
+    def test_no_ambiguous_concatenation(self):
+        """Test that moving text between fields changes the key."""
+        assert cache_key("a", "bc", "d") != cache_key("ab", "c", "d")
+
+
+class TestLLMCache:
+    """Tests for the LLMCache class."""
+
+    def test_hit_and_miss_counters(self):
+        """Test that lookups update hit/miss counters."""
+        cache = LLMCache(":memory:")
+        assert cache.get("k") is None
+        cache.put("k", "Yes")
+        assert cache.get("k") == "Yes"
+        assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = LLMCache(":memory:", max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+
+    def test_persists_to_disk(self, tmp_path):
+        """Test that entries survive reopening the cache file."""
+        path = str(tmp_path / "cache" / "llm.sqlite3")
+        cache = LLMCache(path)
+        cache.put("k", "Company: Acme")
+        cache.close()
+        assert LLMCache(path).get("k") == "Company: Acme"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
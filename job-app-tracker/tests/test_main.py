@@ -1,14 +1,26 @@
 # tests/test_main.py
 """Unit tests for main.py functionality."""
 
+import json
 import pytest
 import sys
 import os
+from unittest.mock import MagicMock, patch
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from main import normalize_status, parse_classification_details
+import main
+from main import extract_details_structured, normalize_status, parse_classification_details
+from scripts.analytics import ApplicationFrame
+from scripts.dedup import DedupIndex
+from scripts.entity_resolution import APPLICATION_ID_FIELD
+from scripts.gmail_fetch import GmailAccount, load_sync_cursor, save_sync_cursor
+from scripts.gate_model import LabelLog
+from scripts.lifecycle import ApplicationLifecycle
+from scripts import process_emails
+from scripts.process_emails import LLMError
+from scripts.rate_limit import AdaptiveRateLimiter
 
 
 class TestNormalizeStatus:
@@ -157,5 +169,221 @@ Status:   Applied   """
         assert result["status"] == "Applied"
 
 
+class TestExtractDetailsStructured:
+    """Tests for the single-call extraction path."""
+
+    def test_structured_record(self):
+        """Test that a structured extraction becomes a normalized record."""
+        extraction = {"company": "Acme", "title": "Analyst", "location": "NYC", "status": "rejected"}
+        with patch.object(main, "extract_application", return_value=extraction):
+            details = extract_details_structured({"content": "...", "date": "2025-03-01"})
+        assert details == {
+            "Company": "Acme", "Job Title": "Analyst", "Location": "NYC",
+            "status": "Declined", "Date": "2025-03-01"
+        }
+
+    def test_not_job(self):
+        """Test that non-job emails produce no record."""
+        with patch.object(main, "extract_application", return_value=None):
+            assert extract_details_structured({"content": "...", "date": "2025-03-01"}) is None
+
+    def test_invalid_response_falls_back(self):
+        """Test that schema failures fall back to the two-stage classifier."""
+        classification = "Company: Acme\nJob Title: Analyst\nLocation: NYC\nStatus: Applied"
+        with patch.object(main, "extract_application", side_effect=ValueError("bad")), \
+                patch.object(main, "classify_email", return_value=classification) as classify:
+            details = extract_details_structured({"content": "body", "date": "2025-03-01"})
+        classify.assert_called_once_with("body")
+        assert details["Company"] == "Acme"
+        assert details["status"] == "Applied"
+
+
+class TestIsJobEmail:
+    """Tests for the is_job_email gate."""
+
+    def test_gate_model_settles_confident_emails(self, monkeypatch):
+        """Test that the trained gate model answers before the LLM and defers when unsure."""
+        model = MagicMock()
+        model.classify.side_effect = lambda metadata: {"sure": False}.get(metadata["subject"])
+        model.audit.return_value = False
+        monkeypatch.setattr(main, "gate_model", model)
+        monkeypatch.setattr(main, "is_job_application", lambda snippet: True)
+        assert main.is_job_email({"from": "", "subject": "sure", "snippet": ""}) is False
+        assert main.is_job_email({"from": "", "subject": "unsure", "snippet": ""}) is True
+
+        # An audited rejection passes the gate so the extractor labels it
+        model.audit.return_value = True
+        assert main.is_job_email({"from": "", "subject": "sure", "snippet": ""}, use_llm=False) is True
+
+
+class FakeSession(str):
+    """Gmail session stand-in identified by its token path."""
+
+    limiter = AdaptiveRateLimiter("test", 1000, lambda error: (None, None))
+
+
+class TestProcessAllEmails:
+    """Tests for multi-account processing."""
+
+    INBOXES = {
+        "personal/token.json": (["p1", "p2"], "500"),
+        "school/token.json": (["s1"], "900"),
+    }
+
+    def run(self, tmp_path, monkeypatch, **patches):
+        monkeypatch.chdir(tmp_path)
+        accounts = [GmailAccount("personal", "personal/token.json", "personal/creds.json"),
+                    GmailAccount("school", "school/token.json", "school/creds.json")]
+        defaults = {
+            "discover_accounts": lambda: accounts,
+            "GmailSession": lambda token_path, creds_path, name: FakeSession(token_path),
+            "iter_new_emails": lambda cursor, session: (
+                [{"id": m} for m in self.INBOXES[session][0]], self.INBOXES[session][1]),
+            "get_email_metadata": lambda ids, session: {m: {"from": "", "subject": m} for m in ids},
+            "get_email_contents": lambda ids, session: {m: {"content": m, "date": "2025-03-01"} for m in ids},
+            "is_job_email": lambda metadata, prefilter, use_llm: True,
+            "extract_details": lambda email: {"Company": email["content"], "Job Title": "", "Location": "",
+                                              "status": "Applied", "Date": email["date"]},
+            "get_cache": lambda: None,
+        }
+        defaults.update(patches)
+        for name, value in defaults.items():
+            monkeypatch.setattr(main, name, value)
+        return main.process_all_emails()
+
+    def test_merges_accounts_and_tags_source(self, tmp_path, monkeypatch):
+        """Test that every account is processed and records name their account."""
+        results = self.run(tmp_path, monkeypatch)
+        assert sorted((r["Company"], r["Account"]) for r in results) == [
+            ("p1", "personal"), ("p2", "personal"), ("s1", "school")
+        ]
+        assert all(m in main.processed_email_ids for m in ["p1", "p2", "s1"])
+        assert load_sync_cursor(account="personal") == "500"
+        assert load_sync_cursor(account="school") == "900"
+        assert len(ApplicationLifecycle.load().applications) == 3
+        # Extracted outcomes are logged as training labels for the gate model
+        assert sorted((e["subject"], e["label"]) for e in LabelLog().load()) == [
+            ("p1", True), ("p2", True), ("s1", True)
+        ]
+
+    def test_application_ids_shared_by_readers(self, tmp_path, monkeypatch):
+        """Test that saved records carry one application ID that dedup, lifecycle and analytics all use."""
+        os.makedirs(tmp_path / "data")
+        legacy = {"Company": "P1 Inc.", "Job Title": "", "Location": "", "status": "Declined", "Date": "2025-02-01"}
+        with open(tmp_path / "data" / "job_applications.json", "w") as f:
+            json.dump([legacy], f)
+        self.run(tmp_path, monkeypatch)
+
+        with open("data/job_applications.json") as f:
+            records = json.load(f)
+        ids = [r[APPLICATION_ID_FIELD] for r in records]
+        # The record saved before IDs were stored got one too, shared with the new record of the same application
+        assert len(ids) == 4 and len(set(ids)) == 3
+        assert ids[0] == ids[[r["Company"] for r in records].index("p1")]
+        assert set(ApplicationLifecycle.load().applications) == set(ids)
+        index = DedupIndex()
+        index.update(records[::-1])
+        assert set(index.groups) == set(ids)
+        assert ApplicationFrame.from_records(records[::-1]).application_count == 3
+
+    def test_failed_account_keeps_its_cursor(self, tmp_path, monkeypatch):
+        """Test that one account failing does not block the others or advance its cursor."""
+        def fetch_metadata(ids, session):
+            if session == "school/token.json":
+                raise RuntimeError("quota exceeded")
+            return {m: {"from": "", "subject": m} for m in ids}
+
+        results = self.run(tmp_path, monkeypatch, get_email_metadata=fetch_metadata)
+        assert sorted(r["Company"] for r in results) == ["p1", "p2"]
+        assert "s1" not in main.processed_email_ids
+        assert load_sync_cursor(account="personal") == "500"
+        assert load_sync_cursor(account="school") is None
+
+    def test_failed_llm_call_is_retried_next_run(self, tmp_path, monkeypatch):
+        """Test that an email whose extraction kept failing stays unprocessed and holds the cursor."""
+        def extract(email):
+            if email["content"] == "s1":
+                raise LLMError("503 after retries", retryable=True)
+            return {"Company": email["content"], "Job Title": "", "Location": "",
+                    "status": "Applied", "Date": email["date"]}
+
+        results = self.run(tmp_path, monkeypatch, extract_details=extract)
+        assert sorted(r["Company"] for r in results) == ["p1", "p2"]
+        assert "s1" not in main.processed_email_ids
+        assert load_sync_cursor(account="school") is None
+
+    def test_failed_gate_call_is_retried_next_run(self, tmp_path, monkeypatch):
+        """Test that a two-stage gate call that kept failing leaves the email unprocessed, not rejected."""
+        def complete(prompt, snippet, json_mode=False):
+            if snippet == "s1":
+                raise LLMError("429 after retries", retryable=True)
+            return "Yes"
+
+        monkeypatch.setattr(process_emails, "_complete", complete)
+        results = self.run(
+            tmp_path, monkeypatch, is_job_email=main.is_job_email,
+            get_email_metadata=lambda ids, session: {m: {"from": "", "subject": "", "snippet": m} for m in ids}
+        )
+        assert sorted(r["Company"] for r in results) == ["p1", "p2"]
+        assert "s1" not in main.processed_email_ids
+        assert load_sync_cursor(account="school") is None
+        assert load_sync_cursor(account="personal") == "500"
+
+    def test_failed_extraction_is_not_a_gate_label(self, tmp_path, monkeypatch):
+        """Test that an extractor failure is an error, not a "not job" training label."""
+        def extract(email):
+            raise LLMError("400 context length exceeded")
+
+        assert self.run(tmp_path, monkeypatch, extract_details=extract) == []
+        assert LabelLog().load() == []
+        # A failure retrying cannot fix is still marked processed
+        assert all(m in main.processed_email_ids for m in ["p1", "p2", "s1"])
+
+    def test_unchanged_mailboxes_skip_processing(self, tmp_path, monkeypatch):
+        """Test that the run stops early when every mailbox is at its sync cursor."""
+        monkeypatch.chdir(tmp_path)
+        save_sync_cursor("500", account="personal")
+        accounts = [GmailAccount("personal", "personal/token.json", "personal/creds.json")]
+        history = {"id": "500"}
+        monkeypatch.setattr(main, "discover_accounts", lambda: accounts)
+        monkeypatch.setattr(main, "GmailSession", lambda token_path, creds_path, name: FakeSession(token_path))
+        monkeypatch.setattr(main, "peek_history_id", lambda session: history["id"])
+        monkeypatch.setattr(main, "run_account", MagicMock(side_effect=AssertionError("should not run")))
+        # The no-op run reads only the cursor, not the dataset
+        monkeypatch.setattr(main, "load_existing_results", MagicMock(side_effect=AssertionError("dataset read")))
+        assert main.process_all_emails() == []
+
+        history["id"] = "501"
+        assert main.has_new_mail({accounts[0]: FakeSession("personal/token.json")})
+
+    def test_sessions_shared_with_the_run(self, tmp_path, monkeypatch):
+        """Test that the new-mail check and the run use one session per account."""
+        monkeypatch.chdir(tmp_path)
+        save_sync_cursor("500", account="personal")
+        save_sync_cursor("900", account="school")
+        created = []
+        checked = []
+
+        def make_session(token_path, creds_path, name):
+            created.append(FakeSession(token_path))
+            return created[-1]
+
+        def peek(session):
+            checked.append(session)
+            return "1000"
+
+        listed = []
+
+        def list_new(cursor, session):
+            listed.append(session)
+            return [{"id": m} for m in self.INBOXES[session][0]], self.INBOXES[session][1]
+
+        self.run(tmp_path, monkeypatch, GmailSession=make_session, peek_history_id=peek, iter_new_emails=list_new)
+        assert created == ["personal/token.json", "school/token.json"]
+        # The check stops at the first changed mailbox; each account then lists with its own session
+        assert [id(s) for s in checked] == [id(created[0])]
+        assert sorted(id(s) for s in listed) == sorted(id(s) for s in created)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
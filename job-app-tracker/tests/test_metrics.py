@@ -0,0 +1,74 @@
+# tests/test_metrics.py
+"""Unit tests for scripts/metrics.py functionality."""
+
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.metrics import Histogram, MetricsRegistry, profiling, write_run_report
+
+
+class TestHistogram:
+    """Tests for bucketed histograms."""
+
+    def test_quantiles_use_bucket_bounds(self):
+        """Test that quantiles report the bucket upper bound, capped at the maximum."""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in [0.05] * 90 + [0.5] * 9 + [3.0]:
+            histogram.observe(value)
+        assert histogram.quantile(0.5) == 0.1
+        assert histogram.quantile(0.95) == 1.0
+        assert histogram.quantile(1.0) == 3.0
+        assert histogram.to_dict()["count"] == 100
+
+
+class TestRegistry:
+    """Tests for recording and reporting metrics."""
+
+    def test_timer_counts_errors(self):
+        """Test that timed blocks are observed even when they raise."""
+        registry = MetricsRegistry()
+        with registry.timer("stage"):
+            pass
+        with pytest.raises(ValueError):
+            with registry.timer("stage"):
+                raise ValueError("boom")
+        assert registry.histograms["stage_seconds"].count == 2
+        assert registry.counters["stage_errors"] == 1
+
+    def test_prometheus_textfile(self):
+        """Test the exposition format for counters, gauges and histograms."""
+        registry = MetricsRegistry()
+        registry.increment("jobs_found", 3)
+        registry.set_gauge("limiter_gmail:personal-2_rate", 12.5)
+        registry.observe("save_results_seconds", 0.02)
+        text = registry.to_prometheus()
+        assert "job_tracker_jobs_found_total 3\n" in text
+        assert "job_tracker_limiter_gmail_personal_2_rate 12.5\n" in text
+        assert 'job_tracker_save_results_seconds_bucket{le="0.025"} 1\n' in text
+        assert 'job_tracker_save_results_seconds_bucket{le="+Inf"} 1\n' in text
+        assert "job_tracker_save_results_seconds_count 1\n" in text
+
+    def test_run_report_and_profiling(self, tmp_path):
+        """Test that the report files are written and profiling results included."""
+        registry = MetricsRegistry()
+        with profiling(profile=True, trace_memory=True, registry=registry, directory=str(tmp_path)):
+            registry.increment("emails_seen")
+            sorted([str(i) for i in range(1000)])
+        write_run_report(registry, str(tmp_path))
+
+        with open(tmp_path / "run_report.json") as f:
+            report = json.load(f)
+        assert report["counters"] == {"emails_seen": 1}
+        assert report["gauges"]["peak_traced_memory_bytes"] > 0
+        assert report["profile_top"] and report["top_allocations"]
+        assert (tmp_path / "job_tracker.prom").exists()
+        assert (tmp_path / "profile.prof").exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,156 @@
+"""Unit tests for scripts/pipeline.py functionality."""
+
+import pytest
+import sys
+import os
+import random
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.pipeline import ERROR, JOB, NOT_JOB, SKIPPED, EmailPipeline
+
+
+class ConcurrencyProbe:
+    """Callable wrapper that records the peak number of concurrent calls."""
+
+    def __init__(self, func):
+        self.func = func
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(random.uniform(0, 0.005))
+            return self.func(*args)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def fetch_snippets(ids):
+    return {i: f"snippet {i}" for i in ids}
+
+
+def fetch_contents(ids):
+    return {i: {"content": f"body {i}", "date": "2025-01-01"} for i in ids}
+
+
+def is_job(snippet):
+    return int(snippet.split("m")[-1]) % 2 == 0
+
+
+def extract(email_data):
+    return {"Company": email_data["content"], "Date": email_data["date"]}
+
+
+def make_pipeline(**overrides):
+    stages = dict(fetch_snippets=fetch_snippets, is_job=is_job,
+                  fetch_contents=fetch_contents, extract=extract)
+    stages.update(overrides)
+    return EmailPipeline(**stages, chunk_size=5)
+
+
+class TestEmailPipeline:
+    """Tests for the concurrent email pipeline."""
+
+    def test_outcomes_in_input_order(self):
+        """Test that outcomes come back in input order despite concurrency."""
+        ids = [f"m{i}" for i in range(53)]
+        outcomes = list(make_pipeline(is_job=ConcurrencyProbe(is_job)).run(ids))
+        assert [o.message_id for o in outcomes] == ids
+        assert [o.status for o in outcomes] == [JOB if i % 2 == 0 else NOT_JOB for i in range(53)]
+        assert outcomes[0].details == {"Company": "body m0", "Date": "2025-01-01"}
+        # Gate rejections are not marked as extractor decisions
+        assert [o.extracted for o in outcomes[:2]] == [True, False]
+        assert outcomes[1].preview == "snippet m1"
+
+    def test_concurrency_limits(self):
+        """Test that Gmail and OpenAI stages respect their worker limits."""
+        gate = ConcurrencyProbe(is_job)
+        snippets = ConcurrencyProbe(fetch_snippets)
+        pipeline = EmailPipeline(fetch_snippets=snippets, is_job=gate, fetch_contents=fetch_contents,
+                                 extract=extract, gmail_workers=2, openai_workers=3, chunk_size=4)
+        list(pipeline.run([f"m{i}" for i in range(40)]))
+        assert gate.peak <= 3
+        assert snippets.peak <= 2
+
+    def test_fetch_failure_skips_chunk(self):
+        """Test that a failed batch fetch leaves messages unprocessed."""
+        def failing_snippets(ids):
+            if "m0" in ids:
+                raise RuntimeError("boom")
+            return fetch_snippets(ids)
+
+        outcomes = list(make_pipeline(fetch_snippets=failing_snippets).run([f"m{i}" for i in range(10)]))
+        assert [o.status for o in outcomes[:5]] == [SKIPPED] * 5
+        assert SKIPPED not in [o.status for o in outcomes[5:]]
+
+    def test_messages_missing_from_fetches_are_skipped(self):
+        """Test that messages a fetcher omitted are skipped, not classified."""
+        gated = []
+
+        def gate(snippet):
+            gated.append(snippet)
+            return True
+
+        def partial_snippets(ids):
+            return {i: s for i, s in fetch_snippets(ids).items() if i != "m1"}
+
+        def partial_contents(ids):
+            return {i: c for i, c in fetch_contents(ids).items() if i != "m2"}
+
+        pipeline = make_pipeline(fetch_snippets=partial_snippets, is_job=gate, fetch_contents=partial_contents)
+        outcomes = list(pipeline.run(["m0", "m1", "m2"]))
+        assert [o.status for o in outcomes] == [JOB, SKIPPED, SKIPPED]
+        assert gated == ["snippet m0", "snippet m2"]
+
+    def test_per_message_errors(self):
+        """Test that a failing classifier call only affects its own message."""
+        def flaky_extract(email_data):
+            if email_data["content"] == "body m2":
+                raise ValueError("bad response")
+            return extract(email_data)
+
+        outcomes = list(make_pipeline(extract=flaky_extract).run(["m0", "m1", "m2"]))
+        assert [o.status for o in outcomes] == [JOB, NOT_JOB, ERROR]
+        assert isinstance(outcomes[2].error, ValueError)
+
+    def test_batched_extraction(self):
+        """Test that packed groups go to the batch extractor and fan back out."""
+        calls = []
+
+        def extract_batch(emails):
+            calls.append(sorted(emails))
+            return {m: extract(e) for m, e in emails.items()}
+
+        pipeline = make_pipeline(extract_batch=extract_batch,
+                                 batch_packer=lambda emails: [[m] for m in emails][:1] + [list(emails)[1:]])
+        outcomes = list(pipeline.run([f"m{i}" for i in range(5)]))
+        assert [o.status for o in outcomes] == [JOB, NOT_JOB, JOB, NOT_JOB, JOB]
+        assert outcomes[4].details == {"Company": "body m4", "Date": "2025-01-01"}
+        assert sorted(calls) == [["m0"], ["m2", "m4"]]
+
+    def test_input_consumed_lazily(self):
+        """Test that closing the generator stops pulling new message IDs."""
+        pulled = []
+
+        def ids():
+            for i in range(1000):
+                pulled.append(i)
+                yield f"m{i}"
+
+        outcomes = make_pipeline().run(ids())
+        next(outcomes)
+        outcomes.close()
+        assert len(pulled) < 1000
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,77 @@
+"""Unit tests for scripts/prefilter.py functionality."""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import STATUS_KEYWORDS
+from scripts.prefilter import PreFilter, sender_domain
+
+
+class TestSenderDomain:
+    """Tests for the sender_domain function."""
+
+    def test_display_name_and_address(self):
+        """Test that the domain is extracted from a full From header."""
+        assert sender_domain("Acme Careers <no-reply@us.greenhouse-mail.io>") == "us.greenhouse-mail.io"
+        assert sender_domain("jobs@Lever.co") == "lever.co"
+
+    def test_missing_address(self):
+        """Test that headers without an address give an empty domain."""
+        assert sender_domain("") == ""
+        assert sender_domain("Acme Careers") == ""
+
+
+class TestPreFilter:
+    """Tests for the PreFilter class."""
+
+    def setup_method(self):
+        self.prefilter = PreFilter(STATUS_KEYWORDS)
+
+    def test_ats_sender_is_job(self):
+        """Test that applicant tracking system senders are job-related."""
+        assert self.prefilter.decide("Acme <no-reply@hire.lever.co>", "Hello") is True
+        assert self.prefilter.decide("wd5.myworkdayjobs.com <acme@myworkday.com>", "Update") is True
+
+    def test_obvious_non_job_mail(self):
+        """Test that receipts, codes and newsletters are rejected locally."""
+        assert self.prefilter.decide("Bank <alerts@bank.com>", "Your verification code is 123456") is False
+        assert self.prefilter.decide("Shop <orders@shop.com>", "Your order #12345 has shipped") is False
+        assert self.prefilter.decide("Writer <hi@writer.substack.com>", "Weekly thoughts") is False
+
+    def test_job_alerts_are_not_applications(self):
+        """Test that job board alerts are not treated as application updates."""
+        assert self.prefilter.decide("LinkedIn <jobs-noreply@linkedin.com>", "New jobs for you") is False
+
+    def test_job_subjects(self):
+        """Test that application subjects are job-related regardless of sender."""
+        assert self.prefilter.decide("Acme <talent@acme.com>", "Thank you for applying to Acme!") is True
+        assert self.prefilter.decide("Acme <talent@acme.com>", "Update on your application") is True
+
+    def test_ambiguous_goes_to_llm(self):
+        """Test that unclear emails are left undecided."""
+        assert self.prefilter.decide("Jane <jane@acme.com>", "Quick question") is None
+        assert self.prefilter.decide("Acme <talent@acme.com>", "Unfortunately...") is None
+
+    def test_counters(self):
+        """Test that classify counts decisions and saved calls."""
+        self.prefilter.classify("a@lever.co", "x")
+        self.prefilter.classify("a@b.com", "Your receipt from B")
+        self.prefilter.classify("a@b.com", "Hi")
+        assert self.prefilter.stats() == {
+            "decided_job": 1, "decided_not_job": 1, "ambiguous": 1, "calls_saved": 2
+        }
+
+    def test_job_decisions_save_nothing_without_llm_gate(self):
+        """Test that only rejections count as saved calls when there is no LLM gate to skip."""
+        prefilter = PreFilter(STATUS_KEYWORDS, llm_gate=False)
+        prefilter.classify("a@lever.co", "x")
+        prefilter.classify("a@b.com", "Your receipt from B")
+        assert prefilter.stats()["calls_saved"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
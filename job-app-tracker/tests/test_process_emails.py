@@ -0,0 +1,222 @@
+"""Unit tests for scripts/process_emails.py functionality."""
+
+import json
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+from openai import BadRequestError, RateLimitError
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import process_emails, rate_limit
+from scripts.compaction import count_tokens
+from scripts.process_emails import (
+    LLMError, classify_openai_error, extract_application, extract_applications_batch, pack_batches, parse_extraction
+)
+from scripts.rate_limit import THROTTLED
+
+
+class TestParseExtraction:
+    """Tests for the parse_extraction function."""
+
+    def test_valid_job_extraction(self):
+        """Test parsing a valid structured response."""
+        raw = ('{"is_job": true, "company": "Acme Corp", "title": "Data Analyst", '
+               '"location": "Remote", "status": "Interviewed"}')
+        assert parse_extraction(raw) == {
+            "company": "Acme Corp", "title": "Data Analyst", "location": "Remote", "status": "Interviewed"
+        }
+
+    def test_not_job(self):
+        """Test that is_job false returns None."""
+        assert parse_extraction('{"is_job": false, "company": "", "title": ""}') is None
+
+    def test_missing_fields_default_to_unknown(self):
+        """Test that missing, null or blank fields become 'Unknown'."""
+        raw = '{"is_job": true, "company": "Acme", "title": null, "location": "  "}'
+        assert parse_extraction(raw) == {
+            "company": "Acme", "title": "Unknown", "location": "Unknown", "status": "Unknown"
+        }
+
+    def test_invalid_json(self):
+        """Test that malformed JSON raises ValueError."""
+        with pytest.raises(ValueError):
+            parse_extraction("Company: Acme")
+
+    def test_schema_violations(self):
+        """Test that wrong types raise ValueError."""
+        with pytest.raises(ValueError):
+            parse_extraction('["is_job"]')
+        with pytest.raises(ValueError):
+            parse_extraction('{"is_job": "yes"}')
+        with pytest.raises(ValueError):
+            parse_extraction('{"is_job": true, "company": 42}')
+
+
+class TestExtractApplication:
+    """Tests for the extract_application function."""
+
+    def test_not_job_answer(self):
+        """Test that only a valid is_job=false answer means not a job email."""
+        with patch.object(process_emails, "_complete", return_value='{"is_job": false}'):
+            assert extract_application("email") is None
+
+    def test_api_failure_propagates(self):
+        """Test that a failed call raises instead of reading as not a job email."""
+        with patch.object(process_emails, "_complete", side_effect=LLMError("503 after retries", retryable=True)):
+            with pytest.raises(LLMError):
+                extract_application("email")
+
+
+class TestIsJobApplication:
+    """Tests for the is_job_application gate."""
+
+    def test_retryable_failure_propagates(self):
+        """Test that a throttled or 5xx gate call raises instead of reading as not a job email."""
+        with patch.object(process_emails, "_complete", side_effect=LLMError("503 after retries", retryable=True)):
+            with pytest.raises(LLMError):
+                process_emails.is_job_application("snippet")
+
+    def test_permanent_failure_is_not_job(self):
+        """Test that a failure retrying cannot fix still rejects the email."""
+        with patch.object(process_emails, "_complete", side_effect=LLMError("400 bad request")):
+            assert process_emails.is_job_application("snippet") is False
+
+
+class TestClassifyEmail:
+    """Tests for the classify_email function."""
+
+    def test_api_failure_propagates(self):
+        """Test that a failed call raises instead of reading as "Not Job Application"."""
+        with patch.object(process_emails, "_complete", side_effect=LLMError("503 after retries", retryable=True)):
+            with pytest.raises(LLMError):
+                process_emails.classify_email("email")
+
+
+class TestPackBatches:
+    """Tests for the pack_batches function."""
+
+    def test_respects_token_budget(self):
+        """Test that batches stay within the token budget and keep order."""
+        texts = {f"m{i}": "x" * 400 for i in range(10)}
+        cost = count_tokens("x" * 400) + process_emails.BATCH_ITEM_HEADER_TOKENS
+        budget = 3 * cost + cost // 2 + count_tokens(process_emails.BATCH_EXTRACT_PROMPT)
+        batches = pack_batches(texts, token_budget=budget)
+        assert [m for batch in batches for m in batch] == list(texts)
+        assert all(len(batch) == 3 for batch in batches[:-1])
+
+    def test_sizes_compacted_text(self):
+        """Test that quoted history removed by compaction does not count against the budget."""
+        reply = "Subject: Re: application\n\nSee you Monday.\n\nOn Mon, Jan 6, 2025, Recruiter wrote:\n"
+        texts = {f"m{i}": reply + "> old thread\n" * 500 for i in range(4)}
+        assert pack_batches(texts, token_budget=count_tokens(process_emails.BATCH_EXTRACT_PROMPT) + 200) == [list(texts)]
+
+    def test_max_items(self):
+        """Test that batches never exceed max_items."""
+        batches = pack_batches({f"m{i}": "hi" for i in range(7)}, max_items=3)
+        assert [len(b) for b in batches] == [3, 3, 1]
+
+    def test_oversized_item_gets_own_batch(self):
+        """Test that a text larger than the budget is still sent alone."""
+        batches = pack_batches({"big": "x" * 100000, "small": "hi"}, token_budget=600)
+        assert batches == [["big"], ["small"]]
+
+
+class TestExtractApplicationsBatch:
+    """Tests for the extract_applications_batch function."""
+
+    def test_fans_out_by_index(self):
+        """Test that indexed results map back to message IDs."""
+        response = json.dumps({"results": [
+            {"index": 1, "is_job": False},
+            {"index": 0, "is_job": True, "company": "Acme", "title": "Analyst",
+             "location": "Remote", "status": "Applied"},
+        ]})
+        with patch.object(process_emails, "_complete", return_value=response) as complete:
+            extractions, failed = extract_applications_batch({"a": "email a", "b": "email b"})
+        assert extractions == {
+            "a": {"company": "Acme", "title": "Analyst", "location": "Remote", "status": "Applied"},
+            "b": None,
+        }
+        assert failed == []
+        prompt = complete.call_args[0][1]
+        assert prompt.index("### Email 0\nemail a") < prompt.index("### Email 1\nemail b")
+
+    def test_missing_and_invalid_items_fail(self):
+        """Test that unparseable items are reported for the fallback path."""
+        response = json.dumps({"results": [{"index": 0, "is_job": "maybe"}]})
+        with patch.object(process_emails, "_complete", return_value=response):
+            extractions, failed = extract_applications_batch({"a": "x", "b": "y"})
+        assert extractions == {}
+        assert failed == ["a", "b"]
+
+    def test_non_integer_indexes_fail(self):
+        """Test that unhashable or non-integer indexes send their emails to the fallback."""
+        item = {"is_job": False}
+        response = json.dumps({"results": [{**item, "index": [0]}, {**item, "index": "1"},
+                                           {**item, "index": True}, {**item, "index": 2}]})
+        with patch.object(process_emails, "_complete", return_value=response):
+            extractions, failed = extract_applications_batch({"a": "x", "b": "y", "c": "z"})
+        assert extractions == {"c": None}
+        assert failed == ["a", "b"]
+
+    def test_malformed_response_fails_all(self):
+        """Test that a non-JSON response sends every item to the fallback."""
+        with patch.object(process_emails, "_complete", return_value="sorry"):
+            assert extract_applications_batch({"a": "x"}) == ({}, ["a"])
+
+
+def api_error(error_class, status, headers=None):
+    response = MagicMock(status_code=status, headers=headers or {})
+    return error_class("error", response=response, body=None)
+
+
+class TestOpenAIRateLimiting:
+    """Tests for routing OpenAI calls through the shared limiter."""
+
+    def test_classify_errors(self):
+        """Test that 429s are throttles with Retry-After and 400s are not retried."""
+        assert classify_openai_error(api_error(RateLimitError, 429, {"retry-after": "2"})) == (THROTTLED, 2.0)
+        assert classify_openai_error(api_error(BadRequestError, 400)) == (None, None)
+
+    def test_client_requires_api_key(self, tmp_path, monkeypatch):
+        """Test that a missing key is reported when the client is first needed, not at import."""
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        monkeypatch.setattr(process_emails, "ENV_PATH", str(tmp_path / ".env"))
+        monkeypatch.setattr(process_emails, "_client", None)
+        with pytest.raises(ValueError):
+            process_emails.get_client()
+
+    def test_complete_retries_throttled_call(self):
+        """Test that a throttled completion is retried and quota headers are observed."""
+        raw = MagicMock()
+        raw.headers = {"x-ratelimit-remaining-requests": "100", "x-ratelimit-reset-requests": "20s"}
+        raw.parse.return_value.choices[0].message.content = " yes "
+        client = MagicMock()
+        create = client.chat.completions.with_raw_response.create
+        create.side_effect = [api_error(RateLimitError, 429), raw]
+        with patch.object(process_emails, "get_client", return_value=client), \
+                patch.object(process_emails, "get_cache", return_value=None), \
+                patch.object(rate_limit.time, "sleep"), \
+                patch.object(process_emails.openai_limiter, "observe_quota") as observe:
+            assert process_emails._complete("prompt", "text") == "yes"
+        assert create.call_count == 2
+        observe.assert_called_once_with(100.0, 20.0)
+
+    def test_complete_marks_retryable_failures(self):
+        """Test that LLMError records whether a later run could succeed."""
+        client = MagicMock()
+        create = client.chat.completions.with_raw_response.create
+        with patch.object(process_emails, "get_client", return_value=client), \
+                patch.object(process_emails, "get_cache", return_value=None):
+            create.side_effect = api_error(BadRequestError, 400)
+            with pytest.raises(LLMError) as error:
+                process_emails._complete("prompt", "text")
+        assert not error.value.retryable
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
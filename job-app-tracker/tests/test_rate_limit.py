@@ -0,0 +1,170 @@
+# tests/test_rate_limit.py
+"""Unit tests for scripts/rate_limit.py functionality."""
+
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import rate_limit
+from scripts.rate_limit import (
+    CLOSED, OPEN, SERVER_ERROR, THROTTLED, AdaptiveRateLimiter, CircuitOpenError, parse_duration
+)
+
+
+class Throttled(Exception):
+    pass
+
+
+class Broken(Exception):
+    pass
+
+
+def classify(error):
+    if isinstance(error, Throttled):
+        return THROTTLED, None
+    if isinstance(error, Broken):
+        return SERVER_ERROR, None
+    return None, None
+
+
+class FakeClock:
+    """Deterministic replacement for time.monotonic and time.sleep."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with patch.object(rate_limit.time, "monotonic", fake.monotonic), \
+            patch.object(rate_limit.time, "sleep", fake.sleep):
+        yield fake
+
+
+def make_limiter(**kwargs):
+    options = {"rate": 10, "classify": classify, "max_retries": 3, "failure_threshold": 3,
+               "reset_timeout": 30.0}
+    options.update(kwargs)
+    return AdaptiveRateLimiter("test", **options)
+
+
+class TestParseDuration:
+    """Tests for quota header durations."""
+
+    def test_formats(self):
+        """Test plain seconds and OpenAI-style durations."""
+        assert parse_duration("30") == 30.0
+        assert parse_duration("20ms") == pytest.approx(0.02)
+        assert parse_duration("6m0s") == 360.0
+        assert parse_duration("1h2m3.5s") == pytest.approx(3723.5)
+        assert parse_duration(None) is None
+        assert parse_duration("soon") is None
+
+
+class TestTokenBucket:
+    """Tests for rate limiting."""
+
+    def test_burst_then_paced(self, clock):
+        """Test that calls beyond the burst wait for tokens to refill."""
+        limiter = make_limiter(burst=2)
+        for _ in range(4):
+            limiter.acquire()
+        assert clock.now == pytest.approx(0.2)
+
+    def test_cost_larger_than_capacity(self, clock):
+        """Test that an oversized call waits for a full bucket instead of forever."""
+        limiter = make_limiter(burst=5)
+        limiter.acquire(cost=5)
+        limiter.acquire(cost=50)
+        assert clock.now == pytest.approx(0.5)
+
+
+class TestAdaptation:
+    """Tests for retries and AIMD rate changes."""
+
+    def test_throttle_halves_rate_and_retries(self, clock):
+        """Test that a 429 halves the rate, backs off, and the retry succeeds."""
+        calls = iter([Throttled(), "ok"])
+
+        def fn():
+            result = next(calls)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        limiter = make_limiter()
+        assert limiter.call(fn) == "ok"
+        metrics = limiter.metrics()
+        assert metrics["throttled"] == 1
+        assert metrics["retries"] == 1
+        assert metrics["backoff_total"] > 0
+        assert limiter.rate == pytest.approx(5 + limiter.increase)
+
+    def test_non_retryable_error_raised_immediately(self, clock):
+        """Test that errors retrying cannot fix are not retried."""
+        limiter = make_limiter()
+        with pytest.raises(ValueError):
+            limiter.call(lambda: (_ for _ in ()).throw(ValueError("bad request")))
+        assert limiter.metrics()["retries"] == 0
+
+    def test_retry_after_respected(self, clock):
+        """Test that a server-requested delay pauses callers at least that long."""
+        limiter = make_limiter()
+        limiter.record_failure(THROTTLED, retry_after=7.0)
+        limiter.acquire()
+        assert clock.now >= 7.0
+
+    def test_quota_headers_cap_rate(self, clock):
+        """Test that remaining quota lowers the rate to last until reset."""
+        limiter = make_limiter()
+        limiter.observe_quota(remaining=3, reset_seconds=1.0)
+        assert limiter.rate == 3
+        limiter.observe_quota(remaining=1000, reset_seconds=1.0)
+        assert limiter.rate == 3
+
+
+class TestCircuitBreaker:
+    """Tests for failing fast during outages."""
+
+    def test_opens_then_probes_and_closes(self, clock):
+        """Test that consecutive failures open the circuit and a successful probe closes it."""
+        limiter = make_limiter(max_retries=0)
+        for _ in range(3):
+            with pytest.raises(Broken):
+                limiter.call(lambda: (_ for _ in ()).throw(Broken()))
+        assert limiter.metrics()["state"] == OPEN
+        with pytest.raises(CircuitOpenError):
+            limiter.call(lambda: "ok")
+
+        clock.now += 31
+        assert limiter.call(lambda: "ok") == "ok"
+        assert limiter.metrics()["state"] == CLOSED
+        assert limiter.metrics()["circuit_opens"] == 1
+
+    def test_failed_probe_reopens(self, clock):
+        """Test that a failing probe reopens the circuit."""
+        limiter = make_limiter(max_retries=0, failure_threshold=1)
+        with pytest.raises(Broken):
+            limiter.call(lambda: (_ for _ in ()).throw(Broken()))
+        clock.now += 31
+        with pytest.raises(Broken):
+            limiter.call(lambda: (_ for _ in ()).throw(Broken()))
+        assert limiter.metrics()["state"] == OPEN
+        assert limiter.metrics()["circuit_opens"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
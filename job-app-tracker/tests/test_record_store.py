@@ -0,0 +1,179 @@
+"""Unit tests for scripts/record_store.py functionality."""
+
+import json
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scripts.record_store as record_store
+from scripts.record_store import RecordStore, manifest_path, read_applications, read_manifest, write_applications
+
+
+def record(n, date="2025-01-01"):
+    return {"Company": f"C{n}", "Job Title": "T", "Location": "L", "status": "Applied",
+            "Date": date, "email_id": f"m{n}"}
+
+
+def exported(*records):
+    return [{k: v for k, v in r.items() if k != "email_id"} for r in records]
+
+
+class TestRecordStore:
+    """Tests for the RecordStore class."""
+
+    def test_checkpoint_appends_only(self, tmp_path):
+        """Test that appends go to the journal and leave the export untouched."""
+        path = str(tmp_path / "apps.json")
+        write_applications([record(0)], path)
+        store = RecordStore(path)
+        records = store.load()
+        mtime = os.stat(path).st_mtime_ns
+
+        records.append(record(1))
+        store.append(records[store.count:])
+        records.append(record(2))
+        store.append(records[store.count:])
+
+        assert os.stat(path).st_mtime_ns == mtime
+        with open(store.journal_path) as f:
+            assert [json.loads(line)["Company"] for line in f] == ["C1", "C2"]
+        assert [r["Company"] for r in RecordStore(path).load()] == ["C0", "C1", "C2"]
+
+    def test_compact_exports_legacy_format(self, tmp_path):
+        """Test that compaction writes the JSON export without internal fields."""
+        path = str(tmp_path / "apps.json")
+        store = RecordStore(path)
+        records = store.load() + [record(1)]
+        store.append(records)
+        store.compact(records)
+
+        assert not os.path.exists(store.journal_path)
+        exported = read_applications(path)
+        assert exported == [{k: v for k, v in record(1).items() if k != "email_id"}]
+
+    def test_threshold_triggers_compaction(self, tmp_path):
+        """Test that should_compact fires once the journal is large enough."""
+        store = RecordStore(str(tmp_path / "apps.json"), compact_threshold=2)
+        store.append([record(1)])
+        assert not store.should_compact()
+        store.append([record(2)])
+        assert store.should_compact()
+
+    def test_torn_journal_line_ignored(self, tmp_path):
+        """Test that a partially written final journal line is skipped."""
+        path = str(tmp_path / "apps.json")
+        store = RecordStore(path)
+        store.append([record(1)])
+        with open(store.journal_path, "a") as f:
+            f.write('{"Company": "C2", "Job')
+        assert [r["Company"] for r in RecordStore(path).load()] == ["C1"]
+
+    def test_interrupted_compaction_not_duplicated(self, tmp_path):
+        """Test that a crash after writing the export doesn't replay the journal."""
+        path = str(tmp_path / "apps.json")
+        store = RecordStore(path)
+        store.append([record(1)])
+        # Simulate a crash after the export was written but before the journal was removed
+        with patch.object(store, "_truncate_journal", side_effect=OSError("crash")), pytest.raises(OSError):
+            store.compact([record(1)])
+
+        # read() sees the same records but leaves the recovery to load()
+        assert [r["Company"] for r in RecordStore(path).read()] == ["C1"]
+        assert os.path.exists(store.journal_path) and os.path.exists(store.marker_path)
+        assert [r["Company"] for r in RecordStore(path).load()] == ["C1"]
+        assert not os.path.exists(store.journal_path)
+
+    def test_interrupted_before_export_replays_journal(self, tmp_path):
+        """Test that a crash before the export was written keeps journal records."""
+        path = str(tmp_path / "apps.json")
+        write_applications([record(0)], path)
+        store = RecordStore(path)
+        store.load()
+        store.append([record(1)])
+        with patch.object(record_store, "write_applications", side_effect=OSError("crash")), pytest.raises(OSError):
+            store.compact([record(0), record(1)])
+
+        assert [r["Company"] for r in RecordStore(path).read()] == ["C0", "C1"]
+        assert [r["Company"] for r in RecordStore(path).load()] == ["C0", "C1"]
+
+    def test_interrupted_compaction_with_removals_keeps_journal(self, tmp_path):
+        """Test that a crash before the export is written keeps the journal when removals offset it."""
+        path = str(tmp_path / "apps.json")
+        write_applications([record(0), record(1), record(2)], path)
+        store = RecordStore(path)
+        store.load()
+        store.append([record(3)])
+        # Dropping C0 (as clean_duplicates does) leaves the record count unchanged
+        with patch.object(record_store, "write_applications", side_effect=OSError("crash")), pytest.raises(OSError):
+            store.compact([record(1), record(2), record(3)])
+
+        assert [r["Company"] for r in RecordStore(path).read()] == ["C0", "C1", "C2", "C3"]
+        assert [r["Company"] for r in RecordStore(path).load()] == ["C0", "C1", "C2", "C3"]
+        assert [r["Company"] for r in RecordStore(path).load()] == ["C0", "C1", "C2", "C3"]
+
+
+class TestPartitions:
+    """Tests for the month-partitioned layout."""
+
+    def test_migrates_and_reassembles_original_order(self, tmp_path):
+        """Test that partitioning replaces the single file and the legacy view keeps record order."""
+        path = str(tmp_path / "apps.json")
+        records = [record(0, "2025-02-03"), record(1, "2025-01-09"), record(2, "2025-02-10"), record(3, "Unknown")]
+        write_applications(records, path)
+        store = RecordStore(path, partition="month")
+        store.compact(store.load())
+
+        assert not os.path.exists(path)
+        manifest = read_manifest(path)
+        assert {key: entry["count"] for key, entry in manifest["partitions"].items()} == {
+            "2025-01": 1, "2025-02": 2, "unknown": 1
+        }
+        assert read_applications(path) == exported(*records)
+
+    def test_compaction_rewrites_only_dirty_partitions(self, tmp_path):
+        """Test that adding a record to one month leaves the other partitions untouched."""
+        path = str(tmp_path / "apps.json")
+        store = RecordStore(path, partition="month")
+        records = [record(0, "2025-01-09"), record(1, "2025-02-03")]
+        store.compact(records)
+        january = os.path.join(str(tmp_path / "apps"), "2025-01.json")
+        mtime = os.stat(january).st_mtime_ns
+
+        records.append(record(2, "2025-02-20"))
+        store.append(records[-1:])
+        store.compact(records)
+        assert os.stat(january).st_mtime_ns == mtime
+        assert read_manifest(path)["partitions"]["2025-02"]["count"] == 2
+        assert RecordStore(path, partition="month").load() == exported(*records)
+
+    def test_window_reads_only_recent_partitions(self, tmp_path):
+        """Test that a windowed load skips older partitions and includes journaled records."""
+        path = str(tmp_path / "apps.json")
+        store = RecordStore(path, partition="month")
+        store.compact([record(0, "2024-12-30"), record(1, "2025-03-02"), record(2, "2025-03-20")])
+        store.append([record(3, "2025-03-25")])
+        # A corrupt older partition proves it is never read
+        with open(os.path.join(str(tmp_path / "apps"), "2024-12.json"), "w") as f:
+            f.write("not json")
+
+        window = RecordStore(path, partition="month").load_since("2025-03-10")
+        assert [r["Company"] for r in window] == ["C2", "C3"]
+
+    def test_switching_back_restores_single_file(self, tmp_path):
+        """Test that compacting with partitioning off writes the single file and removes partitions."""
+        path = str(tmp_path / "apps.json")
+        records = [record(0, "2025-01-09"), record(1, "2025-02-03")]
+        RecordStore(path, partition="month").compact(records)
+        RecordStore(path).compact(records)
+
+        assert not os.path.exists(manifest_path(path))
+        with open(path) as f:
+            assert json.load(f) == exported(*records)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
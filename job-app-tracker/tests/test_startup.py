@@ -0,0 +1,43 @@
+# tests/test_startup.py
+"""Import-time budget for the entry-point scripts."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds allowed for importing every entry point in a fresh interpreter
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "1.0"))
+HEAVY_MODULES = ("openai", "googleapiclient.discovery", "google.oauth2.credentials", "plotly", "numpy")
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import main, clean_duplicates, visualize_table
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+class TestStartup:
+    """Tests for fast, side-effect-free imports."""
+
+    def test_entry_points_import_lightly(self, tmp_path):
+        """Test that imports need no API key, skip the heavy stacks and stay within budget."""
+        env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+        env["PYTHONPATH"] = PROJECT_DIR
+        completed = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=tmp_path, env=env, capture_output=True, text=True, check=True
+        )
+        probe = json.loads(completed.stdout.strip().splitlines()[-1])
+        assert probe["loaded"] == []
+        assert probe["elapsed"] < IMPORT_TIME_BUDGET
+        assert os.listdir(tmp_path) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,73 @@
+# tests/test_visualize_table.py
+"""Unit tests for visualize_table.py functionality."""
+
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from visualize_table import generate_markdown_table, render
+
+
+def record(company, date, status="Applied"):
+    return {"Company": company, "Job Title": "Analyst", "Location": "NYC", "status": status, "Date": date}
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+
+    def write(records):
+        with open("data/job_applications.json", "w") as f:
+            json.dump(records, f)
+    return write
+
+
+class TestMarkdownTable:
+    """Tests for table rows."""
+
+    def test_escapes_pipes(self):
+        """Test that cell separators inside values are escaped."""
+        table = generate_markdown_table([record("A|B", "2025-03-01", "declined")])
+        assert table.splitlines()[2] == "| A\\|B | Analyst | NYC | Declined | 2025-03-01 |"
+
+
+class TestRender:
+    """Tests for incremental regeneration."""
+
+    def test_skips_unchanged_dataset(self, workspace):
+        """Test that outputs are regenerated only when the dataset changes."""
+        workspace([record("Acme", "2025-03-01"), record("Beta", "2025-03-05")])
+        assert render(partition="none") is True
+        with open("TABLE.md") as f:
+            assert [line.split(" | ")[0] for line in f.read().splitlines()[2:]] == ["| Beta", "| Acme"]
+        assert os.path.exists("visualizations/sankey.html")
+
+        assert render(partition="none") is False
+        workspace([record("Acme", "2025-03-01")])
+        assert render(partition="none") is True
+
+    def test_month_partitions_rewrite_changed_months_only(self, workspace):
+        """Test that only pages for months with new records are rewritten."""
+        workspace([record("Acme", "2025-02-10"), record("Beta", "2025-03-05")])
+        render(partition="month")
+        with open("TABLE.md") as f:
+            assert "| [2025-02](tables/2025-02.md) | 1 |" in f.read()
+        february = os.stat("tables/2025-02.md").st_mtime_ns
+
+        workspace([record("Acme", "2025-02-10"), record("Beta", "2025-03-05"), record("Gamma", "2025-03-07")])
+        render(partition="month")
+        assert os.stat("tables/2025-02.md").st_mtime_ns == february
+        with open("tables/2025-03.md") as f:
+            assert "Gamma" in f.read()
+
+        render(partition="none", force=True)
+        assert not os.path.exists("tables/2025-02.md")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,53 @@
+# train_gate.py
+"""Retrain the local job/not-job gate model from the labels logged by past runs."""
+
+import argparse
+import json
+import logging
+import sys
+
+from scripts.gate_model import LABELS_PATH, MODEL_PATH, TARGET_PRECISION, LabelLog, train_gate_model
+
+logger = logging.getLogger(__name__)
+
+
+def retrain(labels_path: str = LABELS_PATH, model_path: str = MODEL_PATH,
+            target: float = TARGET_PRECISION) -> bool:
+    """
+    Train the gate model on the label log and save it with its calibration and test reports.
+
+    Args:
+        labels_path: Path to the JSONL label log.
+        model_path: Where to save the model.
+        target: Minimum calibration precision of local decisions.
+
+    Returns:
+        True if a model was saved, False if there were not enough labels.
+    """
+    entries = LabelLog(labels_path).load()
+    try:
+        model = train_gate_model(entries, target=target)
+    except ValueError as e:
+        logger.info(f"Not training the gate model: {e}")
+        return False
+    model.save(model_path)
+    json.dump(model.report, sys.stdout, indent=2)
+    print()
+    test = model.report["test"]
+    logger.info(f"Gate model saved to {model_path}, on test labels: job precision {test['job']['precision']:.1%} "
+                f"recall {test['job']['recall']:.1%}, not-job precision {test['not_job']['precision']:.1%} "
+                f"recall {test['not_job']['recall']:.1%}, {test['coverage']:.1%} of emails decided locally")
+    for side in ("job", "not_job"):
+        if test[side]["recall"] and test[side]["precision"] < target:
+            logger.warning(f"Test {side} precision {test[side]['precision']:.1%} is below the {target:.1%} target")
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--labels", default=LABELS_PATH, help="Label log to train on")
+    parser.add_argument("--model", default=MODEL_PATH, help="Where to save the model")
+    parser.add_argument("--precision", type=float, default=TARGET_PRECISION,
+                        help="Minimum calibration precision of decisions made without the LLM")
+    args = parser.parse_args()
+    retrain(args.labels, args.model, args.precision)
@@ -1,46 +1,149 @@
 # visualize_table.py
+import hashlib
+import io
 import json
 import os
-import plotly.graph_objects as go
+import re
+import tempfile
+from contextlib import contextmanager
+
+from scripts.entity_resolution import load_resolver
+from scripts.lifecycle import LIFECYCLE_PATH, STATUSES, load_lifecycle
+from scripts.record_store import RESULTS_PATH, dataset_file, read_applications
+
+TABLE_PATH = "TABLE.md"
+TABLES_DIR = "tables"
+SANKEY_PATH = "visualizations/sankey.html"
+RENDER_STATE_PATH = "data/render_state.json"
+# "none" writes one TABLE.md; "month" writes tables/YYYY-MM.md plus an index in TABLE.md
+TABLE_PARTITION = os.getenv("TABLE_PARTITION", "none")
+
+TABLE_HEADER = "| Company | Job Title | Location | Status | Date |\n| --- | --- | --- | --- | --- |\n"
+MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}")
+
+
+@contextmanager
+def atomic_open(path):
+    # Write to a temporary file and rename it over the target, so readers never see a partial file
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def content_hash(*paths):
+    # Hash input files in chunks; a missing file hashes differently from an empty one
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.encode("utf-8") + b"\0")
+        if not os.path.exists(path):
+            digest.update(b"missing\0")
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_render_state(path=RENDER_STATE_PATH):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_render_state(state, path=RENDER_STATE_PATH):
+    with atomic_open(path) as f:
+        json.dump(state, f, indent=2)
+
+
+def format_row(item):
+    company = item.get("Company", "").replace("|", "\\|")
+    job_title = item.get("Job Title", "").replace("|", "\\|")
+    location = item.get("Location", "").replace("|", "\\|")
+    status = item.get("status", "").replace("|", "\\|").capitalize()
+    date = item.get("Date", "Unknown").replace("|", "\\|")
+    return f"| {company} | {job_title} | {location} | {status} | {date} |\n"
+
+
+def write_markdown_table(data, f):
+    # Stream rows to the file instead of building the whole table in memory
+    f.write(TABLE_HEADER)
+    for item in data:
+        f.write(format_row(item))
+
 
 def generate_markdown_table(data):
-    header = "| Company | Job Title | Location | Status | Date |\n| --- | --- | --- | --- | --- |\n"
-    rows = ""
+    buffer = io.StringIO()
+    write_markdown_table(data, buffer)
+    return buffer.getvalue()
+
+
+def month_of(item):
+    date = item.get("Date", "")
+    return date[:7] if MONTH_PATTERN.match(date) else "unknown"
+
+
+def remove_month_pages(months, tables_dir=TABLES_DIR):
+    for month in months:
+        month_path = os.path.join(tables_dir, f"{month}.md")
+        if os.path.exists(month_path):
+            os.remove(month_path)
+
+
+def write_partitioned_tables(data, state, table_path=TABLE_PATH, tables_dir=TABLES_DIR):
+    # Only months whose rows changed are rewritten; rows keep the order of data
+    months = {}
     for item in data:
-        company = item.get("Company", "").replace("|", "\\|")
-        job_title = item.get("Job Title", "").replace("|", "\\|")
-        location = item.get("Location", "").replace("|", "\\|")
-        status = item.get("status", "").replace("|", "\\|").capitalize()
-        date = item.get("Date", "Unknown").replace("|", "\\|")
-        rows += f"| {company} | {job_title} | {location} | {status} | {date} |\n"
-    return header + rows
-
-def generate_sankey_chart(data):
+        months.setdefault(month_of(item), []).append(item)
+    previous = state.get("months", {})
+    hashes = {}
+    written = 0
+    for month, rows in months.items():
+        hashes[month] = hashlib.sha256(json.dumps(rows, sort_keys=True).encode("utf-8")).hexdigest()
+        month_path = os.path.join(tables_dir, f"{month}.md")
+        if previous.get(month) == hashes[month] and os.path.exists(month_path):
+            continue
+        with atomic_open(month_path) as f:
+            f.write(f"# Job Applications: {month}\n\n")
+            write_markdown_table(rows, f)
+        written += 1
+
+    # Drop pages for months that no longer have records
+    remove_month_pages(set(previous) - set(months), tables_dir)
+
+    with atomic_open(table_path) as f:
+        f.write("| Month | Applications |\n| --- | --- |\n")
+        for month, rows in months.items():
+            f.write(f"| [{month}]({tables_dir}/{month}.md) | {len(rows)} |\n")
+    state["months"] = hashes
+    print(f"Markdown tables updated for {written} of {len(months)} months, index saved to {table_path}")
+
+
+def generate_sankey_chart(data, lifecycle=None, output_path=SANKEY_PATH):
+    # plotly is slow to import, so only load it when a chart is actually drawn
+    import plotly.graph_objects as go
+
     # Define all possible status nodes
-    labels = ["Applied", "Interviewed", "Offer", "Declined"]
-    
-    # Count occurrences of each status
-    status_counts = {"Applied": 0, "Interviewed": 0, "Offer": 0, "Declined": 0}
-    for item in data:
-        status = item.get("status", "").capitalize()
-        if status in status_counts:
-            status_counts[status] += 1
-    
-    # Define Sankey links (simplified: each status as a standalone flow from a source)
-    source = [0, 0, 0, 0]  # All from "Start" (index 0 temporarily replaces full flow)
-    target = [0, 1, 2, 3]  # Applied, Interviewed, Offer, Declined
-    value = [
-        status_counts["Applied"],
-        status_counts["Interviewed"],
-        status_counts["Offer"],
-        status_counts["Declined"]
-    ]
-    
-    # Remove zero-value links
-    source = [s for s, v in zip(source, value) if v > 0]
-    target = [t for t, v in zip(target, value) if v > 0]
-    value = [v for v in value if v > 0]
-    
+    labels = list(STATUSES)
+
+    # Links are real status transitions per application (Applied -> Interviewed -> Offer/Declined)
+    if lifecycle is None:
+        lifecycle = load_lifecycle(data, resolver=load_resolver())
+    source, target, value = [], [], []
+    for (from_status, to_status), count in sorted(lifecycle.transition_counts().items()):
+        source.append(labels.index(from_status))
+        target.append(labels.index(to_status))
+        value.append(count)
+
     # Create Sankey diagram
     fig = go.Figure(data=[go.Sankey(
         node=dict(
@@ -57,28 +160,50 @@ def generate_sankey_chart(data):
             color="#cccccc"  # Light gray links
         )
     )])
-    
+
     # Update layout
     fig.update_layout(title_text="Job Application Status Flow", font_size=12)
-    
+
     # Save to HTML file
-    os.makedirs("visualizations", exist_ok=True)
-    fig.write_html("visualizations/sankey.html")
-    print("Sankey chart generated and saved to visualizations/sankey.html")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    fig.write_html(output_path)
+    print(f"Sankey chart generated and saved to {output_path}")
+
+
+def render(data_path=RESULTS_PATH, lifecycle_path=LIFECYCLE_PATH, state_path=RENDER_STATE_PATH,
+           table_path=TABLE_PATH, tables_dir=TABLES_DIR, sankey_path=SANKEY_PATH,
+           partition=TABLE_PARTITION, force=False):
+    # Skip everything when the inputs and layout are unchanged since the last render
+    state = load_render_state(state_path)
+    # With month partitions the manifest holds every partition's hash
+    inputs_hash = content_hash(dataset_file(data_path), lifecycle_path)
+    outputs = [table_path, sankey_path]
+    if (not force and state.get("hash") == inputs_hash and state.get("partition") == partition
+            and all(os.path.exists(path) for path in outputs)):
+        print("Dataset unchanged since the last render; skipping TABLE.md and Sankey chart.")
+        return False
+
+    data = read_applications(data_path)
 
-if __name__ == '__main__':
-    # Load results from JSON file
-    with open("data/job_applications.json", "r") as f:
-        data = json.load(f)
-    
     # Sort by date, newest first
-    data = sorted(data, key=lambda x: x["Date"], reverse=True)
-    
-    # Generate and save Markdown table
-    table_markdown = generate_markdown_table(data)
-    with open("TABLE.md", "w") as f:
-        f.write(table_markdown)
-    print("Markdown table generated and saved to TABLE.md")
-    
+    data = sorted(data, key=lambda x: x.get("Date", ""), reverse=True)
+
+    # Generate and save Markdown table(s)
+    if partition == "month":
+        write_partitioned_tables(data, state, table_path, tables_dir)
+    else:
+        with atomic_open(table_path) as f:
+            write_markdown_table(data, f)
+        remove_month_pages(state.pop("months", {}), tables_dir)
+        print(f"Markdown table generated and saved to {table_path}")
+
     # Generate and save Sankey chart
-    generate_sankey_chart(data)
\ No newline at end of file
+    generate_sankey_chart(data, load_lifecycle(data, lifecycle_path, load_resolver()), sankey_path)
+
+    state.update(hash=inputs_hash, partition=partition)
+    save_render_state(state, state_path)
+    return True
+
+
+if __name__ == '__main__':
+    render()